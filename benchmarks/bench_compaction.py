@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Measure prompt-token reduction from diff compaction on a corpus of real diffs.
+
+The corpus is either a directory of ``*.diff``/``*.patch`` files or, by
+default, the last N commits of a git repository (``git show`` per commit).
+
+    python benchmarks/bench_compaction.py --repo . --commits 200
+    python benchmarks/bench_compaction.py --dir path/to/diffs --radius 1
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from autopr import compaction, tokens  # noqa: E402
+
+
+def corpus_from_git(repo: str, n: int):
+    shas = subprocess.run(["git", "-C", repo, "rev-list", f"--max-count={n}", "--no-merges", "HEAD"], capture_output=True, text=True, check=True).stdout.split()
+    for sha in shas:
+        out = subprocess.run(["git", "-C", repo, "show", "--format=", "-M", sha], capture_output=True, text=True, errors="replace").stdout
+        if out.strip():
+            yield sha[:10], out
+
+
+def corpus_from_dir(path: str):
+    for p in sorted(Path(path).rglob("*")):
+        if p.suffix in (".diff", ".patch"):
+            yield p.name, p.read_text(encoding="utf-8", errors="replace")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repo", default=".")
+    ap.add_argument("--commits", type=int, default=100)
+    ap.add_argument("--dir")
+    ap.add_argument("--radius", type=int, default=2)
+    args = ap.parse_args()
+
+    corpus = corpus_from_dir(args.dir) if args.dir else corpus_from_git(args.repo, args.commits)
+    raw_total = compact_total = 0
+    n = 0
+    elapsed = 0.0
+    for name, diff in corpus:
+        start = time.perf_counter()
+        text, stats = compaction.compact_diff(diff, context_radius=args.radius)
+        elapsed += time.perf_counter() - start
+        raw = tokens.count_tokens(diff)
+        compact = tokens.count_tokens(text)
+        raw_total += raw
+        compact_total += compact
+        n += 1
+        print(f"{name:<40} {raw:>9} -> {compact:>9} tokens ({100.0 * (raw - compact) / max(1, raw):5.1f}% saved)")
+
+    if not n:
+        print("empty corpus")
+        return
+    print("-" * 80)
+    print(f"diffs: {n}  tokenizer: {tokens.get_tokenizer().name}  radius: {args.radius}")
+    print(f"total: {raw_total} -> {compact_total} tokens, {100.0 * (raw_total - compact_total) / max(1, raw_total):.1f}% reduction")
+    print(f"compaction time: {elapsed * 1000:.1f} ms total, {elapsed * 1000 / n:.2f} ms/diff")
+
+
+if __name__ == "__main__":
+    main()
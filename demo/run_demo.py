@@ -11,9 +11,14 @@ This script:
 import subprocess
 import json
 import shutil
+import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from autopr.render import render_markdown  # noqa: E402
+
 SAMPLE = ROOT / "demo" / "sample-project"
 PR_DIFF = ROOT / "demo" / "prs" / "pr.diff"
 COMMITS = ROOT / "demo" / "prs" / "commits.txt"
@@ -38,61 +43,6 @@ def apply_diff_to_file(diff_file: Path, target_file: Path):
     target_file.write_text('\n'.join(added_lines), encoding='utf-8')
 
 
-def render_markdown_from_json(js: dict) -> str:
-    md = []
-    md.append('# AutoPR — Review Summary (demo)')
-    md.append('')
-
-    pr = js.get('pr', {})
-    review = js.get('review', {})
-
-    if pr:
-        md.append('## 📝 Generated PR')
-        md.append(f"**Title:** {pr.get('title', '')}\n")
-        md.append('<details><summary>Generated PR description</summary>\n')
-        if pr.get('what_changed'):
-            md.append(f"**What changed:** {pr.get('what_changed')}\n")
-        if pr.get('why'):
-            md.append(f"**Why:** {pr.get('why')}\n")
-        if pr.get('files_impacted'):
-            md.append(f"**Files:** {', '.join(pr.get('files_impacted'))}\n")
-        if pr.get('tests'):
-            md.append(f"**Tests:** {pr.get('tests')}\n")
-        if pr.get('risk_level'):
-            md.append(f"**Risk level:** {pr.get('risk_level')}\n")
-        md.append('</details>\n')
-
-    if review:
-        md.append('## ✅ AI Review Summary')
-        if review.get('summary'):
-            md.append(review.get('summary'))
-
-        if review.get('findings'):
-            md.append('\n### Findings')
-            for f in review['findings'][:25]:
-                md.append(f"- **{f.get('type', 'unknown')}** ({f.get('severity') or 'info'}): {f.get('message')}")
-
-    # Tests
-    if review.get('_tests'):
-        t = review['_tests']
-        md.append('\n## 🧪 Tests')
-        md.append(f"Passed: {t.get('passed')} • Failed: {t.get('failed')} • Errors: {t.get('errors')} • Skipped: {t.get('skipped')}")
-
-    # Coverage
-    if review.get('_coverage'):
-        c = review['_coverage']
-        md.append('\n## 📊 Coverage')
-        md.append(f"Before: {c.get('before')}% • After: {c.get('after')}% • Δ: {c.get('delta')}%")
-
-    # Issue alignment
-    if review.get('_issue_alignment'):
-        ia = review['_issue_alignment']
-        md.append('\n## 🎯 Issue alignment')
-        md.append(f"Score: {ia.get('score')} • Matched: {', '.join(ia.get('matched', []))}")
-
-    return '\n'.join(md)
-
-
 def main():
     # ensure sample project tests pass initially
     run_pytest(SAMPLE, ROOT / 'demo' / 'base_test.log')
@@ -119,7 +69,7 @@ def main():
         # runner now returns { pr: {...}, review: {...} }
         pr = data.get('pr', {})
         review = data.get('review', {})
-        md = render_markdown_from_json({'pr': pr, 'review': review})
+        md = render_markdown({'pr': pr, 'review': review}, title='# AutoPR — Review Summary (demo)')
         OUT_MD.write_text(md, encoding='utf-8')
         print('Demo outputs written to', OUT_JSON, OUT_MD)
 
@@ -0,0 +1,181 @@
+"""Size-aware admission control for the API's review and generate endpoints.
+
+Each request is sized before any work starts: diff bytes, number of files
+(``diff --git`` headers) and estimated prompt tokens (~4 bytes per token; the
+real tokenizer is too slow to run on a diff we may reject). Then:
+
+- anything over a hard cap (``max_bytes``, ``max_files``, ``max_tokens``) is
+  rejected with :class:`RequestTooLarge` (HTTP 413)
+- a request within every ``small_*`` threshold runs in the ``small`` lane,
+  anything else in the ``large`` lane
+- each lane has its own concurrency limit, so a giant PR waits behind other
+  giant PRs and never takes the slots of one-line fixes
+- a lane whose queue already holds ``max_queue`` waiters, or whose wait passes
+  ``queue_timeout_seconds``, answers :class:`LaneBusy` (HTTP 503)
+
+The lane wait is asynchronous and happens on the event loop, before the
+request's work is handed to the threadpool. Queued requests therefore hold
+no worker thread, and a full large lane cannot starve small requests of
+threads. Limits apply per server process. Settings come from ``[admission]`` in
+``.autopr.toml``; ``GET /admission`` reports queue depth, active requests and
+wait times per lane.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from . import config
+
+DEFAULTS: Dict[str, Any] = {
+    "small_max_bytes": 64 * 1024,
+    "small_max_files": 20,
+    "small_max_tokens": 16_000,
+    "small_concurrency": 8,
+    "large_concurrency": 2,
+    "max_bytes": 8 * 1024 * 1024,
+    "max_files": 2_000,
+    "max_tokens": 2_000_000,
+    "max_queue": 32,
+    "queue_timeout_seconds": 30.0,
+}
+
+
+class RequestTooLarge(ValueError):
+    """The request is over a hard cap and will not be processed."""
+
+
+class LaneBusy(RuntimeError):
+    """The request's lane is full; the client should retry later."""
+
+    def __init__(self, lane: str, message: str):
+        super().__init__(message)
+        self.lane = lane
+
+
+def measure(diff: str) -> Dict[str, int]:
+    """Cheap size estimate of a diff: bytes, files and prompt tokens."""
+    size = len(diff.encode("utf-8", errors="replace"))
+    files = diff.count("\ndiff --git ") + (1 if diff.startswith("diff --git ") else 0)
+    return {"bytes": size, "files": max(files, 1 if diff else 0), "tokens": (size + 3) // 4}
+
+
+class Lane:
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # one per event loop: the server has one, but each test client runs its own
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._slots
+
+    @contextlib.asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None) -> AsyncIterator[float]:
+        """Hold one of the lane's slots; yields the seconds spent queued."""
+        slots = self._semaphore()
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise LaneBusy(self.name, f"The {self.name} lane has {self.waiting} requests queued; retry later")
+            self.waiting += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise LaneBusy(self.name, f"Waited {time.monotonic() - start:.0f}s for a {self.name} lane slot; retry later") from None
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        waited = time.monotonic() - start
+        with self._lock:
+            self.active += 1
+            self.admitted += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        try:
+            yield waited
+        finally:
+            with self._lock:
+                self.active -= 1
+            slots.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "concurrency": self.concurrency,
+                "active": self.active,
+                "queue_depth": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": round(1000 * self.wait_total / self.admitted, 1) if self.admitted else 0.0,
+                "max_wait_ms": round(1000 * self.wait_max, 1),
+            }
+
+
+class Admission:
+    def __init__(self, **overrides: Any):
+        self.settings = {**DEFAULTS, **overrides}
+        s = self.settings
+        self.lanes = {
+            "small": Lane("small", int(s["small_concurrency"]), int(s["max_queue"])),
+            "large": Lane("large", int(s["large_concurrency"]), int(s["max_queue"])),
+        }
+        self.too_large = 0
+
+    def max_body_bytes(self) -> int:
+        # JSON string escaping can roughly double a diff on the wire
+        return 2 * int(self.settings["max_bytes"]) + 64 * 1024
+
+    def classify(self, size: Dict[str, int]) -> str:
+        """Lane name for a measured request; raises RequestTooLarge over a hard cap."""
+        s = self.settings
+        for dim, unit in (("bytes", "bytes"), ("files", "files"), ("tokens", "estimated tokens")):
+            if size[dim] > int(s[f"max_{dim}"]):
+                self.too_large += 1
+                raise RequestTooLarge(f"Diff is too large to review: {size[dim]} {unit} exceeds the limit of {s[f'max_{dim}']}")
+        small = all(size[dim] <= int(s[f"small_max_{dim}"]) for dim in ("bytes", "files", "tokens"))
+        return "small" if small else "large"
+
+    @contextlib.asynccontextmanager
+    async def admit(self, diff: str) -> AsyncIterator[str]:
+        """Size ``diff``, reject it or wait (asynchronously) for a slot in its lane; yields the lane name."""
+        lane = self.classify(measure(diff))
+        async with self.lanes[lane].slot(float(self.settings["queue_timeout_seconds"])):
+            yield lane
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"lanes": {name: lane.snapshot() for name, lane in self.lanes.items()}, "too_large": self.too_large}
+
+
+_gate: Optional[Admission] = None
+_gate_lock = threading.Lock()
+
+
+def gate() -> Admission:
+    """The process-wide controller, configured from ``[admission]`` on first use."""
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            _gate = Admission(**config.get_section("admission"))
+        return _gate
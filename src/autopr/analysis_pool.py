@@ -0,0 +1,212 @@
+"""Run per-file static analysis and lint in a reusable, guarded process pool.
+
+``ast.parse`` on a pathological file (a huge generated literal, deeply nested
+expressions) can take seconds and hundreds of MB. Large reviews therefore
+analyze each file in a worker process:
+
+- files are submitted largest first, so the slowest work starts earliest
+- each file gets a wall-clock deadline; a file that overruns is reported as an
+  ``analysis_timeout`` finding and the pool is rebuilt (a stuck worker cannot
+  be interrupted otherwise), with unfinished files resubmitted
+- workers run under an address-space limit (``RLIMIT_AS``); a file that hits
+  it becomes an ``analysis_memory_limit`` finding
+- workers are recycled after ``maxtasksperchild`` files to keep RSS bounded
+- concurrent reviews share the pool; the lock only guards creating and
+  resetting it. Each reset bumps a generation counter, so a review whose files
+  were killed by another review's reset resubmits them instead of reporting
+  timeouts
+
+Small diffs (below ``inline_max_bytes`` of added text) are analyzed in-process,
+where a pool round-trip would cost more than the work. Settings come from
+``[analysis]`` in ``.autopr.toml``, ``AUTOPR_ANALYSIS_WORKERS`` (0 disables the
+pool) and ``AUTOPR_ANALYSIS_TIMEOUT``.
+"""
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import analysis, config, lint
+
+DEFAULTS: Dict[str, Any] = {"timeout_seconds": 10.0, "memory_limit_mb": 512, "maxtasksperchild": 50, "inline_max_bytes": 32 * 1024}
+
+# (static findings, lint findings) for one file
+FileResult = Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+def settings() -> Dict[str, Any]:
+    out = {**DEFAULTS, "workers": min(4, os.cpu_count() or 1), **config.get_section("analysis")}
+    if os.getenv("AUTOPR_ANALYSIS_WORKERS"):
+        out["workers"] = int(os.environ["AUTOPR_ANALYSIS_WORKERS"])
+    if os.getenv("AUTOPR_ANALYSIS_TIMEOUT"):
+        out["timeout_seconds"] = float(os.environ["AUTOPR_ANALYSIS_TIMEOUT"])
+    return out
+
+
+def _guard_finding(kind: str, path: str, message: str) -> Dict[str, Any]:
+    finding = {"type": kind, "message": message, "severity": "info"}
+    if path:
+        finding["file"] = path
+    return finding
+
+
+def analyze_file(path: str, text: str) -> FileResult:
+    """Static analysis and lint for one file's added text (runs in a worker)."""
+    try:
+        return analysis.analyze_diff(text, language="python"), lint.run_basic_lint(text)
+    except MemoryError:
+        return [_guard_finding("analysis_memory_limit", path, "Static analysis ran out of memory on this file and was skipped")], []
+    except RecursionError:
+        return [_guard_finding("analysis_skipped", path, "File is nested too deeply for static analysis")], []
+
+
+class _PoolReset(Exception):
+    """The pool was rebuilt by another caller while our files were in flight."""
+
+
+def _init_worker(memory_limit_mb: Optional[int]) -> None:
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-POSIX
+        return
+    limit = int(memory_limit_mb) * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+class AnalysisPool:
+    """Lazily started ``multiprocessing.Pool`` for :func:`analyze_file`."""
+
+    POLL_SECONDS = 0.1
+
+    def __init__(self, workers: int = 2, timeout: float = 10.0, memory_limit_mb: Optional[int] = 512, maxtasksperchild: int = 50):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.maxtasksperchild = maxtasksperchild
+        self.stats = {"files": 0, "timeouts": 0, "errors": 0, "restarts": 0}
+        self._pool: Any = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        methods = multiprocessing.get_all_start_methods()
+        # the API process is threaded; don't fork it mid-request
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    def _acquire(self) -> Tuple[Any, int]:
+        """The current pool, started if needed, and its generation."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._ctx.Pool(self.workers, initializer=_init_worker, initargs=(self.memory_limit_mb,), maxtasksperchild=self.maxtasksperchild)
+            return self._pool, self._generation
+
+    def _reset(self, generation: int) -> None:
+        """Replace the pool, unless another caller already did since ``generation``."""
+        with self._lock:
+            if self._pool is None or generation != self._generation:
+                return
+            pool, self._pool = self._pool, None
+            self._generation += 1
+            self.stats["restarts"] += 1
+        pool.terminate()
+        pool.join()
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._generation += 1
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    def _wait(self, res: Any, generation: int) -> FileResult:
+        # poll so a reset by another caller is noticed instead of waiting out the timeout
+        deadline = time.monotonic() + self.timeout
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise multiprocessing.TimeoutError()
+            try:
+                return res.get(timeout=min(left, self.POLL_SECONDS))
+            except multiprocessing.TimeoutError:
+                if self._generation != generation:
+                    raise _PoolReset() from None
+
+    def _collect(self, submitted: List[Tuple[int, Any]], results: List[Optional[FileResult]]) -> List[int]:
+        """Keep results that already finished; return the indexes still to run."""
+        pending = []
+        for j, res in submitted:
+            if res.ready() and res.successful():
+                results[j] = res.get()
+                self.stats["files"] += 1
+            else:
+                pending.append(j)
+        return pending
+
+    def run(self, files: List[Tuple[str, str]]) -> List[FileResult]:
+        """Analyze ``(path, text)`` pairs; results come back in input order."""
+        results: List[Optional[FileResult]] = [None] * len(files)
+        pending = sorted(range(len(files)), key=lambda i: len(files[i][1]), reverse=True)
+        while pending:
+            pool, generation = self._acquire()
+            try:
+                submitted = [(i, pool.apply_async(analyze_file, files[i])) for i in pending]
+            except ValueError:
+                continue  # "Pool not running": another caller reset it under us
+            pending = []
+            for n, (i, res) in enumerate(submitted):
+                path = files[i][0]
+                try:
+                    results[i] = self._wait(res, generation)
+                    self.stats["files"] += 1
+                except _PoolReset:
+                    pending = self._collect(submitted[n:], results)
+                    break
+                except multiprocessing.TimeoutError:
+                    self.stats["files"] += 1
+                    self.stats["timeouts"] += 1
+                    results[i] = ([_guard_finding("analysis_timeout", path, f"Static analysis exceeded {self.timeout:g}s on this file and was skipped")], [])
+                    # keep what already finished, resubmit the rest to a fresh pool
+                    pending = self._collect(submitted[n + 1:], results)
+                    self._reset(generation)
+                    break
+                except Exception as e:
+                    self.stats["files"] += 1
+                    self.stats["errors"] += 1
+                    results[i] = ([_guard_finding("analysis_error", path, f"Static analysis failed on this file: {type(e).__name__}")], [])
+        return [r if r is not None else ([], []) for r in results]
+
+
+_pool: Optional[AnalysisPool] = None
+
+
+def get_pool() -> AnalysisPool:
+    global _pool
+    s = settings()
+    if _pool is None or (_pool.workers, _pool.timeout) != (int(s["workers"]), float(s["timeout_seconds"])):
+        if _pool is not None:
+            _pool.close()
+        _pool = AnalysisPool(int(s["workers"]), float(s["timeout_seconds"]), s.get("memory_limit_mb"), int(s["maxtasksperchild"]))
+    return _pool
+
+
+def analyze_files(files: List[Tuple[str, str]]) -> List[FileResult]:
+    """Analyze files in-process when small or when the pool is disabled, else in the pool."""
+    s = settings()
+    total = sum(len(text) for _, text in files)
+    if int(s["workers"]) <= 0 or total < int(s["inline_max_bytes"]):
+        return [analyze_file(path, text) for path, text in files]
+    return get_pool().run(files)
+
+
+@atexit.register
+def _shutdown() -> None:
+    if _pool is not None:
+        _pool.close()
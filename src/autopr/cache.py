@@ -0,0 +1,179 @@
+"""A small on-disk JSON cache that is safe to share between worker processes.
+
+Entries live in ``<dir>/<aa>/<sha256>.json``. Writes go to a temporary file
+in the same directory and are published with ``os.replace``, so readers never
+see a half-written entry. ``get_or_set`` takes an exclusive ``fcntl`` lock on
+a per-key lock file while computing, so concurrent workers asking for the same
+key compute it once and the others read the result (on platforms without
+``fcntl`` the lock is skipped and the last writer wins). The lock file is
+removed again once the value is stored.
+
+With ``max_bytes`` set the cache is size-bounded: reads refresh an entry's
+mtime and, every ``EVICT_EVERY`` writes, the least recently used entries are
+removed until the total is back under ~90% of the bound. Entries older than
+``ttl`` are deleted when read.
+
+The shared instance is configured with ``AUTOPR_CACHE_DIR`` or ``[cache] dir``
+in ``.autopr.toml``; without either, caching is off. ``[cache] max_mb``
+(default 256) bounds it.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from . import config
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable sha256 key for an arbitrary JSON-serializable tuple of parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class DiskCache:
+    """JSON values keyed by string; ``ttl`` (seconds) expires old entries on read."""
+
+    EVICT_EVERY = 64
+
+    def __init__(self, directory: str, ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._writes = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return default
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)["value"]
+            if self.max_bytes is not None:
+                os.utime(path)  # LRU: reads keep an entry alive
+            return value
+        except (OSError, ValueError, KeyError):
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "value": value}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        self._writes += 1
+        if self.max_bytes is not None and self._writes % self.EVICT_EVERY == 1:
+            self.evict()
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob("*/*.json"))
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under ~90% of ``max_bytes``; returns how many."""
+        if self.max_bytes is None:
+            return 0
+        entries = []
+        total = 0
+        for p in self.directory.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= target:
+                break
+            with contextlib.suppress(OSError):
+                p.unlink()
+                total -= size
+                removed += 1
+        return removed
+
+    def delete(self, key: str) -> None:
+        with contextlib.suppress(OSError):
+            self._path(key).unlink()
+
+    @contextlib.contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Exclusive cross-process lock for ``key`` (a no-op without fcntl); the lock file is removed on release."""
+        if fcntl is None:
+            yield
+            return
+        path = self._path(key).with_suffix(".lock")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            f = open(path, "a")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # the previous holder may have unlinked the file we waited on
+                if os.fstat(f.fileno()).st_ino == os.stat(path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            f.close()
+        try:
+            yield
+        finally:
+            with contextlib.suppress(OSError):
+                path.unlink()
+            f.close()  # closing releases the flock
+
+    def get_or_set(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value, computing and storing it once across processes."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self.lock(key):
+            value = self.get(key, missing)
+            if value is missing:
+                value = compute()
+                self.set(key, value)
+        return value
+
+
+_shared: Optional[DiskCache] = None
+_shared_dir: Optional[str] = None
+
+
+def shared_cache() -> Optional[DiskCache]:
+    """The process-wide cache from AUTOPR_CACHE_DIR / ``[cache] dir``, or None."""
+    global _shared, _shared_dir
+    section = config.get_section("cache")
+    directory = os.getenv("AUTOPR_CACHE_DIR") or section.get("dir")
+    if not directory:
+        return None
+    if _shared is None or _shared_dir != directory:
+        ttl = section.get("ttl_seconds")
+        max_bytes = int(float(section.get("max_mb", 256)) * 1024 * 1024)
+        _shared = DiskCache(directory, ttl=float(ttl) if ttl is not None else None, max_bytes=max_bytes)
+        _shared_dir = directory
+    return _shared
@@ -0,0 +1,196 @@
+"""Release notes for a commit range, summarized in cached, batched provider calls.
+
+- ``git log`` is streamed oldest first, one record at a time, so ranges with
+  thousands of commits never sit in memory as one string
+- commits are grouped by conventional-commit type (``feat``, ``fix``, ...;
+  anything else is ``other``) and, within a type, by pull request: a
+  ``(#123)`` squash suffix or, with ``first_parent``, a ``Merge pull request
+  #123`` commit whose body carries the PR title. Commits without a PR are
+  chunked in order, ``CHUNK`` at a time, so new commits only touch the last
+  chunk of their type
+- groups are summarized ``batch_size`` at a time per prompt, with up to
+  ``workers`` prompts in flight
+- each group's summary is cached under ``<git-dir>/autopr/changelog`` keyed by
+  provider, model and the group's commit SHAs, so regenerating after a few
+  more commits only summarizes the groups that changed
+"""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import repo_index
+from .cache import DiskCache, cache_key
+from .llm import llm
+
+CHUNK = 20
+
+_CONVENTIONAL_RE = re.compile(r"^(?P<type>[A-Za-z]+)(?:\((?P<scope>[^)]*)\))?(?P<breaking>!)?:\s*(?P<desc>.+)$")
+_SQUASH_PR_RE = re.compile(r"\s*\(#(\d+)\)\s*$")
+_MERGE_PR_RE = re.compile(r"^Merge pull request #(\d+)\b")
+
+TYPE_TITLES = {
+    "feat": "Features",
+    "fix": "Bug fixes",
+    "perf": "Performance",
+    "refactor": "Refactoring",
+    "docs": "Documentation",
+    "test": "Tests",
+    "build": "Build",
+    "ci": "CI",
+    "chore": "Chores",
+    "revert": "Reverts",
+    "style": "Style",
+    "other": "Other changes",
+}
+
+# fields and records are separated by ASCII unit/record separators, which commit messages do not contain
+_FORMAT = "%H%x1f%s%x1f%b%x1e"
+
+
+def iter_commits(repo: str, rev_range: str, first_parent: bool = False) -> Iterator[Dict[str, str]]:
+    """Stream ``{"sha", "subject", "body"}`` for ``rev_range``, oldest first."""
+    cmd = ["git", "-C", repo, "log", "--reverse", f"--format={_FORMAT}"]
+    cmd += ["--first-parent"] if first_parent else ["--no-merges"]
+    proc = subprocess.Popen([*cmd, rev_range], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    assert proc.stdout is not None
+    try:
+        pending = ""
+        for chunk in iter(lambda: proc.stdout.read(65536), ""):
+            records = (pending + chunk).split("\x1e")
+            pending = records.pop()
+            for record in records:
+                sha, subject, body = (record.lstrip("\n").split("\x1f") + ["", ""])[:3]
+                if sha:
+                    yield {"sha": sha, "subject": subject, "body": body.strip()}
+    finally:
+        proc.stdout.close()
+        err = proc.stderr.read() if proc.stderr else ""
+        if proc.wait() != 0:
+            raise RuntimeError(f"git log {rev_range} failed: {err.strip()}")
+
+
+def classify(commit: Dict[str, str]) -> Dict[str, Any]:
+    """Conventional-commit type, scope, description, breaking flag and PR number of one commit."""
+    subject = commit["subject"]
+    pr: Optional[int] = None
+    merge = _MERGE_PR_RE.match(subject)
+    if merge:
+        pr = int(merge.group(1))
+        # GitHub puts the PR title on the first body line of its merge commits
+        subject = (commit.get("body") or "").split("\n", 1)[0].strip() or subject
+    squash = _SQUASH_PR_RE.search(subject)
+    if squash:
+        pr = pr or int(squash.group(1))
+        subject = subject[:squash.start()]
+    m = _CONVENTIONAL_RE.match(subject)
+    kind = m.group("type").lower() if m else "other"
+    if kind not in TYPE_TITLES:
+        kind = "other"
+    breaking = bool(m and m.group("breaking")) or "BREAKING CHANGE" in (commit.get("body") or "")
+    return {"sha": commit["sha"], "type": kind, "scope": (m.group("scope") or "") if m else "", "description": m.group("desc") if m else subject,
+            "breaking": breaking, "pr": pr}
+
+
+def group_commits(commits: Iterator[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Groups of classified commits, in order of first appearance within each type."""
+    groups: List[Dict[str, Any]] = []
+    by_pr: Dict[tuple, Dict[str, Any]] = {}
+    open_chunk: Dict[str, Dict[str, Any]] = {}
+    for commit in commits:
+        c = classify(commit)
+        if c["pr"] is not None:
+            key = (c["type"], c["pr"])
+            group = by_pr.get(key)
+            if group is None:
+                group = by_pr[key] = {"type": c["type"], "pr": c["pr"], "commits": []}
+                groups.append(group)
+        else:
+            group = open_chunk.get(c["type"])
+            if group is None or len(group["commits"]) >= CHUNK:
+                group = open_chunk[c["type"]] = {"type": c["type"], "pr": None, "commits": []}
+                groups.append(group)
+        group["commits"].append(c)
+    for group in groups:
+        group["breaking"] = any(c["breaking"] for c in group["commits"])
+    return groups
+
+
+def format_groups(groups: List[Dict[str, Any]]) -> str:
+    """Prompt text for one batch; groups are addressed as ``g1``, ``g2``, ... in order."""
+    lines = []
+    for i, group in enumerate(groups, 1):
+        where = f" (PR #{group['pr']})" if group["pr"] is not None else ""
+        lines.append(f"[g{i}] {group['type']}{where}")
+        lines.extend(f"- {c['description']}" for c in group["commits"])
+    return "\n".join(lines)
+
+
+def _group_key(group: Dict[str, Any]) -> str:
+    return cache_key("changelog", getattr(llm, "provider_name", type(llm).__name__), getattr(llm, "model", ""), [c["sha"] for c in group["commits"]])
+
+
+def cache_dir(repo: str) -> str:
+    return os.path.join(os.path.dirname(repo_index.index_path(repo)), "changelog")
+
+
+def summarize(groups: List[Dict[str, Any]], cache: Optional[DiskCache] = None, batch_size: int = 8, workers: int = 4) -> Dict[str, int]:
+    """Fill ``group["summary"]`` for every group; returns call and cache counts."""
+    todo = []
+    for group in groups:
+        cached = cache.get(_group_key(group)) if cache is not None else None
+        if cached:
+            group["summary"] = cached
+        else:
+            todo.append(group)
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+
+    def run(batch: List[Dict[str, Any]]) -> None:
+        try:
+            replies = llm.summarize_changes(format_groups(batch))
+        except Exception:
+            replies = {}
+        for i, group in enumerate(batch, 1):
+            text = replies.get(f"g{i}")
+            if text:
+                group["summary"] = text
+                if cache is not None:
+                    cache.set(_group_key(group), text)
+            else:
+                # not cached, so the next run asks again
+                group["summary"] = "; ".join(c["description"] for c in group["commits"])
+
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+            list(pool.map(run, batches))
+    return {"groups": len(groups), "cached": len(groups) - len(todo), "summarized": len(todo), "calls": len(batches)}
+
+
+def render(groups: List[Dict[str, Any]], title: str) -> str:
+    """Markdown release notes: breaking changes first, then one section per type."""
+    md = [f"# {title}", ""]
+
+    def entry(group: Dict[str, Any]) -> str:
+        pr = f" (#{group['pr']})" if group["pr"] is not None else ""
+        return f"- {group['summary']}{pr}"
+
+    breaking = [g for g in groups if g["breaking"]]
+    if breaking:
+        md += ["## ⚠️ Breaking changes", *[entry(g) for g in breaking], ""]
+    for kind, heading in TYPE_TITLES.items():
+        section = [entry(g) for g in groups if g["type"] == kind and not g["breaking"]]
+        if section:
+            md += [f"## {heading}", *section, ""]
+    return "\n".join(md).rstrip() + "\n"
+
+
+def generate(repo: str, rev_range: str, first_parent: bool = False, batch_size: int = 8, workers: int = 4, use_cache: bool = True) -> Dict[str, Any]:
+    """Release notes for ``rev_range``: ``{"markdown", "stats"}``."""
+    groups = group_commits(iter_commits(repo, rev_range, first_parent))
+    cache = DiskCache(cache_dir(repo)) if use_cache else None
+    stats = summarize(groups, cache, batch_size=batch_size, workers=workers)
+    stats["commits"] = sum(len(g["commits"]) for g in groups)
+    return {"markdown": render(groups, f"Changes in {rev_range}"), "stats": stats}
@@ -2,15 +2,51 @@
 
 This parser focuses on pytest output (the textual summary) and extracts
 counts of passed, failed, and errored tests, plus captured failure snippets.
+
+Logs are consumed line by line (``parse_pytest_lines``), so a log of any size
+is parsed in constant memory apart from the failure list, whose messages are
+capped. ``parse_logs`` parses many shard logs (a directory, a glob or a list
+of files) in parallel processes and combines them with de-duplicated failures,
+a per-shard breakdown and the slowest shards.
+
+Structured reports are preferred when available: JUnit XML (from any test
+runner) is read with ``iterparse``, removing each ``<testcase>`` once it is
+counted, and pytest ``--report-log`` JSONL is read line by line. Both produce
+the same summary shape plus ``durations`` per test, which ``slower_tests``
+compares between two runs. ``parse_report_file`` picks the parser by file
+extension or first character.
 """
 from __future__ import annotations
 
+import glob
+import json
+import os
 import re
-from typing import Dict, Any, List
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional
 
+MAX_MESSAGE_CHARS = 2000
+# a test is "much slower" when it takes this many times longer and at least this many more seconds
+SLOW_RATIO = 2.0
+SLOW_MIN_SECONDS = 0.5
+
+_COUNT_RES = {
+    "passed": re.compile(r"([0-9]+) passed"),
+    "failed": re.compile(r"([0-9]+) failed"),
+    "errors": re.compile(r"([0-9]+) errors?"),
+    "skipped": re.compile(r"([0-9]+) skipped"),
+}
+# the final "N failed, M passed in 1.23s" line, with or without ==== borders
+_SUMMARY_RE = re.compile(r"\b[0-9]+ (?:passed|failed|errors?|skipped)\b.*\bin ([0-9.]+)s\b")
+_FAILURE_HEADER_RE = re.compile(r"_{2,}\s*(?P<name>test[\w\-\[\]:.]+)\s*_{2,}")
+_FAILED_LINE_RE = re.compile(r"FAILED\s+([^\s:]+).*?-\s*(.*)$")
+# short summary "ERROR tests/test_x.py - ImportError: ..." (collection/setup errors)
+_ERROR_LINE_RE = re.compile(r"ERROR\s+(\S+)(?:\s+-\s*(.*))?$")
 
-def parse_pytest_output(log: str) -> Dict[str, Any]:
-    """Parse pytest textual output into a structured summary.
+
+def parse_pytest_lines(lines: Iterable[str]) -> Dict[str, Any]:
+    """Parse pytest textual output, one line at a time, into a structured summary.
 
     Returns a dict with keys:
       - total: int
@@ -19,62 +55,265 @@ def parse_pytest_output(log: str) -> Dict[str, Any]:
       - errors: int
       - skipped: int
       - failures: list of dict {name, message}
+      - error_tests: list of dict {name, message} from ``ERROR`` short-summary lines
+      - complete: whether the final summary line was seen (False for a crashed or killed run)
+      - duration: seconds from the final summary line, or None
     """
-    res = {"total": 0, "passed": 0, "failed": 0, "errors": 0, "skipped": 0, "failures": []}
-
-    # Quick patterns
-    summary_re = re.compile(r"=+\s+([0-9]+) passed,?\s*([0-9]+)? failed,?\s*([0-9]+)? errors?,?\s*([0-9]+)? skipped,?.*=+")
-    # The above might not always match, so also hunt for tokens
-    t_passed = re.search(r"([0-9]+) passed", log)
-    t_failed = re.search(r"([0-9]+) failed", log)
-    t_errors = re.search(r"([0-9]+) errors?", log)
-    t_skipped = re.search(r"([0-9]+) skipped", log)
-
-    if t_passed:
-        res["passed"] = int(t_passed.group(1))
-    if t_failed:
-        res["failed"] = int(t_failed.group(1))
-    if t_errors:
-        res["errors"] = int(t_errors.group(1))
-    if t_skipped:
-        res["skipped"] = int(t_skipped.group(1))
+    res: Dict[str, Any] = {"total": 0, "passed": 0, "failed": 0, "errors": 0, "skipped": 0, "failures": [], "error_tests": [], "duration": None}
+    first_counts: Dict[str, int] = {}
+    summary_counts: Optional[Dict[str, int]] = None
+    in_failures = False
+    current: Optional[Dict[str, Any]] = None  # failure block being captured
+    short_failures: List[Dict[str, str]] = []
 
-    res["total"] = res["passed"] + res["failed"] + res["errors"] + res["skipped"]
+    for raw in lines:
+        ln = raw.rstrip("\r\n")
+        for key, rx in _COUNT_RES.items():
+            if key not in first_counts:
+                m = rx.search(ln)
+                if m:
+                    first_counts[key] = int(m.group(1))
+        m = _SUMMARY_RE.search(ln)
+        if m:
+            summary_counts = {key: int(c.group(1)) for key, rx in _COUNT_RES.items() for c in [rx.search(ln)] if c}
+            res["duration"] = float(m.group(1))
 
-    # Extract failure blocks - look for the 'FAILURES' section
-    if "FAILURES" in log:
-        lines = log.splitlines()
-        try:
-            start = next(i for i, l in enumerate(lines) if "FAILURES" in l)
-        except StopIteration:
-            start = 0
-
-        # scan from start for header lines that mark a test failure (lines of underscores + test name)
-        i = start
-        current = None
-        while i < len(lines):
-            ln = lines[i].rstrip()
-            # match lines like: '____ test_name ____'
-            m = re.match(r"_{2,}\s*(?P<name>test[\w\-\[\]:.]+)\s*_{2,}", ln)
+        if current is not None:
+            # message lines run until a blank line, a separator or the next header
+            if ln.strip() and not ln.startswith("=") and not re.match(r"_{2,}", ln):
+                if len(current["message"]) < MAX_MESSAGE_CHARS:
+                    current["message"] = (current["message"] + " " + ln.strip()).strip()[:MAX_MESSAGE_CHARS]
+                continue
+            current = None
+        if "FAILURES" in ln:
+            in_failures = True
+        if in_failures:
+            m = _FAILURE_HEADER_RE.match(ln.rstrip())
             if m:
-                # start a new failure capture
-                name = m.group('name')
-                # gather message lines until next separator or blank
-                j = i + 1
-                message_lines = []
-                while j < len(lines) and lines[j].strip() and not lines[j].startswith('=') and not re.match(r"_{2,}", lines[j]):
-                    message_lines.append(lines[j].strip())
-                    j += 1
-                res["failures"].append({"name": name, "message": " ".join(message_lines)})
-                i = j
+                current = {"name": m.group("name"), "message": ""}
+                res["failures"].append(current)
                 continue
-            i += 1
+        m = _FAILED_LINE_RE.match(ln)
+        if m:
+            short_failures.append({"name": m.group(1), "message": m.group(2)[:MAX_MESSAGE_CHARS]})
+            continue
+        m = _ERROR_LINE_RE.match(ln)
+        if m:
+            res["error_tests"].append({"name": m.group(1), "message": (m.group(2) or "")[:MAX_MESSAGE_CHARS]})
+
+    # the final summary line is authoritative; otherwise take the first mention of each count
+    res.update(summary_counts if summary_counts is not None else first_counts)
+    res["complete"] = summary_counts is not None
+    res["total"] = res["passed"] + res["failed"] + res["errors"] + res["skipped"]
+    if not in_failures:
+        # fallback: simple 'FAILED name - message' lines
+        res["failures"] = short_failures
+    return res
 
-    else:
-        # fallback: find simple 'FAILED name - message' patterns
-        for line in log.splitlines():
-            m = re.match(r"FAILED\s+([^\s:]+).*?-\s*(.*)$", line)
-            if m:
-                res["failures"].append({"name": m.group(1), "message": m.group(2)})
 
+def parse_pytest_output(log: str) -> Dict[str, Any]:
+    """Parse pytest textual output into a structured summary (see ``parse_pytest_lines``)."""
+    return parse_pytest_lines(log.splitlines())
+
+
+def parse_pytest_file(path: str) -> Dict[str, Any]:
+    """Stream-parse a log file without reading it into memory."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return parse_pytest_lines(f)
+
+
+def _empty_summary() -> Dict[str, Any]:
+    return {"total": 0, "passed": 0, "failed": 0, "errors": 0, "skipped": 0, "failures": [], "duration": None, "durations": {}}
+
+
+def _finish(res: Dict[str, Any]) -> Dict[str, Any]:
+    res["total"] = res["passed"] + res["failed"] + res["errors"] + res["skipped"]
+    if res["duration"] is None and res["durations"]:
+        res["duration"] = round(sum(res["durations"].values()), 3)
     return res
+
+
+def parse_junit_xml(path: str) -> Dict[str, Any]:
+    """Summary of a JUnit XML report, parsed incrementally in constant memory."""
+    res = _empty_summary()
+    stack: List[ET.Element] = []
+    suite_time = 0.0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag == "testcase":
+            classname, name = elem.get("classname"), elem.get("name", "")
+            test = f"{classname}::{name}" if classname else name
+            res["durations"][test] = float(elem.get("time") or 0.0)
+            outcome = "passed"
+            for child in elem:
+                kind = child.tag.rsplit("}", 1)[-1]
+                if kind in ("failure", "error"):
+                    outcome = "failed" if kind == "failure" else "errors"
+                    message = child.get("message") or (child.text or "").strip().split("\n", 1)[0]
+                    res["failures"].append({"name": test, "message": message[:MAX_MESSAGE_CHARS]})
+                    break
+                if kind == "skipped":
+                    outcome = "skipped"
+            res[outcome] += 1
+            # drop the counted case so the tree never grows with the report
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+        elif tag == "testsuite":
+            if not any(s.tag.rsplit("}", 1)[-1] == "testsuite" for s in stack):
+                suite_time += float(elem.get("time") or 0.0)
+            elem.clear()
+    if suite_time:
+        res["duration"] = round(suite_time, 3)
+    return _finish(res)
+
+
+def parse_reportlog(lines: Iterable[str]) -> Dict[str, Any]:
+    """Summary of pytest ``--report-log`` JSONL, streamed one record at a time."""
+    res = _empty_summary()
+    pending: Dict[str, Dict[str, Any]] = {}  # nodeid -> outcome/duration/message across phases
+    for raw in lines:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            continue
+        kind = rec.get("$report_type")
+        if kind == "CollectReport" and rec.get("outcome") == "failed":
+            res["errors"] += 1
+            res["failures"].append({"name": rec.get("nodeid", ""), "message": _longrepr(rec)})
+            continue
+        if kind != "TestReport":
+            continue
+        nodeid = rec.get("nodeid", "")
+        state = pending.setdefault(nodeid, {"outcome": "passed", "duration": 0.0, "message": ""})
+        state["duration"] += float(rec.get("duration") or 0.0)
+        when, outcome = rec.get("when"), rec.get("outcome")
+        if outcome == "failed" and state["outcome"] not in ("failed", "errors"):
+            state["outcome"] = "failed" if when == "call" else "errors"
+            state["message"] = _longrepr(rec)
+        elif outcome == "skipped" and state["outcome"] == "passed":
+            state["outcome"] = "skipped"
+        if when == "teardown":
+            done = pending.pop(nodeid)
+            res[done["outcome"]] += 1
+            res["durations"][nodeid] = round(done["duration"], 6)
+            if done["outcome"] in ("failed", "errors"):
+                res["failures"].append({"name": nodeid, "message": done["message"]})
+    return _finish(res)
+
+
+def _longrepr(rec: Dict[str, Any]) -> str:
+    longrepr = rec.get("longrepr")
+    if isinstance(longrepr, dict):
+        crash = longrepr.get("reprcrash") or {}
+        return str(crash.get("message", ""))[:MAX_MESSAGE_CHARS]
+    return str(longrepr or "").strip().splitlines()[-1][:MAX_MESSAGE_CHARS] if longrepr else ""
+
+
+def parse_report_file(path: str) -> Dict[str, Any]:
+    """Parse a JUnit XML report, a pytest report log or a plain pytest log."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in (".xml", ".jsonl", ".json"):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            head = f.read(256).lstrip()
+        ext = ".xml" if head.startswith("<") else ".jsonl" if head.startswith("{") else ext
+    if ext == ".xml":
+        return parse_junit_xml(path)
+    if ext in (".jsonl", ".json"):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return parse_reportlog(f)
+    return parse_pytest_file(path)
+
+
+def slower_tests(base: Dict[str, Any], head: Dict[str, Any], ratio: float = SLOW_RATIO, min_seconds: float = SLOW_MIN_SECONDS) -> List[Dict[str, Any]]:
+    """Tests in both runs whose duration grew by ``ratio`` and at least ``min_seconds``, slowest growth first."""
+    before, after = base.get("durations") or {}, head.get("durations") or {}
+    out = []
+    for name, t in after.items():
+        b = before.get(name)
+        if b is not None and t - b >= min_seconds and t >= b * ratio:
+            out.append({"name": name, "before": b, "after": t})
+    return sorted(out, key=lambda x: x["before"] - x["after"])
+
+
+def expand_logs(spec: str) -> List[str]:
+    """A file, a directory (every file in it, recursively) or a glob -> sorted log paths."""
+    if os.path.isdir(spec):
+        return sorted(os.path.join(d, n) for d, _, names in os.walk(spec) for n in names)
+    if os.path.isfile(spec):
+        return [spec]
+    return sorted(p for p in glob.glob(spec, recursive=True) if os.path.isfile(p))
+
+
+def merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine the parsed summaries of several shard logs into one."""
+    res: Dict[str, Any] = {"total": 0, "passed": 0, "failed": 0, "errors": 0, "skipped": 0, "failures": [], "error_tests": [], "complete": True}
+    for s in summaries:
+        for key in ("total", "passed", "failed", "errors", "skipped"):
+            res[key] += s.get(key, 0)
+        res["failures"].extend(s.get("failures", []))
+        res["error_tests"].extend(s.get("error_tests", []))
+        res["complete"] = res["complete"] and s.get("complete", True)
+        if s.get("durations"):
+            res.setdefault("durations", {}).update(s["durations"])
+    return res
+
+
+def combine_shards(results: List[tuple], slowest: int = 5) -> Dict[str, Any]:
+    """Merge ``(shard name, summary)`` pairs: de-duplicated failures plus a per-shard breakdown."""
+    res = merge_summaries([s for _, s in results])
+    failures: Dict[str, Dict[str, Any]] = {}
+    for shard, s in results:
+        for f in s.get("failures", []):
+            entry = failures.setdefault(f["name"], {"name": f["name"], "message": f.get("message", ""), "shards": []})
+            if shard not in entry["shards"]:
+                entry["shards"].append(shard)
+    res["failures"] = list(failures.values())
+    res["shards"] = [{"shard": shard, **{k: s.get(k, 0) for k in ("total", "passed", "failed", "errors", "skipped")}, "duration": s.get("duration")}
+                     for shard, s in results]
+    timed = [sh for sh in res["shards"] if sh["duration"] is not None]
+    res["slowest_shards"] = [{"shard": sh["shard"], "duration": sh["duration"]} for sh in sorted(timed, key=lambda sh: -sh["duration"])[:slowest]]
+    res["duration"] = max((sh["duration"] for sh in timed), default=None)
+    return res
+
+
+def parse_logs(paths: List[str], workers: Optional[int] = None, slowest: int = 5) -> Dict[str, Any]:
+    """Parse many shard logs or reports concurrently and combine them (see ``combine_shards``)."""
+    if len(paths) <= 1 or workers == 0:
+        summaries = [parse_report_file(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = list(pool.map(parse_report_file, paths, chunksize=max(1, len(paths) // (8 * (workers or os.cpu_count() or 1)))))
+    prefix = os.path.commonpath(paths) if len(paths) > 1 else os.path.dirname(paths[0]) if paths else ""
+    names = [os.path.relpath(p, prefix) if prefix else p for p in paths]
+    return combine_shards(list(zip(names, summaries)), slowest=slowest)
+
+
+def _failed_names(summary: Dict[str, Any]) -> set:
+    names = {f["name"] for f in summary.get("failures", [])}
+    names |= {f"ERROR {e['name']}" for e in summary.get("error_tests", [])}
+    unnamed = summary.get("errors", 0) - len(summary.get("error_tests", []))
+    if unnamed > 0:
+        names.add("ERROR (no test id)")
+    return names
+
+
+def compare_runs(base: Dict[str, Any], head: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Split head failures and errors into new ones (passing on base) and pre-existing ones.
+
+    Collection/setup errors count as ``"ERROR <id>"`` entries.
+    """
+    base_failed = _failed_names(base)
+    head_failed = _failed_names(head)
+    return {
+        "new_failures": sorted(head_failed - base_failed),
+        "preexisting_failures": sorted(head_failed & base_failed),
+        "fixed": sorted(base_failed - head_failed),
+    }
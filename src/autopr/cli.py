@@ -6,6 +6,37 @@ from autopr.llm import llm
 from autopr import reviewer
 from autopr.generator import generate_pr_from
 from autopr import analysis
+from autopr import diff_source
+from autopr.parser import iter_file_diffs
+
+
+def diff_options(f):
+    """Attach the shared diff input options (--diff/--diff-file/--git-range)."""
+    f = click.option("--repo", required=False, default=".", show_default=True, help="Repository used with --git-range")(f)
+    f = click.option("--git-range", required=False, help="Run git diff -M on a base..head range")(f)
+    f = click.option("--diff-file", required=False, type=click.Path(exists=True, dir_okay=False), help="Read the diff from a file")(f)
+    f = click.option("--diff", required=False, help="Diff or code snippet ('-' reads stdin)")(f)
+    return f
+
+
+def _read_diff(diff: Optional[str], diff_file: Optional[str], git_range: Optional[str], repo: str) -> str:
+    try:
+        return diff_source.read_diff(diff, diff_file, git_range, repo)
+    except (ValueError, RuntimeError) as e:
+        raise click.UsageError(str(e))
+
+
+def _read_test_reports(spec: str) -> Optional[dict]:
+    """Parse a test log/report, or every shard under a directory or glob; warn and return None on failure."""
+    from autopr import ci_parser
+    paths = ci_parser.expand_logs(spec)
+    try:
+        if not paths:
+            raise OSError(f"no files match {spec}")
+        return ci_parser.parse_report_file(paths[0]) if len(paths) == 1 else ci_parser.parse_logs(paths)
+    except Exception as e:
+        click.echo(f"Warning: failed to read test log: {e}")
+        return None
 
 
 @click.group()
@@ -14,34 +45,35 @@ def cli():
 
 
 @cli.command(name="gen")
-@click.option("--diff", required=True, help="Diff or code snippet")
+@diff_options
 @click.option("--commits", required=False, multiple=True, help="One or more commit messages")
 @click.option("--issue", required=False, help="Linked issue id or url")
-def generate(diff: str, commits: tuple[str, ...], issue: Optional[str]):
+@click.option("--deadline", type=float, required=False, help="Time budget in seconds; a late provider reply is abandoned and a partial result returned")
+def generate(diff: Optional[str], diff_file: Optional[str], git_range: Optional[str], repo: str, commits: tuple[str, ...], issue: Optional[str], deadline: Optional[float]):
     """Generate PR title/description (mock)"""
+    diff = _read_diff(diff, diff_file, git_range, repo)
     commits_list = list(commits) if commits else []
-    out = generate_pr_from(diff, commits_list, issue)
+    out = generate_pr_from(diff, commits_list, issue, deadline=deadline)
     click.echo(json.dumps(out, indent=2))
 
 
 @cli.command(name="review")
-@click.option("--diff", required=True, help="Diff or code snippet")
+@diff_options
 @click.option("--commits", required=False, multiple=True, help="Commit messages to consider")
 @click.option("--issue", required=False, help="Issue text or short description to check alignment")
-@click.option("--test-log", required=False, help="Path to a pytest log file to include in validation")
+@click.option("--test-log", required=False, help="Pytest log, JUnit XML or report log (file, directory of shards, or glob) to include in validation")
+@click.option("--base-test-log", required=False, help="The same for the base branch run; tests that got much slower are reported")
 @click.option("--coverage-before", required=False, help="Path to a coverage report for baseline")
 @click.option("--coverage-after", required=False, help="Path to a coverage report for PR run")
-def review(diff: str, commits: tuple[str, ...], issue: str | None, test_log: str | None, coverage_before: str | None, coverage_after: str | None):
+@click.option("--deadline", type=float, required=False, help="Time budget in seconds; optional stages that do not fit are skipped and the result is marked partial")
+def review(diff: str | None, diff_file: str | None, git_range: str | None, repo: str, commits: tuple[str, ...], issue: str | None, test_log: str | None, base_test_log: str | None,
+           coverage_before: str | None, coverage_after: str | None, deadline: float | None):
     # Gather options passed by Click
+    diff = _read_diff(diff, diff_file, git_range, repo)
     commits_list = list(commits) if commits else []
 
-    test_log_content = None
-    if test_log:
-        try:
-            with open(test_log, 'r', encoding='utf-8') as f:
-                test_log_content = f.read()
-        except Exception as e:
-            click.echo(f"Warning: failed to read test log: {e}")
+    test_summary = _read_test_reports(test_log) if test_log else None
+    base_test_summary = _read_test_reports(base_test_log) if base_test_log else None
 
     coverage_before_content = None
     coverage_after_content = None
@@ -57,31 +89,65 @@ def review(diff: str, commits: tuple[str, ...], issue: str | None, test_log: str
                 coverage_after_content = f.read()
         except Exception as e:
             click.echo(f"Warning: failed to read coverage_after: {e}")
-    out = reviewer.review_pr(diff, commits=commits_list, issue_text=issue, test_log=test_log_content, coverage_before=coverage_before_content, coverage_after=coverage_after_content)
+    # with --git-range the post-image files are available for whole-file checks
+    whole_file = {"repo": repo, "head": diff_source.head_rev(git_range)} if git_range else {}
+    out = reviewer.review_pr(diff, commits=commits_list, issue_text=issue, test_summary=test_summary, base_test_summary=base_test_summary, coverage_before=coverage_before_content, coverage_after=coverage_after_content,
+                             deadline=deadline, **whole_file)
     click.echo(json.dumps(out, indent=2))
 
 
 @cli.command(name="analyze")
-@click.option("--diff", required=True, help="Diff or code snippet")
+@diff_options
 @click.option("--lang", required=False, default="python", help="Language for analysis (default: python)")
-def analyze(diff: str, lang: str):
-    """Run the static analyzer on a diff or snippet and print findings."""
-    out = analysis.analyze_diff(diff, language=lang)
+def analyze(diff: Optional[str], diff_file: Optional[str], git_range: Optional[str], repo: str, lang: str):
+    """Run the static analyzer on a diff or snippet and print findings.
+
+    The diff is analyzed one file section at a time, so memory stays bounded by
+    the largest file rather than the whole PR.
+    """
+    out = []
+    try:
+        with diff_source.open_diff(diff, diff_file, git_range, repo) as lines:
+            for path, section in iter_file_diffs(lines):
+                for finding in analysis.analyze_diff("\n".join(section), language=lang):
+                    if path:
+                        finding["file"] = path
+                    out.append(finding)
+    except (ValueError, RuntimeError) as e:
+        raise click.UsageError(str(e))
+    click.echo(json.dumps(out, indent=2))
+
+
+@cli.command(name="scan")
+@diff_options
+@click.option("--group", "groups", multiple=True, type=click.Choice(["secret", "dangerous", "hygiene", "custom"]), help="Only these rule groups (default: all)")
+def scan(diff: Optional[str], diff_file: Optional[str], git_range: Optional[str], repo: str, groups: tuple[str, ...]):
+    """Scan the added lines of a diff for secrets and dangerous calls in one pass."""
+    from autopr.scanner import default_scanner
+    try:
+        with diff_source.open_diff(diff, diff_file, git_range, repo) as lines:
+            out = default_scanner().scan_diff(lines, groups=groups or None)
+    except (ValueError, RuntimeError) as e:
+        raise click.UsageError(str(e))
     click.echo(json.dumps(out, indent=2))
 
 
 @cli.command(name="ci-parse")
-@click.option("--log", required=True, help="Path to pytest log or CI log file")
-def ci_parse(log: str):
-    """Parse a pytest/CI log and print a summary."""
+@click.option("--log", required=True, help="Pytest/CI log, JUnit XML or pytest report log; or a directory/glob of shards")
+@click.option("--workers", type=int, required=False, help="Processes used to parse many logs (0 parses in-process)")
+def ci_parse(log: str, workers: Optional[int]):
+    """Parse a pytest/CI log (or many shard logs) and print a summary."""
+    import xml.etree.ElementTree as ET
     from autopr import ci_parser
+    paths = ci_parser.expand_logs(log)
+    if not paths:
+        click.echo(f"Failed to read log: no files match {log}")
+        return
     try:
-        with open(log, 'r', encoding='utf-8') as f:
-            data = f.read()
-    except Exception as e:
+        out = ci_parser.parse_report_file(paths[0]) if len(paths) == 1 else ci_parser.parse_logs(paths, workers=workers)
+    except (OSError, ET.ParseError) as e:
         click.echo(f"Failed to read log: {e}")
         return
-    out = ci_parser.parse_pytest_output(data)
     click.echo(json.dumps(out, indent=2))
 
 
@@ -104,13 +170,194 @@ def coverage_compare(before: str, after: str):
 
 @cli.command(name="validate-issue")
 @click.option("--issue", required=True, help="Issue text to validate")
-@click.option("--diff", required=True, help="Diff or code snippet")
+@diff_options
 @click.option("--commits", required=False, multiple=True, help="Commit messages to use")
-def validate_issue(issue: str, diff: str, commits: tuple[str, ...]):
+def validate_issue(issue: str, diff: Optional[str], diff_file: Optional[str], git_range: Optional[str], repo: str, commits: tuple[str, ...]):
     from autopr import issue_validator
+    diff = _read_diff(diff, diff_file, git_range, repo)
     res = issue_validator.simple_issue_alignment(issue, diff, list(commits))
     click.echo(json.dumps(res, indent=2))
 
 
+@cli.command(name="loadtest")
+@click.option("--url", default="http://127.0.0.1:8000", show_default=True, help="Base URL of the AutoPR service")
+@click.option("--corpus", required=True, type=click.Path(exists=True), help="Directory of *.diff/*.patch files, or a single diff")
+@click.option("--endpoint", "endpoints", multiple=True, type=click.Choice(["review", "generate"]), help="Endpoint(s) to hit (default: both)")
+@click.option("--rps", type=float, required=False, help="Open-loop target requests per second")
+@click.option("--concurrency", type=int, default=4, show_default=True, help="Closed-loop workers (or in-flight cap factor with --rps)")
+@click.option("--duration", type=float, required=False, help="Stop after this many seconds")
+@click.option("--requests", "max_requests", type=int, required=False, help="Stop after this many requests")
+@click.option("--timeout", type=float, default=60.0, show_default=True, help="Per-request timeout in seconds")
+@click.option("--server-pid", type=int, required=False, help="Report RSS of this process (e.g. the uvicorn worker)")
+def loadtest_cmd(url: str, corpus: str, endpoints: tuple[str, ...], rps: Optional[float], concurrency: int, duration: Optional[float], max_requests: Optional[int], timeout: float, server_pid: Optional[int]):
+    """Replay a corpus of diffs against /review and /generate and report latency."""
+    from autopr import loadtest
+    if duration is None and max_requests is None:
+        duration = 30.0
+    try:
+        diffs = loadtest.load_corpus(corpus)
+        out = loadtest.run_loadtest(url, diffs, endpoints=endpoints or loadtest.ENDPOINTS, rps=rps, concurrency=concurrency,
+                                    duration=duration, max_requests=max_requests, timeout=timeout, server_pid=server_pid)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    click.echo(json.dumps(out, indent=2))
+
+
+@cli.command(name="fake-llm")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8081, show_default=True)
+@click.option("--latency", required=False, help="Latency distribution, e.g. const:0.2, uniform:0.1,0.5, lognormal:-1.2,0.6 (seconds)")
+@click.option("--error-rate", type=float, default=0.0, show_default=True, help="Fraction of requests answered with 500")
+@click.option("--rate-limit-rate", type=float, default=0.0, show_default=True, help="Fraction of requests answered with 429")
+@click.option("--retry-after", type=float, default=1.0, show_default=True, help="Retry-After seconds sent with 429s")
+@click.option("--chunk-delay", type=float, default=0.0, show_default=True, help="Delay between streamed chunks")
+@click.option("--seed", type=int, required=False, help="Seed for reproducible latency/fault draws")
+def fake_llm(host: str, port: int, latency: Optional[str], error_rate: float, rate_limit_rate: float, retry_after: float, chunk_delay: float, seed: Optional[int]):
+    """Serve a fake OpenAI/Anthropic API for load tests (Ctrl-C to stop)."""
+    from autopr.fakellm import FakeLLMServer
+    try:
+        server = FakeLLMServer(host=host, port=port, latency=latency, error_rate=error_rate, rate_limit_rate=rate_limit_rate,
+                               retry_after=retry_after, chunk_delay=chunk_delay, seed=seed)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    click.echo(f"Fake LLM listening on {server.url} (OPENAI_BASE_URL={server.url}/v1, ANTHROPIC_BASE_URL={server.url})")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        click.echo(json.dumps(server.stats))
+        server.server.server_close()
+
+
+@cli.command(name="index")
+@click.option("--repo", default=".", show_default=True, help="Repository to index")
+@click.option("--rev", default="HEAD", show_default=True, help="Revision to bring the index up to")
+@click.option("--workers", type=int, required=False, help="Parser processes for large updates (0 parses in-process)")
+def index_cmd(repo: str, rev: str, workers: Optional[int]):
+    """Build or incrementally update the repository definition/reference index."""
+    from autopr import repo_index
+    try:
+        index = repo_index.load_index(repo, rev, workers)
+    except RuntimeError as e:
+        raise click.UsageError(str(e))
+    click.echo(json.dumps({"rev": rev, "path": repo_index.index_path(repo), **index.stats}, indent=2))
+
+
+@cli.command(name="affected-tests")
+@diff_options
+@click.option("--coverage-file", required=False, type=click.Path(exists=True, dir_okay=False),
+              help="Rebuild the test map from a coverage data file recorded with --cov-context=test")
+@click.option("--run", "run_tests", is_flag=True, default=False, help="Run the selected tests with pytest")
+def affected_tests_cmd(diff: Optional[str], diff_file: Optional[str], git_range: Optional[str], repo: str, coverage_file: Optional[str], run_tests: bool):
+    """Print (or run) the tests that exercise the changed files and functions."""
+    import subprocess
+    import sys
+    from autopr import test_impact
+    try:
+        path = test_impact.map_path(repo)
+        if coverage_file:
+            test_impact.TestMap.from_coverage(coverage_file, repo).save(path)
+        test_map = test_impact.TestMap.load(path)
+    except RuntimeError as e:
+        raise click.UsageError(str(e))
+    text = _read_diff(diff, diff_file, git_range, repo)
+    head = diff_source.head_rev(git_range) if git_range else None
+    out = test_impact.affected_tests(text, repo, head, test_map)
+    if not run_tests:
+        click.echo(json.dumps({**out, "test_map": test_map is not None}, indent=2))
+        return
+    if not out["tests"]:
+        click.echo("No affected tests.")
+        return
+    raise SystemExit(subprocess.call([sys.executable, "-m", "pytest", *out["tests"]], cwd=repo))
+
+
+@cli.command(name="validate")
+@click.option("--repo", default=".", show_default=True, help="Repository to check out from")
+@click.option("--base", required=True, help="Base revision (e.g. origin/main)")
+@click.option("--head", default="HEAD", show_default=True, help="PR revision")
+@click.option("--shards", type=int, default=1, show_default=True, help="Concurrent pytest processes per revision, split by test file")
+@click.option("--timeout", type=float, required=False, help="Per-shard pytest timeout in seconds")
+@click.option("--log-dir", required=False, type=click.Path(file_okay=False), help="Write base.log and head.log here")
+@click.option("--pytest-arg", "pytest_args", multiple=True, help="Extra argument passed to every pytest run")
+def validate_cmd(repo: str, base: str, head: str, shards: int, timeout: Optional[float], log_dir: Optional[str], pytest_args: tuple[str, ...]):
+    """Run base and head test suites concurrently in temporary worktrees and compare failures."""
+    import os
+    from autopr import validate
+    try:
+        out = validate.validate(repo, base, head, shards=shards, pytest_args=list(pytest_args), timeout=timeout)
+    except RuntimeError as e:
+        raise click.UsageError(str(e))
+    logs = {side: out.pop(f"_{side}_log") for side in ("base", "head")}
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        for side, text in logs.items():
+            with open(os.path.join(log_dir, f"{side}.log"), "w", encoding="utf-8") as f:
+                f.write(text)
+    click.echo(json.dumps(out, indent=2))
+    if not out["passed"]:
+        raise SystemExit(1)
+
+
+@cli.command(name="publish")
+@click.option("--review-json", required=True, type=click.Path(exists=True, dir_okay=False), help="Output of the review runner ({pr, review})")
+@click.option("--github-repo", required=True, help="owner/name of the pull request's repository")
+@click.option("--pr", "number", type=int, required=True, help="Pull request number")
+@click.option("--dry-run", is_flag=True, default=False, help="Print the rendered Markdown instead of publishing it")
+def publish_cmd(review_json: str, github_repo: str, number: int, dry_run: bool):
+    """Create or edit AutoPR's summary comment on a PR; unchanged content is not re-sent."""
+    from autopr import github, publisher, render
+    with open(review_json, encoding="utf-8") as f:
+        body = render.render_markdown(json.load(f))
+    if dry_run:
+        click.echo(body)
+        return
+    try:
+        out = publisher.publish(github.default_client(), github_repo, number, body)
+    except github.GitHubError as e:
+        raise click.ClickException(str(e))
+    click.echo(json.dumps(out, indent=2))
+
+
+@cli.command(name="changelog")
+@click.argument("rev_range")
+@click.option("--repo", default=".", show_default=True, help="Repository to read history from")
+@click.option("--first-parent", is_flag=True, default=False, help="Follow merge commits only (one entry per merged PR)")
+@click.option("--batch-size", type=int, default=8, show_default=True, help="Commit groups summarized per provider call")
+@click.option("--workers", type=int, default=4, show_default=True, help="Provider calls in flight at once")
+@click.option("--no-cache", is_flag=True, default=False, help="Re-summarize every group instead of reusing cached summaries")
+@click.option("--output", required=False, type=click.Path(dir_okay=False), help="Write the Markdown here instead of stdout")
+def changelog_cmd(rev_range: str, repo: str, first_parent: bool, batch_size: int, workers: int, no_cache: bool, output: Optional[str]):
+    """Write release notes for BASE..HEAD, grouped by conventional-commit type and PR."""
+    from autopr import changelog
+    try:
+        out = changelog.generate(repo, rev_range, first_parent=first_parent, batch_size=batch_size, workers=workers, use_cache=not no_cache)
+    except RuntimeError as e:
+        raise click.UsageError(str(e))
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(out["markdown"])
+        click.echo(json.dumps(out["stats"], indent=2))
+    else:
+        click.echo(out["markdown"])
+
+
+@cli.command(name="serve")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8000, show_default=True)
+@click.option("--workers", type=int, default=2, show_default=True, help="Pre-forked worker processes")
+@click.option("--drain-timeout", type=float, default=30.0, show_default=True, help="Seconds to finish in-flight requests on SIGTERM")
+@click.option("--cache-dir", required=False, help="Shared on-disk cache for provider replies (sets AUTOPR_CACHE_DIR)")
+@click.option("--log-level", default="info", show_default=True)
+def serve_cmd(host: str, port: int, workers: int, drain_timeout: float, cache_dir: Optional[str], log_level: str):
+    """Serve the API with pre-forked, pre-warmed workers and graceful draining."""
+    import os
+    from autopr import server
+    if cache_dir:
+        os.environ["AUTOPR_CACHE_DIR"] = cache_dir
+    raise SystemExit(server.serve(host=host, port=port, workers=workers, drain_timeout=drain_timeout, log_level=log_level))
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,220 @@
+"""Compact unified diffs before they are embedded in LLM prompts.
+
+The compact format drops git's per-file boilerplate and keeps every line
+addressable::
+
+    F1 src/app.py
+    @10
+    10  context line
+    11+ added line
+    9- removed line
+
+Each file gets a short id (``F1``, ``F2`` ...) and each kept line is prefixed
+with its new-file line number (old-file number for removed lines), so a model
+can cite ``F1:11`` and :func:`resolve` maps it back to ``("src/app.py", 11)``.
+
+Compaction steps, in order:
+
+- context lines further than ``context_radius`` from a change are dropped
+- hunks that only change whitespace are folded into a single marker line
+- hunks whose changes repeat an earlier hunk (same edit, numbers ignored) are
+  collapsed into the first example plus a count and their locations
+
+Input without ``@@`` hunks (plain snippets) is returned unchanged.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+from .parser import HUNK_RE, iter_file_diffs
+
+_NUM_RE = re.compile(r"\d+")
+_FILE_HEADER_RE = re.compile(r"^F(\d+) ")
+_WS_RE = re.compile(r"\s+")
+
+Line = Tuple[str, Optional[int], Optional[int], str]  # (op, old_no, new_no, text)
+
+
+def _parse_section(section: List[str]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    meta: Dict[str, Any] = {}
+    hunks: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    old_no = new_no = 0
+    old_left = new_left = 0
+    for ln in section:
+        if current is not None and (old_left > 0 or new_left > 0):
+            if ln.startswith("-"):
+                current["lines"].append(("-", old_no, None, ln[1:]))
+                old_no += 1
+                old_left -= 1
+            elif ln.startswith("+"):
+                current["lines"].append(("+", None, new_no, ln[1:]))
+                new_no += 1
+                new_left -= 1
+            elif ln.startswith("\\"):
+                continue
+            else:
+                current["lines"].append((" ", old_no, new_no, ln[1:]))
+                old_no += 1
+                new_no += 1
+                old_left -= 1
+                new_left -= 1
+            continue
+        m = HUNK_RE.match(ln)
+        if m:
+            old_no, new_no = int(m.group(1)), int(m.group(3))
+            old_left, new_left = int(m.group(2) or 1), int(m.group(4) or 1)
+            current = {"old": old_no, "new": new_no, "lines": []}
+            hunks.append(current)
+        elif ln.startswith("rename from "):
+            meta["renamed_from"] = ln[len("rename from "):]
+        elif ln.startswith("+++ /dev/null"):
+            meta["deleted"] = True
+        elif ln.startswith("--- /dev/null"):
+            meta["added"] = True
+    return meta, hunks
+
+
+def _is_whitespace_only(lines: List[Line]) -> bool:
+    removed = "".join(_WS_RE.sub("", t) for op, _, _, t in lines if op == "-")
+    added = "".join(_WS_RE.sub("", t) for op, _, _, t in lines if op == "+")
+    has_change = any(op != " " for op, _, _, _ in lines)
+    return has_change and removed == added
+
+
+def _signature(lines: List[Line]) -> Tuple[str, ...]:
+    return tuple(op + _NUM_RE.sub("0", _WS_RE.sub(" ", t.strip())) for op, _, _, t in lines if op != " ")
+
+
+def _trim_context(lines: List[Line], radius: int) -> List[Optional[Line]]:
+    """Keep changed lines and context within ``radius``; ``None`` marks a gap."""
+    changed = [i for i, (op, _, _, _) in enumerate(lines) if op != " "]
+    keep = set()
+    for i in changed:
+        keep.update(range(max(0, i - radius), min(len(lines), i + radius + 1)))
+    out: List[Optional[Line]] = []
+    prev = None
+    for i in sorted(keep):
+        if prev is not None and i != prev + 1:
+            out.append(None)
+        out.append(lines[i])
+        prev = i
+    return out
+
+
+def _anchor(line: Line) -> int:
+    return line[2] if line[2] is not None else (line[1] or 0)
+
+
+def compact_diff(diff_text: str, context_radius: int = 2, fold_whitespace: bool = True, collapse_repeats: bool = True, max_locations: int = 20) -> Tuple[str, Dict[str, Any]]:
+    """Return ``(compact_text, stats)``.
+
+    ``stats`` holds ``files`` (id -> path), ``hunks``, ``whitespace_folded``,
+    ``repeats_collapsed`` and ``context_dropped`` counts.
+    """
+    stats: Dict[str, Any] = {"files": {}, "hunks": 0, "whitespace_folded": 0, "repeats_collapsed": 0, "context_dropped": 0}
+    parsed = []
+    for path, section in iter_file_diffs(diff_text.splitlines()):
+        meta, hunks = _parse_section(section)
+        parsed.append((path, meta, hunks))
+    if not any(hunks for _, _, hunks in parsed):
+        return diff_text, stats
+
+    # first pass: find repeated edits so the first example can carry the count
+    seen: Dict[Tuple[str, ...], List[str]] = {}
+    for idx, (path, meta, hunks) in enumerate(parsed, start=1):
+        for h in hunks:
+            if fold_whitespace and _is_whitespace_only(h["lines"]):
+                continue
+            sig = _signature(h["lines"])
+            if sig:
+                seen.setdefault(sig, []).append(f"F{idx}:{h['new']}")
+
+    out: List[str] = []
+    emitted: Dict[Tuple[str, ...], bool] = {}
+    for idx, (path, meta, hunks) in enumerate(parsed, start=1):
+        fid = f"F{idx}"
+        stats["files"][fid] = path
+        header = f"{fid} {path}"
+        if meta.get("renamed_from"):
+            header += f" (renamed from {meta['renamed_from']})"
+        if meta.get("added"):
+            header += " (new file)"
+        if meta.get("deleted"):
+            header += " (deleted)"
+        out.append(header)
+        for h in hunks:
+            stats["hunks"] += 1
+            lines = h["lines"]
+            if fold_whitespace and _is_whitespace_only(lines):
+                n_rm = sum(1 for l in lines if l[0] == "-")
+                n_add = sum(1 for l in lines if l[0] == "+")
+                out.append(f"@{h['new']} ~ whitespace-only change (-{n_rm}/+{n_add} lines)")
+                stats["whitespace_folded"] += 1
+                continue
+            sig = _signature(lines)
+            locations = seen.get(sig, [])
+            if collapse_repeats and sig and len(locations) > 1:
+                if emitted.get(sig):
+                    stats["repeats_collapsed"] += 1
+                    continue
+                emitted[sig] = True
+                others = locations[1:]
+                listed = ", ".join(others[:max_locations]) + (", ..." if len(others) > max_locations else "")
+                out.append(f"(same change repeated {len(others)} more time(s): {listed})")
+            trimmed = _trim_context(lines, context_radius)
+            stats["context_dropped"] += len(lines) - sum(1 for l in trimmed if l is not None)
+            block_start = True
+            for line in trimmed:
+                if line is None:
+                    block_start = True
+                    continue
+                if block_start:
+                    out.append(f"@{_anchor(line)}")
+                    block_start = False
+                op, old_no, new_no, text = line
+                num = old_no if op == "-" else new_no
+                out.append(f"{num}{op} {text}".rstrip() if op != " " else f"{num}  {text}".rstrip())
+    return "\n".join(out), stats
+
+
+def resolve(ref: str, files: Dict[str, str]) -> Optional[Tuple[str, int]]:
+    """Map a compact reference like ``F2:14`` back to ``(path, line)``."""
+    m = re.match(r"^\s*(F\d+):(\d+)\s*$", ref or "")
+    if not m or m.group(1) not in files:
+        return None
+    return files[m.group(1)], int(m.group(2))
+
+
+def split_files(text: str) -> Optional[List[Tuple[str, List[str]]]]:
+    """Per-file ``(id, lines)`` sections of compact text; None when ``text`` is not compact.
+
+    Kept lines start with a line number, ``@`` or ``(``, so a line is a file
+    header only if it reads ``F<next id> ``.
+    """
+    lines = text.splitlines()
+    if not lines or not lines[0].startswith("F1 "):
+        return None
+    sections: List[Tuple[str, List[str]]] = []
+    for ln in lines:
+        m = _FILE_HEADER_RE.match(ln)
+        if m and int(m.group(1)) == len(sections) + 1:
+            sections.append((f"F{m.group(1)}", [ln]))
+        else:
+            sections[-1][1].append(ln)
+    return sections
+
+
+def compact_for_prompt(diff_text: str) -> Tuple[str, Dict[str, Any]]:
+    """Compact using the ``[compaction]`` config (``enabled``, ``context_radius``)."""
+    section = config.get_section("compaction")
+    if not section.get("enabled", True):
+        return diff_text, {"files": {}}
+    return compact_diff(
+        diff_text,
+        context_radius=int(section.get("context_radius", 2)),
+        fold_whitespace=bool(section.get("fold_whitespace", True)),
+        collapse_repeats=bool(section.get("collapse_repeats", True)),
+    )
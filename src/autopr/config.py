@@ -0,0 +1,57 @@
+"""Repository-level configuration loaded from ``.autopr.toml``.
+
+The file is looked up at ``AUTOPR_CONFIG`` if set, otherwise in the current
+working directory. Every section is optional; a missing file, or a Python
+without ``tomllib``/``tomli``, simply yields an empty configuration.
+
+Example::
+
+    [filter]
+    exclude = ["docs/generated/**", "*.lock"]
+    include = ["vendor/our-fork/**"]
+    use_defaults = true
+"""
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Tuple
+
+CONFIG_FILE = ".autopr.toml"
+
+_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def _loads(text: str) -> Dict[str, Any]:
+    try:
+        import tomllib  # Python 3.11+
+    except ImportError:  # pragma: no cover - depends on interpreter
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return {}
+    return tomllib.loads(text)
+
+
+def config_path() -> str:
+    return os.getenv("AUTOPR_CONFIG") or os.path.join(os.getcwd(), CONFIG_FILE)
+
+
+def load_config(path: str | None = None) -> Dict[str, Any]:
+    """Return the parsed configuration, re-reading the file only when it changes."""
+    path = path or config_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        data = _loads(f.read())
+    _cache[path] = (mtime, data)
+    return data
+
+
+def get_section(name: str, path: str | None = None) -> Dict[str, Any]:
+    section = load_config(path).get(name, {})
+    return section if isinstance(section, dict) else {}
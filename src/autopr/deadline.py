@@ -0,0 +1,124 @@
+"""Per-request time budgets that reach every stage and provider call.
+
+``with budget(seconds):`` sets an absolute deadline in a context variable, so
+everything the request runs sees it without extra parameters: provider HTTP
+timeouts are capped by :func:`timeout`, chunked prompts stop between chunks,
+and the failover chain stops hedging when time is up. Nested budgets only ever
+shorten the deadline. Worker threads that should observe it must be started
+through :func:`start` (or run with ``contextvars.copy_context()``).
+
+Stages call :func:`start` / :func:`call` to run work that can be abandoned:
+with no deadline the function simply runs inline; with one it runs in a
+worker thread and :class:`DeadlineExceeded` is raised as soon as the budget is
+spent, leaving the caller free to return what it has so far.
+
+The API reads the budget from the ``X-AutoPR-Deadline`` header and the CLI
+from ``--deadline``, both in seconds (``"1500ms"`` is also accepted).
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Iterator, Optional
+
+HEADER = "X-AutoPR-Deadline"
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("autopr_deadline", default=None)
+_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="autopr-deadline")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before ``stage`` finished."""
+
+    def __init__(self, stage: str = ""):
+        super().__init__(f"Deadline exceeded{f' during {stage}' if stage else ''}")
+        self.stage = stage
+
+
+def parse(value: Optional[str]) -> Optional[float]:
+    """Seconds from ``"30"``, ``"2.5s"`` or ``"1500ms"``; None for an empty value. Raises ValueError."""
+    text = (value or "").strip().lower()
+    if not text:
+        return None
+    if text.endswith("ms"):
+        seconds = float(text[:-2]) / 1000
+    else:
+        seconds = float(text[:-1] if text.endswith("s") else text)
+    if seconds <= 0:
+        raise ValueError(f"deadline must be positive, got {value!r}")
+    return seconds
+
+
+@contextlib.contextmanager
+def budget(seconds: Optional[float]) -> Iterator[None]:
+    """Run the block with at most ``seconds`` left (None keeps the current deadline)."""
+    if seconds is None:
+        yield
+        return
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left, 0 once expired, None without a deadline."""
+    at = _deadline.get()
+    return None if at is None else max(0.0, at - time.monotonic())
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def timeout(default: float) -> float:
+    """``default`` capped by the time left, for HTTP and SDK call timeouts."""
+    left = remaining()
+    return default if left is None else max(0.001, min(default, left))
+
+
+def check(stage: str = "") -> None:
+    if expired():
+        raise DeadlineExceeded(stage)
+
+
+class Pending:
+    """A stage started by :func:`start`; ``result()`` waits at most until the deadline."""
+
+    def __init__(self, stage: str, future: Future):
+        self.stage = stage
+        self._future = future
+
+    def result(self, grace: float = 0.0) -> Any:
+        """The stage's return value; ``grace`` extra seconds let a stage that stops at the deadline hand back a partial result."""
+        left = remaining()
+        try:
+            return self._future.result(timeout=None if left is None else left + grace)
+        except FutureTimeout:
+            # the worker cannot be interrupted; its own calls are capped by the same deadline
+            self._future.cancel()
+            raise DeadlineExceeded(self.stage) from None
+
+
+def start(stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Pending:
+    """Begin ``fn``: inline without a deadline, otherwise in a worker that sees the same deadline."""
+    future: Future = Future()
+    if _deadline.get() is None:
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return Pending(stage, future)
+    check(stage)
+    return Pending(stage, _pool.submit(contextvars.copy_context().run, fn, *args, **kwargs))
+
+
+def call(stage: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    return start(stage, fn, *args, **kwargs).result()
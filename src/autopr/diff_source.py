@@ -0,0 +1,70 @@
+"""Diff inputs for the CLI: argv strings, files, stdin or ``git diff``.
+
+Passing a whole diff through ``--diff "$(cat pr.diff)"`` hits ARG_MAX on large
+PRs. The helpers here return line iterators instead, so the parser can consume
+the diff one file section at a time (see ``parser.iter_file_diffs``).
+"""
+from __future__ import annotations
+
+import subprocess
+import sys
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
+
+
+def git_diff_lines(git_range: str, repo: str = ".") -> Iterator[str]:
+    """Stream ``git diff`` output for ``base..head`` with rename detection.
+
+    Binary files are reported by git as ``Binary files ... differ`` and are
+    dropped later by ``parser.iter_file_diffs``.
+    """
+    cmd = ["git", "-C", repo, "diff", "--no-color", "--no-ext-diff", "-M", git_range]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace")
+    assert proc.stdout is not None
+    try:
+        for line in proc.stdout:
+            yield line
+    finally:
+        proc.stdout.close()
+        err = proc.stderr.read() if proc.stderr else ""
+        if proc.wait() != 0:
+            raise RuntimeError(f"git diff {git_range} failed: {err.strip()}")
+
+
+@contextmanager
+def open_diff(diff: Optional[str] = None, diff_file: Optional[str] = None, git_range: Optional[str] = None, repo: str = ".") -> Iterator[Iterable[str]]:
+    """Yield an iterable of diff lines from exactly one of the supported inputs.
+
+    ``diff='-'`` reads from stdin.
+    """
+    given = [x for x in (diff, diff_file, git_range) if x is not None]
+    if len(given) != 1:
+        raise ValueError("Provide exactly one of --diff, --diff-file or --git-range")
+
+    if git_range is not None:
+        yield git_diff_lines(git_range, repo=repo)
+    elif diff_file is not None:
+        with open(diff_file, "r", encoding="utf-8", errors="replace") as f:
+            yield f
+    elif diff == "-":
+        yield sys.stdin
+    else:
+        yield (diff or "").splitlines()
+
+
+def read_diff(diff: Optional[str] = None, diff_file: Optional[str] = None, git_range: Optional[str] = None, repo: str = ".") -> str:
+    """Materialize a diff as text, skipping binary sections.
+
+    Used by commands that send the diff to an LLM and need it in one piece.
+    """
+    from .parser import iter_file_diffs
+
+    with open_diff(diff, diff_file, git_range, repo) as lines:
+        return "\n".join(ln for _, section in iter_file_diffs(lines) for ln in section)
+
+
+def head_rev(git_range: Optional[str]) -> Optional[str]:
+    """The post-image revision of a ``base..head`` / ``base...head`` range (None means the working tree)."""
+    if not git_range or ".." not in git_range:
+        return None
+    return git_range.rsplit("..", 1)[1].lstrip(".") or "HEAD"
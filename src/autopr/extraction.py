@@ -0,0 +1,179 @@
+"""Tolerant extraction of JSON objects from LLM replies.
+
+Models often wrap valid JSON in markdown fences, add a sentence before or
+after it, leave trailing commas, or get cut off mid-object. ``extract_json``
+handles those cases locally so that only genuinely unusable replies need a
+(small) repair round-trip.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+
+def _balanced_object(text: str, start: int) -> str:
+    """Return text from ``start`` to the matching close brace (or to the end if truncated)."""
+    depth = 0
+    in_str = False
+    escape = False
+    for i in range(start, len(text)):
+        c = text[i]
+        if in_str:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            in_str = True
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def close_truncated(text: str) -> List[str]:
+    """Return candidate completions of a reply that was cut off mid-object.
+
+    Unterminated strings, arrays and objects are closed; variants that drop a
+    dangling ``,``/``:`` or an incomplete trailing key are offered too.
+    """
+    stack: List[str] = []
+    in_str = False
+    escape = False
+    for c in text:
+        if in_str:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            in_str = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+    if not stack and not in_str:
+        return [text]
+    body = (text + '"' if in_str else text).rstrip()
+    closers = "".join(reversed(stack))
+    without_key = re.sub(r'[,{]?\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', lambda m: "{" if m.group(0).startswith("{") else "", body)
+    variants = [body, re.sub(r"[,:]\s*$", "", body), re.sub(r"[,:]\s*$", "", without_key)]
+    return [v + closers for v in dict.fromkeys(variants)]
+
+
+def _candidates(text: str) -> List[str]:
+    out = [text.strip()]
+    out.extend(m.group(1).strip() for m in _FENCE_RE.finditer(text))
+    brace = text.find("{")
+    if brace != -1:
+        out.append(_balanced_object(text, brace))
+    return [c for c in out if c]
+
+
+def extract_json(text: Any) -> Optional[Dict[str, Any]]:
+    """Find and repair the first JSON object in ``text``; None if there is none."""
+    if isinstance(text, dict):
+        return text
+    if not isinstance(text, str) or "{" not in text:
+        return None
+    for cand in _candidates(text):
+        attempts = [cand, _TRAILING_COMMA_RE.sub(r"\1", cand)] + [_TRAILING_COMMA_RE.sub(r"\1", c) for c in close_truncated(cand)]
+        for attempt in attempts:
+            try:
+                obj = json.loads(attempt)
+            except ValueError:
+                continue
+            if isinstance(obj, dict):
+                return obj
+    return None
+
+
+class FindingStream:
+    """Incrementally parse a streamed review reply.
+
+    ``feed()`` takes the next text chunk and returns the findings whose JSON
+    objects completed in it. ``closed`` becomes True once the top-level object
+    is closed, so the caller can stop reading the stream right there. Text
+    before the first ``{`` (prose, markdown fences) is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.closed = False
+        self.findings: List[Dict[str, Any]] = []
+        self._pos = 0
+        self._depth = 0
+        self._in_str = False
+        self._escape = False
+        self._str_start = -1
+        self._last_str = ""
+        self._findings_depth = -1
+        self._item_start = -1
+        self._root_start = -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        new: List[Dict[str, Any]] = []
+        buf = self.buffer
+        i = self._pos
+        while i < len(buf) and not self.closed:
+            c = buf[i]
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_str = False
+                    if self._depth == 1:
+                        self._last_str = buf[self._str_start + 1:i]
+            elif self._root_start == -1:
+                if c == "{":
+                    self._root_start = i
+                    self._depth = 1
+            elif c == '"':
+                self._in_str = True
+                self._str_start = i
+            elif c in "{[":
+                self._depth += 1
+                if c == "[" and self._depth == 2 and self._last_str == "findings":
+                    self._findings_depth = 2
+                elif c == "{" and self._depth == 3 and self._findings_depth == 2:
+                    self._item_start = i
+            elif c in "}]":
+                if c == "}" and self._depth == 3 and self._item_start != -1:
+                    try:
+                        item = json.loads(_TRAILING_COMMA_RE.sub(r"\1", buf[self._item_start:i + 1]))
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        self.findings.append(item)
+                        new.append(item)
+                    self._item_start = -1
+                if c == "]" and self._depth == 2:
+                    self._findings_depth = -1
+                self._depth -= 1
+                if self._depth == 0:
+                    self.closed = True
+            i += 1
+        self._pos = i
+        return new
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Best-effort parse of everything received so far (repairing a cut-off tail)."""
+        if self._root_start == -1:
+            return None
+        return extract_json(self.buffer[self._root_start:self._pos])
@@ -0,0 +1,186 @@
+"""A local fake of the OpenAI and Anthropic HTTP APIs.
+
+Serves ``POST /v1/chat/completions`` (OpenAI) and ``POST /v1/messages``
+(Anthropic), with or without ``"stream": true``. Replies are produced by a
+callable so tests can script them; the default answers every prompt with a
+small deterministic review JSON. Streaming responses are sent as server-sent
+events in small chunks, and the server records when a client hangs up early.
+
+For capacity planning the server can also inject per-request latency drawn
+from a distribution (``const:0.2``, ``uniform:0.1,0.5``, ``normal:0.3,0.05``,
+``lognormal:-1.2,0.6``, ``exp:0.3``; seconds), random 500s and 429s with a
+``Retry-After`` header. Run it standalone with ``pr-ai fake-llm``.
+"""
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Union
+
+
+def default_reply(prompt: str) -> str:
+    findings = []
+    if "TODO" in prompt:
+        findings.append({"type": "todo", "message": "Found TODOs in changes", "severity": "low"})
+    if "print(" in prompt:
+        findings.append({"type": "debug", "message": "Possible debug prints detected", "severity": "low"})
+    return json.dumps({"summary": "Fake LLM review", "findings": findings, "confidence": 0.5})
+
+
+def parse_latency(spec: Union[str, float, None]) -> Callable[[random.Random], float]:
+    """Turn a latency spec like ``lognormal:-1.2,0.6`` into a sampler (seconds)."""
+    if spec is None or spec == "":
+        return lambda rng: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda rng: float(spec)
+    kind, _, args = spec.partition(":")
+    vals = [float(x) for x in args.split(",") if x.strip()] if args else []
+    kind = kind.strip().lower()
+    needed = {"const": 1, "constant": 1, "exp": 1, "exponential": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+    if kind in needed and len(vals) < needed[kind]:
+        raise ValueError(f"Latency distribution {kind!r} needs {needed[kind]} parameter(s): {spec}")
+    if kind in ("const", "constant"):
+        return lambda rng: vals[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(vals[0], vals[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(vals[0], vals[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(vals[0], vals[1])
+    if kind in ("exp", "exponential"):
+        return lambda rng: rng.expovariate(1.0 / vals[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class FakeLLMServer:
+    """Threaded fake LLM server; use ``start()``/``stop()`` or as a context manager."""
+
+    def __init__(self, reply: Callable[[str], str] = default_reply, host: str = "127.0.0.1", port: int = 0, chunk_size: int = 8, chunk_delay: float = 0.0,
+                 latency: Union[str, float, None] = None, error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0, seed: Optional[int] = None):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self.stats: Dict[str, int] = {"requests": 0, "streams": 0, "chunks_sent": 0, "disconnects": 0, "errors": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread: Optional[threading.Thread] = None
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    def _draw(self) -> tuple:
+        """Pick (delay, fault) for one request; fault is None, 429 or 500."""
+        with self._lock:
+            delay = self.latency(self._rng)
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return delay, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _sse(self, events) -> None:
+                fake._count("streams")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for ev in events:
+                        self.wfile.write(f"data: {ev}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                        fake._count("chunks_sent")
+                        if fake.chunk_delay:
+                            time.sleep(fake.chunk_delay)
+                except (BrokenPipeError, ConnectionResetError):
+                    fake._count("disconnects")
+                self.close_connection = True
+
+            def do_POST(self):
+                fake._count("requests")
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                delay, fault = fake._draw()
+                if delay:
+                    time.sleep(delay)
+                if fault == 429:
+                    fake._count("rate_limited")
+                    return self._json(429, {"error": {"type": "rate_limit_error", "message": "Rate limit exceeded"}}, {"Retry-After": str(fake.retry_after)})
+                if fault == 500:
+                    fake._count("errors")
+                    return self._json(500, {"error": {"type": "server_error", "message": "Injected failure"}})
+                messages = body.get("messages") or []
+                prompt = "\n".join(str(m.get("content", "")) for m in messages)
+                text = fake.reply(prompt)
+                pieces = [text[i:i + fake.chunk_size] for i in range(0, len(text), fake.chunk_size)] or [""]
+                usage_in, usage_out = max(1, len(prompt) // 4), max(1, len(text) // 4)
+
+                if self.path.rstrip("/").endswith("/chat/completions"):
+                    if body.get("stream"):
+                        def events():
+                            for p in pieces:
+                                yield json.dumps({"choices": [{"index": 0, "delta": {"content": p}}]})
+                            yield json.dumps({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": {"prompt_tokens": usage_in, "completion_tokens": usage_out}})
+                            yield "[DONE]"
+                        return self._sse(events())
+                    return self._json(200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": text}}], "usage": {"prompt_tokens": usage_in, "completion_tokens": usage_out}})
+
+                if self.path.rstrip("/").endswith("/messages"):
+                    if body.get("stream"):
+                        def events():
+                            yield json.dumps({"type": "message_start", "message": {"usage": {"input_tokens": usage_in, "output_tokens": 0}}})
+                            for p in pieces:
+                                yield json.dumps({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": p}})
+                            yield json.dumps({"type": "message_delta", "usage": {"output_tokens": usage_out}})
+                            yield json.dumps({"type": "message_stop"})
+                        return self._sse(events())
+                    return self._json(200, {"content": [{"type": "text", "text": text}], "usage": {"input_tokens": usage_in, "output_tokens": usage_out}})
+
+                self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        return Handler
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,160 @@
+"""Post-processing for review findings: de-duplication, aggregation, ranking and caps.
+
+Findings from the LLM, the static analyzer and the linter overlap (the same
+TODO can be reported by all three) and cheap checks can fire thousands of
+times on one minified file. ``process`` turns the raw list into something a
+reviewer can read:
+
+1. de-duplicate by fingerprint (type, file, line, normalized message); a
+   finding without a line is dropped when the same type is already reported
+   at a concrete line of the same file (or of any file, if it names none)
+2. aggregate repeated low-severity findings of one type in one file into a
+   single finding with ``count`` and ``lines``
+3. rank by severity (high first, original order otherwise)
+4. apply per-type and total caps
+
+Every step is counted, so the report says exactly what was left out. Limits
+come from ``[findings]`` in ``.autopr.toml``::
+
+    [findings]
+    max_total = 200
+    max_per_type = 50
+    aggregate_threshold = 3
+    aggregate_severities = ["low", "info"]
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3, "info": 4}
+# the same check under different names from different sources
+TYPE_ALIASES = {"debug": "debug_print", "print": "debug_print", "todos": "todo"}
+
+DEFAULTS: Dict[str, Any] = {"max_total": 200, "max_per_type": 50, "aggregate_threshold": 3, "aggregate_severities": ["low", "info"]}
+
+_NUM_RE = re.compile(r"\d+")
+_WS_RE = re.compile(r"\s+")
+
+
+def canonical_type(finding: Dict[str, Any]) -> str:
+    t = str(finding.get("type") or "ai").strip().lower()
+    return TYPE_ALIASES.get(t, t)
+
+
+def severity_rank(finding: Dict[str, Any]) -> int:
+    return SEVERITY_RANK.get(str(finding.get("severity") or "").lower(), len(SEVERITY_RANK))
+
+
+def fingerprint(finding: Dict[str, Any]) -> str:
+    """Stable id of a finding: type, file, line and message with numbers/whitespace normalized."""
+    message = _WS_RE.sub(" ", _NUM_RE.sub("0", str(finding.get("message") or "").lower())).strip()
+    raw = "|".join([canonical_type(finding), str(finding.get("file") or ""), str(finding.get("line") or ""), message])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def settings() -> Dict[str, Any]:
+    return {**DEFAULTS, **config.get_section("findings")}
+
+
+def dedupe(findings: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Drop repeated findings, keeping the first occurrence (raised to the highest severity)."""
+    kept: List[Dict[str, Any]] = []
+    by_print: Dict[str, Dict[str, Any]] = {}
+    by_line: Dict[Tuple[str, str, Any], Dict[str, Any]] = {}
+    located = set()
+    for f in findings:
+        if f.get("line") is not None:
+            located.add((canonical_type(f), str(f.get("file") or "")))
+            located.add((canonical_type(f), None))
+
+    dropped = 0
+    for f in findings:
+        t, path, line = canonical_type(f), str(f.get("file") or ""), f.get("line")
+        # a vague finding is covered by a located one in the same file (or anywhere, if it names no file)
+        if line is None and ((t, path) in located or (not path and (t, None) in located)):
+            dropped += 1
+            continue
+        existing = by_print.get(fingerprint(f)) or (by_line.get((t, path, line)) if line is not None else None)
+        if existing is not None:
+            if severity_rank(f) < severity_rank(existing):
+                existing["severity"] = f.get("severity")
+            dropped += 1
+            continue
+        f = dict(f)
+        by_print[fingerprint(f)] = f
+        if line is not None:
+            by_line[(t, path, line)] = f
+        kept.append(f)
+    return kept, dropped
+
+
+def aggregate(findings: List[Dict[str, Any]], threshold: int = 3, severities: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Collapse more than ``threshold`` same-type findings per file into one."""
+    severities = [s.lower() for s in (severities if severities is not None else DEFAULTS["aggregate_severities"])]
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for i, f in enumerate(findings):
+        if str(f.get("severity") or "").lower() in severities:
+            groups.setdefault((canonical_type(f), str(f.get("file") or "")), []).append(i)
+
+    replace: Dict[int, Dict[str, Any]] = {}
+    skip = set()
+    stats = {"groups": 0, "findings": 0}
+    for (t, path), idxs in groups.items():
+        if len(idxs) <= threshold:
+            continue
+        first = findings[idxs[0]]
+        lines = sorted({findings[i]["line"] for i in idxs if findings[i].get("line") is not None})
+        merged = {k: v for k, v in first.items() if k != "line"}
+        merged["message"] = f"{first.get('message', '')} ({len(idxs)} occurrences)"
+        merged["count"] = len(idxs)
+        if lines:
+            merged["lines"] = lines[:20]
+        replace[idxs[0]] = merged
+        skip.update(idxs[1:])
+        stats["groups"] += 1
+        stats["findings"] += len(idxs)
+    out = [replace.get(i, f) for i, f in enumerate(findings) if i not in skip]
+    return out, stats
+
+
+def rank(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Most severe first; ties keep their original order."""
+    return sorted(findings, key=severity_rank)
+
+
+def cap(findings: List[Dict[str, Any]], max_per_type: Optional[int] = None, max_total: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Keep at most ``max_per_type`` per type and ``max_total`` overall; count the rest."""
+    kept: List[Dict[str, Any]] = []
+    per_type: Dict[str, int] = {}
+    omitted: Dict[str, Any] = {"total": 0, "by_type": {}, "by_severity": {}}
+    for f in findings:
+        t = canonical_type(f)
+        over_type = max_per_type is not None and per_type.get(t, 0) >= max_per_type
+        over_total = max_total is not None and len(kept) >= max_total
+        if over_type or over_total:
+            # an aggregated finding stands for `count` originals
+            n = int(f.get("count", 1))
+            sev = str(f.get("severity") or "unknown").lower()
+            omitted["total"] += n
+            omitted["by_type"][t] = omitted["by_type"].get(t, 0) + n
+            omitted["by_severity"][sev] = omitted["by_severity"].get(sev, 0) + n
+            continue
+        per_type[t] = per_type.get(t, 0) + 1
+        kept.append(f)
+    return kept, omitted
+
+
+def process(findings: List[Dict[str, Any]], opts: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Run dedupe, aggregation, ranking and caps; returns ``(findings, report)``."""
+    opts = {**settings(), **(opts or {})}
+    total_in = len(findings)
+    out, duplicates = dedupe(findings)
+    out, aggregated = aggregate(out, int(opts["aggregate_threshold"]), list(opts["aggregate_severities"]))
+    out = rank(out)
+    out, omitted = cap(out, opts.get("max_per_type"), opts.get("max_total"))
+    report = {"input": total_in, "returned": len(out), "duplicates": duplicates, "aggregated": aggregated, "omitted": omitted}
+    return out, report
@@ -1,66 +1,73 @@
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List
 
 from .parser import parse_diff
-from . import prompts
+from . import compaction, deadline as deadline_mod, pathfilter
+from .extraction import extract_json
 from .llm import llm
 
 
 def _ensure_dict(obj: Any) -> Dict[str, Any]:
     if isinstance(obj, dict):
+        # providers fall back to {"raw": text}; the JSON may still be recoverable
+        if set(obj) - {"_usage"} == {"raw"}:
+            parsed = extract_json(obj["raw"])
+            if parsed is not None:
+                return {**parsed, **{k: v for k, v in obj.items() if k != "raw"}}
         return obj
     if isinstance(obj, str):
-        try:
-            return json.loads(obj)
-        except Exception:
-            return {"raw": obj}
+        parsed = extract_json(obj)
+        return parsed if parsed is not None else {"raw": obj}
     return {"raw": str(obj)}
 
 
-def generate_pr_from(diff: str, commits: List[str], issue: str | None = None) -> Dict[str, Any]:
+def _fallback_description(context: Dict[str, Any], commits: List[str]) -> Dict[str, Any]:
+    """What can be said without the LLM: the first commit subject and the changed files."""
+    return {"title": commits[0] if commits else "", "files_impacted": list(context.get("files_changed") or [])}
+
+
+def generate_pr_from(diff: str, commits: List[str], issue: str | None = None, deadline: float | None = None) -> Dict[str, Any]:
     """Generate a structured PR description.
 
     Steps:
       - parse diff into short structured context
-      - render a tighter prompt using context
-      - call the configured llm provider
+      - call the configured llm provider (which extracts/repairs its JSON reply)
       - ensure the result is a dict and contains expected keys
-    """
-    context = parse_diff(diff)
 
-    prompt = (
-        prompts.PR_DESCRIPTION_PROMPT
-        + "\nContext Summary:\n{summary}\nFiles changed:\n{files}\nAdded functions:\n{funcs}\nAdded classes:\n{classes}\n"
-    ).format(
-        diff=diff,
-        commits="\n".join(commits),
-        issue=issue or "",
-        summary=context.get("summary", ""),
-        files=", ".join(context.get("files_changed", [])),
-        funcs=", ".join(context.get("added_functions", [])),
-        classes=", ".join(context.get("added_classes", [])),
-    )
+    With ``deadline`` (seconds) a provider call that does not finish in time is
+    abandoned; the result is then built from the commits and the parsed diff and
+    flagged with ``_partial`` / ``_skipped_stages``.
+    """
+    with deadline_mod.budget(deadline):
+        context = parse_diff(diff)
+        # the LLM only sees reviewable files; excluded ones are re-added to files_impacted below
+        diff, filtered = pathfilter.filter_diff(diff)
+        diff, _ = compaction.compact_for_prompt(diff)
 
-    # call provider
-    raw = llm.generate_pr_description(diff, commits, issue)
-    result = _ensure_dict(raw)
+        # call provider
+        skipped: List[str] = []
+        try:
+            raw = deadline_mod.call("llm_description", llm.generate_pr_description, diff, commits, issue)
+        except deadline_mod.DeadlineExceeded:
+            skipped.append("llm_description")
+            raw = _fallback_description(context, commits)
+        result = _ensure_dict(raw)
 
     # normalize expected keys (best-effort)
     keys = ["title", "what_changed", "why", "files_impacted", "tests", "risk_level", "rollback_plan"]
     normalized = {k: result.get(k, "") if k != "files_impacted" else result.get(k, []) for k in keys}
 
-    # If result is empty or only raw, try to call LLM by sending the prompt string directly
-    if not any(normalized.values()) or (len(normalized.get("title", "")) == 0 and isinstance(result.get("raw"), str)):
-        # fallback: ask LLM with prompt
-        resp = llm._chat(prompt) if hasattr(llm, "_chat") else None
-        if resp:
-            parsed = _ensure_dict(resp)
-            for k in keys:
-                if not normalized.get(k):
-                    normalized[k] = parsed.get(k, normalized[k]) if isinstance(parsed, dict) else normalized[k]
+    if isinstance(result.get("_usage"), dict):
+        normalized["_usage"] = result["_usage"]
+    if filtered["excluded_files"]:
+        impacted = normalized["files_impacted"] if isinstance(normalized["files_impacted"], list) else []
+        normalized["files_impacted"] = impacted + [f for f in filtered["excluded_files"] if f not in impacted]
+        normalized["_filtered"] = filtered
 
     # Attach parser context metadata
     normalized["_context"] = context
+    if skipped:
+        normalized["_partial"] = True
+        normalized["_skipped_stages"] = skipped
     return normalized
@@ -0,0 +1,223 @@
+"""Pooled GitHub REST client with conditional requests and lazy pagination.
+
+- one ``httpx.Client`` per process keeps connections to the API alive
+- GETs remember the ``ETag`` of each response and send ``If-None-Match``;
+  a ``304 Not Modified`` is served from the cache and does not count against
+  the primary rate limit. ETags live in the shared disk cache when one is
+  configured (see :mod:`autopr.cache`), otherwise in a small in-memory LRU
+- list endpoints are generators that follow ``Link: rel="next"`` one page at
+  a time, so callers that stop early never fetch the remaining pages
+- secondary rate limits (403/429 with ``Retry-After`` or an exhausted
+  ``x-ratelimit-remaining``) are waited out up to ``max_wait`` seconds, and
+  writes are spaced at least ``min_write_interval`` apart as GitHub advises
+
+``GITHUB_API_URL`` and ``GITHUB_TOKEN`` configure :func:`default_client`.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+from .cache import shared_cache
+
+DEFAULT_API_URL = "https://api.github.com"
+_LINK_RE = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+
+
+class GitHubError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class RateLimited(GitHubError):
+    """Raised when a rate limit would take longer than ``max_wait`` to clear."""
+
+
+def parse_link(header: Optional[str]) -> Dict[str, str]:
+    """``Link`` header -> ``{rel: url}``."""
+    return {rel: url for url, rel in _LINK_RE.findall(header or "")}
+
+
+class _MemoryETags:
+    def __init__(self, max_entries: int = 512):
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class GitHubClient:
+    def __init__(self, token: Optional[str] = None, base_url: Optional[str] = None, timeout: float = 30.0, max_retries: int = 3,
+                 max_wait: float = 120.0, min_write_interval: float = 1.0, etag_cache: Any = None, sleep: Callable[[float], None] = time.sleep):
+        self.base_url = (base_url or os.getenv("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+        headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28", "User-Agent": "autopr"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self._http = httpx.Client(base_url=self.base_url, headers=headers, timeout=timeout, limits=httpx.Limits(max_keepalive_connections=10))
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.min_write_interval = min_write_interval
+        self.etags = etag_cache if etag_cache is not None else (shared_cache() or _MemoryETags())
+        self._sleep = sleep
+        self._write_lock = threading.Lock()
+        self._last_write = 0.0
+        self.stats = {"requests": 0, "not_modified": 0, "rate_limit_waits": 0}
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self) -> "GitHubClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- transport -------------------------------------------------------
+
+    def _rate_limit_wait(self, resp: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying ``resp``, or None if it is not rate limited."""
+        if resp.status_code not in (403, 429):
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                return 60.0
+        if resp.headers.get("x-ratelimit-remaining") == "0":
+            reset = float(resp.headers.get("x-ratelimit-reset") or 0)
+            return max(0.0, reset - time.time()) + 1.0
+        if resp.status_code == 429 or "rate limit" in resp.text.lower():
+            # secondary limit without hints: back off exponentially
+            return 60.0 * (2 ** attempt)
+        return None
+
+    def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        writing = method.upper() not in ("GET", "HEAD")
+        attempt = 0
+        while True:
+            if writing and self.min_write_interval:
+                with self._write_lock:
+                    gap = self._last_write + self.min_write_interval - time.monotonic()
+                    if gap > 0:
+                        self._sleep(gap)
+                    self._last_write = time.monotonic()
+            self.stats["requests"] += 1
+            resp = self._http.request(method, url, **kwargs)
+            wait = self._rate_limit_wait(resp, attempt)
+            if wait is None:
+                return resp
+            if attempt == self.max_retries or wait > self.max_wait:
+                raise RateLimited(resp.status_code, f"rate limited; retry in {wait:.0f}s")
+            self.stats["rate_limit_waits"] += 1
+            self._sleep(wait)
+            attempt += 1
+
+    def _check(self, resp: httpx.Response) -> httpx.Response:
+        if resp.status_code >= 400:
+            try:
+                message = resp.json().get("message", resp.text)
+            except ValueError:
+                message = resp.text
+            raise GitHubError(resp.status_code, message)
+        return resp
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, accept: Optional[str] = None) -> Tuple[Any, Dict[str, str]]:
+        """Conditional GET; returns ``(body, links)`` where body is JSON or text."""
+        key = f"github-etag:{self.base_url}:{accept or ''}:{url}:{sorted((params or {}).items())}"
+        cached = self.etags.get(key)
+        headers = {"Accept": accept} if accept else {}
+        if cached:
+            headers["If-None-Match"] = cached["etag"]
+        resp = self.request("GET", url, params=params, headers=headers)
+        if resp.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return cached["body"], cached["links"]
+        self._check(resp)
+        is_json = "json" in resp.headers.get("Content-Type", "")
+        body = resp.json() if is_json else resp.text
+        links = parse_link(resp.headers.get("Link"))
+        etag = resp.headers.get("ETag")
+        if etag:
+            self.etags.set(key, {"etag": etag, "body": body, "links": links})
+        return body, links
+
+    def paginate(self, url: str, params: Optional[Dict[str, Any]] = None, per_page: int = 100) -> Iterator[Any]:
+        """Yield items page by page, fetching the next page only when needed."""
+        params = {**(params or {}), "per_page": per_page}
+        next_url: Optional[str] = url
+        while next_url:
+            body, links = self.get(next_url, params=params)
+            # the next link already carries every query parameter
+            params = None
+            for item in body or []:
+                yield item
+            next_url = links.get("next")
+
+    # -- endpoints -------------------------------------------------------
+
+    def pull_request(self, repo: str, number: int) -> Dict[str, Any]:
+        return self.get(f"/repos/{repo}/pulls/{number}")[0]
+
+    def pull_diff(self, repo: str, number: int) -> str:
+        return self.get(f"/repos/{repo}/pulls/{number}", accept="application/vnd.github.v3.diff")[0]
+
+    def pull_files(self, repo: str, number: int) -> Iterator[Dict[str, Any]]:
+        return self.paginate(f"/repos/{repo}/pulls/{number}/files")
+
+    def pull_commits(self, repo: str, number: int) -> Iterator[Dict[str, Any]]:
+        return self.paginate(f"/repos/{repo}/pulls/{number}/commits")
+
+    def issue_comments(self, repo: str, number: int) -> Iterator[Dict[str, Any]]:
+        return self.paginate(f"/repos/{repo}/issues/{number}/comments")
+
+    def review_comments(self, repo: str, number: int) -> Iterator[Dict[str, Any]]:
+        return self.paginate(f"/repos/{repo}/pulls/{number}/comments")
+
+    def create_review(self, repo: str, number: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self._check(self.request("POST", f"/repos/{repo}/pulls/{number}/reviews", json=payload)).json()
+
+    def create_issue_comment(self, repo: str, number: int, body: str) -> Dict[str, Any]:
+        return self._check(self.request("POST", f"/repos/{repo}/issues/{number}/comments", json={"body": body})).json()
+
+    def update_issue_comment(self, repo: str, comment_id: int, body: str) -> Dict[str, Any]:
+        return self._check(self.request("PATCH", f"/repos/{repo}/issues/comments/{comment_id}", json={"body": body})).json()
+
+
+_default: Optional[GitHubClient] = None
+_default_key: Optional[Tuple[str, str, int]] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> GitHubClient:
+    """Process-wide client for GITHUB_API_URL / GITHUB_TOKEN (re-created if they change or after fork)."""
+    global _default, _default_key
+    key = (os.getenv("GITHUB_API_URL") or DEFAULT_API_URL, os.getenv("GITHUB_TOKEN") or "", os.getpid())
+    with _default_lock:
+        if _default is None or _default_key != key:
+            if _default is not None and _default_key and _default_key[2] == key[2]:
+                _default.close()
+            _default = GitHubClient(token=key[1] or None, base_url=key[0])
+            _default_key = key
+        return _default
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 from typing import List, Dict, Any
 
+from .scanner import default_scanner
+
 
 def run_basic_lint(code: str) -> List[Dict[str, Any]]:
     findings: List[Dict[str, Any]] = []
@@ -17,11 +19,8 @@ def run_basic_lint(code: str) -> List[Dict[str, Any]]:
             findings.append({"type": "long_line", "message": "Line exceeds 120 characters", "line": i, "severity": "low"})
         if ln.endswith(" "):
             findings.append({"type": "trailing_whitespace", "message": "Trailing whitespace", "line": i, "severity": "low"})
-        if "import *" in ln:
-            findings.append({"type": "wildcard_import", "message": "Wildcard import found; avoid using import *", "line": i, "severity": "medium"})
 
-    # detect obvious 'eval(' calls
-    if "eval(" in code:
-        findings.append({"type": "unsafe_eval", "message": "Use of eval() detected; this can be dangerous", "severity": "high"})
+    # wildcard imports, eval and other dangerous calls, and committed secrets: one pass for every pattern
+    findings.extend(default_scanner().scan_text(code, groups=("dangerous", "secret")))
 
     return findings
@@ -1,24 +1,43 @@
+import logging
 import os
 from typing import Dict, Any
 
-from .providers import OpenAIProvider, AnthropicProvider, StubProvider
+from .providers import OpenAIProvider, AnthropicProvider, StubProvider, FailoverProvider
+
+logger = logging.getLogger(__name__)
+
+_FACTORIES = {"openai": OpenAIProvider, "anthropic": AnthropicProvider, "stub": StubProvider}
 
 
 def _choose_provider() -> Any:
-    provider = os.getenv("AUTOPR_PROVIDER", "stub").lower()
-    if provider == "openai":
-        try:
-            return OpenAIProvider()
-        except Exception:
-            # fallback to stub if library missing or misconfigured
-            return StubProvider()
-    if provider == "anthropic":
+    """Build the provider named by AUTOPR_PROVIDER.
+
+    A comma-separated value (e.g. ``openai,anthropic``) builds an ordered
+    failover chain with hedged requests; ``AUTOPR_HEDGE=0`` disables hedging and
+    ``AUTOPR_HEDGE_DELAY`` sets the initial hedge delay in seconds.
+    """
+    names = [n.strip() for n in os.getenv("AUTOPR_PROVIDER", "stub").lower().split(",") if n.strip()]
+    chain = []
+    for name in names:
+        factory = _FACTORIES.get(name)
+        if factory is None:
+            logger.warning("AutoPR provider %s is unknown (expected one of %s); skipping it", name, ", ".join(_FACTORIES))
+            continue
         try:
-            return AnthropicProvider()
-        except Exception:
-            return StubProvider()
+            chain.append(factory())
+        except Exception as e:
+            # library missing or misconfigured: skip it
+            logger.warning("AutoPR provider %s unavailable: %s", name, e)
 
-    return StubProvider()
+    if not chain:
+        return StubProvider()
+    if len(chain) == 1:
+        return chain[0]
+    return FailoverProvider(
+        chain,
+        hedge=os.getenv("AUTOPR_HEDGE", "1") != "0",
+        hedge_delay=float(os.getenv("AUTOPR_HEDGE_DELAY", "2.0")),
+    )
 
 
 llm = _choose_provider()
@@ -0,0 +1,220 @@
+"""Replay a corpus of diffs against a running AutoPR service.
+
+Two load models are supported:
+
+- open loop (``rps``): requests are started on a fixed schedule regardless of
+  how fast the server answers; latency is measured from the *scheduled* start
+  so queueing inside the client is not hidden (no coordinated omission)
+- closed loop (``concurrency``): N workers each send the next request as soon
+  as the previous one finished
+
+The report holds overall throughput, per-endpoint latency percentiles, status
+and error counts, and resident memory of the server process (``server_pid``,
+read from ``/proc``) or of the load generator itself.
+
+Pair it with ``pr-ai fake-llm`` (see :mod:`autopr.fakellm`) to get realistic
+provider latency without calling a real API.
+"""
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+ENDPOINTS = ("review", "generate")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_corpus(path: str) -> List[str]:
+    """Read diffs from a directory (``*.diff`` / ``*.patch``) or a single file."""
+    p = Path(path)
+    if p.is_dir():
+        files = sorted(f for f in p.iterdir() if f.suffix in (".diff", ".patch") and f.is_file())
+    elif p.is_file():
+        files = [p]
+    else:
+        raise ValueError(f"Corpus not found: {path}")
+    corpus = [f.read_text(encoding="utf-8", errors="replace") for f in files]
+    corpus = [d for d in corpus if d.strip()]
+    if not corpus:
+        raise ValueError(f"No diffs found in {path}")
+    return corpus
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def rss_kb(pid: Optional[int] = None) -> Optional[int]:
+    """Current RSS of ``pid`` in KiB from /proc, or this process's peak RSS."""
+    if pid is not None:
+        try:
+            with open(f"/proc/{pid}/status", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            return None
+        return None
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-POSIX
+        return None
+    peak = int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    # bytes on macOS, KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _payload(endpoint: str, diff: str) -> Dict[str, Any]:
+    if endpoint == "generate":
+        return {"diff": diff, "commits": []}
+    return {"diff": diff}
+
+
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.status: Dict[str, Dict[str, int]] = {}
+
+    def add(self, endpoint: str, latency: float, status: str) -> None:
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(latency)
+            counts = self.status.setdefault(endpoint, {})
+            counts[status] = counts.get(status, 0) + 1
+
+
+def _send(client: httpx.Client, endpoint: str, diff: str, scheduled: float, rec: _Recorder) -> None:
+    try:
+        resp = client.post(f"/{endpoint}", json=_payload(endpoint, diff))
+        status = str(resp.status_code)
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    rec.add(endpoint, time.perf_counter() - scheduled, status)
+
+
+def _jobs(corpus: List[str], endpoints: Iterable[str]) -> Iterable[tuple]:
+    return itertools.cycle([(ep, d) for d in corpus for ep in endpoints])
+
+
+def summarize(rec: _Recorder, elapsed: float) -> Dict[str, Any]:
+    by_endpoint: Dict[str, Any] = {}
+    total = errors = 0
+    for ep, samples in rec.samples.items():
+        counts = rec.status.get(ep, {})
+        n_err = sum(v for k, v in counts.items() if not (k.isdigit() and int(k) < 400))
+        ms = [s * 1000 for s in samples]
+        latency = {f"p{p}": round(percentile(ms, p), 2) for p in PERCENTILES}
+        latency["max"] = round(max(ms), 2)
+        latency["mean"] = round(sum(ms) / len(ms), 2)
+        by_endpoint[ep] = {"requests": len(samples), "errors": n_err, "error_rate": round(n_err / len(samples), 4), "status": dict(counts), "latency_ms": latency}
+        total += len(samples)
+        errors += n_err
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "endpoints": by_endpoint,
+    }
+
+
+def run_loadtest(
+    base_url: str,
+    corpus: List[str],
+    endpoints: Iterable[str] = ENDPOINTS,
+    rps: Optional[float] = None,
+    concurrency: int = 4,
+    duration: Optional[float] = None,
+    max_requests: Optional[int] = None,
+    timeout: float = 60.0,
+    server_pid: Optional[int] = None,
+    client: Optional[httpx.Client] = None,
+) -> Dict[str, Any]:
+    """Drive load until ``duration`` seconds or ``max_requests`` have elapsed.
+
+    With ``rps`` set the run is open loop (at most ``concurrency * 16``
+    requests in flight); otherwise ``concurrency`` workers run a closed loop.
+    ``client`` may be any ``httpx.Client`` (e.g. a FastAPI ``TestClient``).
+    """
+    endpoints = [e.strip("/") for e in endpoints]
+    unknown = [e for e in endpoints if e not in ENDPOINTS]
+    if unknown:
+        raise ValueError(f"Unknown endpoint(s): {', '.join(unknown)}")
+    if duration is None and max_requests is None:
+        raise ValueError("Set a duration or a request count")
+    if rps is not None and rps <= 0:
+        raise ValueError("rps must be positive")
+
+    own_client = client is None
+    if client is None:
+        limits = httpx.Limits(max_connections=max(concurrency, 1) * 16)
+        client = httpx.Client(base_url=base_url, timeout=timeout, limits=limits)
+    rec = _Recorder()
+    jobs = _jobs(corpus, endpoints)
+    jobs_lock = threading.Lock()
+    issued = 0
+    rss_start = rss_kb(server_pid)
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+
+    def next_job() -> Optional[tuple]:
+        nonlocal issued
+        with jobs_lock:
+            if max_requests is not None and issued >= max_requests:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            issued += 1
+            return next(jobs)
+
+    try:
+        if rps is None:
+            def worker() -> None:
+                while True:
+                    job = next_job()
+                    if job is None:
+                        return
+                    _send(client, job[0], job[1], time.perf_counter(), rec)
+
+            threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(concurrency, 1))]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        else:
+            interval = 1.0 / rps
+            with ThreadPoolExecutor(max_workers=max(concurrency, 1) * 16) as pool:
+                for i in itertools.count():
+                    scheduled = start + i * interval
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    job = next_job()
+                    if job is None:
+                        break
+                    pool.submit(_send, client, job[0], job[1], scheduled, rec)
+    finally:
+        if own_client:
+            client.close()
+
+    report = summarize(rec, time.perf_counter() - start)
+    report["mode"] = "open" if rps is not None else "closed"
+    report["target_rps"] = rps
+    report["concurrency"] = concurrency
+    report["rss_kb"] = {"pid": server_pid or os.getpid(), "start": rss_start, "end": rss_kb(server_pid)}
+    return report
@@ -1,11 +1,21 @@
-from typing import List, Optional
-from fastapi import FastAPI
+import contextlib
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
 from autopr.llm import llm
 from autopr import generator
 from autopr import analysis
 from autopr import reviewer
+from autopr import webhooks
+from autopr import tokens
+from autopr import admission
+from autopr import symbols
+from autopr import deadline
 
 app = FastAPI(title="AutoPR - Minimal MVP")
 
@@ -18,6 +28,7 @@ class GenerateRequest(BaseModel):
 
 class ReviewRequest(BaseModel):
     diff: str = Field(..., example="print(\"debug\")\n# TODO: fix")
+    head: Optional[str] = Field(None, description="Head commit; enables whole-file checks against the checkout in AUTOPR_REPO")
 
 
 
@@ -29,18 +40,61 @@ class GenerateResponse(BaseModel):
     tests: str
     risk_level: str
     rollback_plan: str
+    partial: bool = Field(False, alias="_partial")
+    skipped_stages: List[str] = Field(default_factory=list, alias="_skipped_stages")
+    usage: Optional[Dict[str, Any]] = Field(None, alias="_usage", description="Prompt/completion tokens (and cost, if priced) of this request's provider calls")
+    filtered: Optional[Dict[str, Any]] = Field(None, alias="_filtered", description="Generated/vendored/lock files left out of the prompt and the tokens that saved")
 
 
 class ReviewFinding(BaseModel):
     type: str
     message: str
     severity: Optional[str]
+    file: Optional[str] = None
+    line: Optional[int] = None
+    position: Optional[int] = None
 
 
 class ReviewResponse(BaseModel):
     summary: str
     findings: List[ReviewFinding]
     confidence: float = Field(..., ge=0.0, le=1.0)
+    partial: bool = Field(False, alias="_partial", description="True when stages were skipped to meet the request deadline")
+    skipped_stages: List[str] = Field(default_factory=list, alias="_skipped_stages")
+    findings_report: Optional[Dict[str, Any]] = Field(None, alias="_findings", description="Findings in, returned, and removed as duplicates, aggregated or omitted by caps")
+    usage: Optional[Dict[str, Any]] = Field(None, alias="_usage", description="Prompt/completion tokens (and cost, if priced) of this request's provider calls")
+    filtered: Optional[Dict[str, Any]] = Field(None, alias="_filtered", description="Generated/vendored/lock files left out of the prompt and the tokens that saved")
+
+
+@app.middleware("http")
+async def reject_oversized_bodies(request: Request, call_next):
+    # refuse a huge upload from its Content-Length, before the body is read or parsed
+    if request.method == "POST" and request.url.path in ("/review", "/generate"):
+        length = request.headers.get("content-length", "")
+        limit = admission.gate().max_body_bytes()
+        if length.isdigit() and int(length) > limit:
+            return JSONResponse(status_code=413, content={"detail": f"Request body of {length} bytes exceeds the limit of {limit}"})
+    return await call_next(request)
+
+
+@contextlib.asynccontextmanager
+async def _admitted(diff: str, response: Response) -> AsyncIterator[None]:
+    # the lane wait runs on the event loop; only admitted work takes a threadpool thread
+    try:
+        async with admission.gate().admit(diff) as lane:
+            response.headers["X-AutoPR-Lane"] = lane
+            yield
+    except admission.RequestTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except admission.LaneBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5", "X-AutoPR-Lane": e.lane})
+
+
+def _deadline_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return deadline.parse(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {deadline.HEADER} header: {value!r} (expected seconds, e.g. 30 or 1500ms)")
 
 
 @app.get("/health")
@@ -48,17 +102,33 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/usage", summary="Token usage")
+def usage():
+    """Aggregate prompt/completion tokens (and estimated cost, if priced) per provider model."""
+    return tokens.usage.snapshot()
+
+
+@app.get("/admission", summary="Admission lanes")
+def admission_stats():
+    """Per-lane concurrency, queue depth and wait times, plus requests rejected as too large."""
+    return admission.gate().snapshot()
+
+
 @app.post("/generate", response_model=GenerateResponse, summary="Generate PR", response_description="Auto-generated PR description")
-def generate_pr(req: GenerateRequest):
+async def generate_pr(req: GenerateRequest, response: Response, x_autopr_deadline: Optional[str] = Header(None)):
     """Generate a structured PR description from diff, commits and optional issue link.
 
     This endpoint uses the configured LLM provider (or the stub in dev) to return a JSON object
     describing the PR title, what changed, why it changed, impacted files, tests, risk level and rollback plan.
+    An `X-AutoPR-Deadline` header (seconds) bounds the provider call; on timeout a partial description is returned.
     """
-    desc = generator.generate_pr_from(req.diff, req.commits, req.issue)
+    budget = _deadline_seconds(x_autopr_deadline)
+    async with _admitted(req.diff, response):
+        desc = await run_in_threadpool(generator.generate_pr_from, req.diff, req.commits, req.issue, deadline=budget)
     # Ensure we return a shape matching the model - if provider returns a 'raw' fallback, adapt it
     if isinstance(desc, dict) and "title" in desc:
-        return {k: desc.get(k, "") for k in GenerateResponse.__fields__.keys()}
+        out = {k: desc.get(k, "") for k, f in GenerateResponse.model_fields.items() if f.is_required()}
+        return {**out, "_partial": bool(desc.get("_partial")), "_skipped_stages": desc.get("_skipped_stages", []), "_usage": desc.get("_usage"), "_filtered": desc.get("_filtered")}
     # minimal fallback
     return GenerateResponse(
         title=str(desc.get("title", "Auto PR")) if isinstance(desc, dict) else str(desc),
@@ -72,10 +142,45 @@ def generate_pr(req: GenerateRequest):
 
 
 @app.post("/review", response_model=ReviewResponse, summary="Review PR", response_description="AI-assisted code review findings")
-def review_pr(req: ReviewRequest):
+async def review_pr(req: ReviewRequest, response: Response, x_autopr_deadline: Optional[str] = Header(None)):
     """Analyze a diff and return review findings and a confidence score.
 
     The review output includes a brief summary, list of findings, each optionally annotated with a severity, and an overall confidence.
+    With an `X-AutoPR-Deadline` header (seconds), optional stages that do not fit the budget are skipped and
+    listed in `_skipped_stages`, and `_partial` is set.
+    """
+    budget = _deadline_seconds(x_autopr_deadline)
+    if req.head:
+        try:
+            symbols.check_rev(req.head)
+        except RuntimeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid head: {e}")
+    repo = os.getenv("AUTOPR_REPO")
+    async with _admitted(req.diff, response):
+        return await run_in_threadpool(reviewer.review_pr, req.diff, repo=repo if repo and req.head else None, head=req.head, deadline=budget)
+
+
+@app.post("/webhooks/github", status_code=202, summary="GitHub webhook receiver")
+async def github_webhook(request: Request):
+    """Receive GitHub webhook deliveries and schedule debounced PR reviews.
+
+    Deliveries are verified against `GITHUB_WEBHOOK_SECRET`, de-duplicated by
+    `X-GitHub-Delivery`, and `synchronize` bursts collapse into one review of the latest head.
     """
-    out = reviewer.review_pr(req.diff)
-    return out
+    body = await request.body()
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+    allow_unsigned = os.getenv("AUTOPR_WEBHOOK_ALLOW_UNSIGNED") == "1"
+    if not webhooks.verify_signature(secret, body, request.headers.get("X-Hub-Signature-256"), allow_unsigned):
+        detail = "Invalid webhook signature" if secret or allow_unsigned else "Webhook secret is not configured (set GITHUB_WEBHOOK_SECRET)"
+        raise HTTPException(status_code=401, detail=detail)
+    try:
+        event = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body is not valid JSON")
+    return webhooks.handle_event(
+        request.headers.get("X-GitHub-Event", ""),
+        request.headers.get("X-GitHub-Delivery", ""),
+        event,
+        webhooks.scheduler,
+        webhooks.deliveries,
+    )
@@ -6,12 +6,82 @@ commit messages. It's intentionally conservative to keep unit tests deterministi
 from __future__ import annotations
 
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+_HEADER_RE = re.compile(r'^(?:\+\+\+|---)\s+([ab]/)?(.+)$')
+_GIT_HEADER_RE = re.compile(r'^diff --git a/(.+?) b/(.+)$')
+HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def _is_binary_section(lines: List[str]) -> bool:
+    return any(ln.startswith('Binary files ') or ln.startswith('GIT binary patch') for ln in lines)
+
+
+def iter_file_diffs(lines: Iterable[str]) -> Iterator[Tuple[str, List[str]]]:
+    """Split a stream of unified diff lines into per-file sections.
+
+    Yields ``(path, lines)`` one file at a time so callers only ever hold a
+    single file's worth of diff in memory. Hunk bodies are consumed using the
+    line counts from their ``@@`` headers, so content lines that happen to look
+    like headers are not mistaken for a new file. Sections for binary files
+    are skipped. Input without file headers is yielded as one section with an
+    empty path.
+    """
+    path = ''
+    section: List[str] = []
+    in_header = False
+    old_left = new_left = 0
+    for raw in lines:
+        ln = raw.rstrip('\r\n')
+        if old_left > 0 or new_left > 0:
+            if ln.startswith('-'):
+                old_left -= 1
+            elif ln.startswith('+'):
+                new_left -= 1
+            elif not ln.startswith('\\'):
+                old_left -= 1
+                new_left -= 1
+            section.append(ln)
+            continue
+
+        git_header = _GIT_HEADER_RE.match(ln)
+        if git_header or (ln.startswith('--- ') and not in_header):
+            if section and not _is_binary_section(section):
+                yield path, section
+            section = []
+            in_header = True
+            path = git_header.group(2) if git_header else _header_path(ln)
+        elif ln.startswith('+++ '):
+            path = _header_path(ln) or path
+        else:
+            hunk = HUNK_RE.match(ln)
+            if hunk:
+                in_header = False
+                old_left = int(hunk.group(2) or 1)
+                new_left = int(hunk.group(4) or 1)
+        section.append(ln)
+    if section and not _is_binary_section(section):
+        yield path, section
+
+
+def _header_path(line: str) -> str:
+    m = _HEADER_RE.match(line)
+    if not m or m.group(2).strip() == '/dev/null':
+        return ''
+    return m.group(2).strip()
 
 
 def parse_diff(diff_text: str) -> Dict[str, object]:
     """Parse a unified diff or snippet and extract high level info.
 
+    Thin wrapper over :func:`parse_diff_lines`.
+    """
+    return parse_diff_lines(diff_text.splitlines())
+
+
+def parse_diff_lines(lines: Iterable[str]) -> Dict[str, object]:
+    """Parse an iterable of unified diff lines and extract high level info.
+
     Returns a dict with keys:
       - files_changed: list of filenames mentioned in diff headers (if found)
       - added_lines: int
@@ -20,39 +90,38 @@ def parse_diff(diff_text: str) -> Dict[str, object]:
       - added_classes: list of detected class names in added lines
       - summary: short textual summary
     """
-    files = []
+    files: Dict[str, None] = {}  # ordered set
     added = 0
     removed = 0
-    added_code = []
 
-    for line in diff_text.splitlines():
+    # detect simple function/class patterns in added lines as they stream past
+    added_functions = []
+    added_classes = []
+    func_re = re.compile(r'^\s*def\s+([a-zA-Z0-9_]+)\s*\(')
+    cls_re = re.compile(r'^\s*class\s+([A-Za-z0-9_]+)\s*\(?')
+
+    for line in lines:
+        line = line.rstrip('\r\n')
         # diff header line format: '+++ b/path/to/file' or '--- a/path'
-        m = re.match(r'^(?:\+\+\+|---)\s+([ab]/)?(.+)$', line)
+        m = _HEADER_RE.match(line)
         if m:
             fname = m.group(2).strip()
-            files.append(fname)
+            files[fname] = None
             continue
 
         if line.startswith('+') and not line.startswith('+++'):
             added += 1
-            added_code.append(line[1:])
+            ln = line[1:]
+            fm = func_re.match(ln)
+            if fm:
+                added_functions.append(fm.group(1))
+            cm = cls_re.match(ln)
+            if cm:
+                added_classes.append(cm.group(1))
         elif line.startswith('-') and not line.startswith('---'):
             removed += 1
 
-    # detect simple function/class patterns in added_code
-    added_functions = []
-    added_classes = []
-    func_re = re.compile(r'^\s*def\s+([a-zA-Z0-9_]+)\s*\(')
-    cls_re = re.compile(r'^\s*class\s+([A-Za-z0-9_]+)\s*\(?')
-    for ln in added_code:
-        fm = func_re.match(ln)
-        if fm:
-            added_functions.append(fm.group(1))
-        cm = cls_re.match(ln)
-        if cm:
-            added_classes.append(cm.group(1))
-
-    files_changed = list(dict.fromkeys(files))  # dedupe preserving order
+    files_changed = list(files)
 
     summary_parts = []
     if files_changed:
@@ -0,0 +1,130 @@
+"""Keep generated, vendored and lock files out of analysis and LLM prompts.
+
+Paths are matched against include/exclude globs (``[filter]`` in
+``.autopr.toml``) plus a built-in list of common generated artifacts. All
+globs are compiled once into a single regular expression. Excluded files are
+dropped from the diff handed to the analyzers and providers, but callers still
+get their names back so they can be listed in ``files_impacted``.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import config
+from . import tokens
+from .parser import iter_file_diffs
+
+DEFAULT_EXCLUDES = [
+    # lock files
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "go.sum", "composer.lock", "Gemfile.lock", "uv.lock",
+    # vendored dependencies
+    "vendor/**", "node_modules/**", "third_party/**",
+    # minified bundles and build output
+    "*.min.js", "*.min.css", "*.map", "dist/**",
+    # snapshots
+    "__snapshots__/**", "*.snap",
+    # generated code
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.pb.cc", "*.pb.h", "*.generated.*",
+]
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore-style glob into a regex (without anchors).
+
+    ``**`` spans directories, ``*``/``?`` stay within one path segment, and a
+    pattern without a slash matches at any depth.
+    """
+    pattern = pattern.strip().lstrip("/")
+    if pattern.endswith("/"):
+        pattern += "**"
+    anywhere = "/" not in pattern.rstrip("*").rstrip("/") or pattern.startswith("**/")
+    pattern = pattern[3:] if pattern.startswith("**/") else pattern
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        else:
+            out.append(re.escape(c))
+        i += 1
+    body = "".join(out)
+    return f"(?:.*/)?{body}" if anywhere else body
+
+
+def _compile(patterns: Iterable[str]) -> Optional["re.Pattern[str]"]:
+    parts = [f"(?:{glob_to_regex(p)})" for p in patterns if p and p.strip()]
+    if not parts:
+        return None
+    return re.compile("|".join(parts))
+
+
+class PathFilter:
+    """Compiled include/exclude matcher; include wins over exclude."""
+
+    def __init__(self, exclude: Iterable[str] = (), include: Iterable[str] = (), use_defaults: bool = True):
+        excludes = list(DEFAULT_EXCLUDES if use_defaults else []) + list(exclude)
+        self._exclude = _compile(excludes)
+        self._include = _compile(include)
+
+    def excluded(self, path: str) -> bool:
+        if not path or self._exclude is None:
+            return False
+        if self._include is not None and self._include.fullmatch(path):
+            return False
+        return self._exclude.fullmatch(path) is not None
+
+
+_filter_cache: Dict[tuple, PathFilter] = {}
+
+
+def get_filter() -> PathFilter:
+    """Return the filter for the current ``[filter]`` config (compiled once per config)."""
+    section = config.get_section("filter")
+    key = (tuple(section.get("exclude", [])), tuple(section.get("include", [])), bool(section.get("use_defaults", True)))
+    pf = _filter_cache.get(key)
+    if pf is None:
+        _filter_cache.clear()
+        pf = _filter_cache[key] = PathFilter(*key)
+    return pf
+
+
+def filter_diff(diff_text: str, path_filter: Optional[PathFilter] = None) -> Tuple[str, Dict[str, object]]:
+    """Drop excluded file sections from a diff.
+
+    Returns ``(kept_diff, report)`` where report has ``excluded_files``,
+    ``excluded_bytes`` and ``tokens_saved``. Diffs without file headers are
+    returned unchanged.
+    """
+    pf = path_filter or get_filter()
+    kept: List[str] = []
+    excluded_files: List[str] = []
+    excluded_bytes = 0
+    tokens_saved = 0
+    any_excluded = False
+    for path, section in iter_file_diffs(diff_text.splitlines()):
+        if pf.excluded(path):
+            any_excluded = True
+            if path not in excluded_files:
+                excluded_files.append(path)
+            text = "\n".join(section)
+            excluded_bytes += len(text) + 1
+            tokens_saved += tokens.count_tokens(text)
+        else:
+            kept.extend(section)
+    report = {"excluded_files": excluded_files, "excluded_bytes": excluded_bytes, "tokens_saved": tokens_saved}
+    if not any_excluded:
+        return diff_text, report
+    return "\n".join(kept), report
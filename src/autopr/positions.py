@@ -0,0 +1,154 @@
+"""Map findings to real file lines and GitHub diff positions.
+
+``DiffIndex`` holds, per file, the hunks of a unified diff as sorted
+intervals of new-file lines. ``locate(path, line)`` finds the hunk with a
+``bisect`` and returns the GitHub *diff position* of that line: the 1-based
+offset below the file's first ``@@`` header, counting every later header
+and removed line, which is what the pull-request review API expects.
+
+Analyzers look only at the added lines of a file, so their line numbers are
+offsets into that added text; ``added_line(path, k)`` maps the k-th added
+line back to its new-file line number.
+
+``review_payload`` turns located findings into one batched review
+(``POST /repos/{owner}/{repo}/pulls/{number}/reviews``) instead of one API
+call per comment.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional
+
+from .parser import HUNK_RE, iter_file_diffs
+
+
+class FileIndex:
+    """Hunk intervals and added-line mapping for one file of a diff."""
+
+    def __init__(self, path: str, section: List[str]):
+        self.path = path
+        self.starts: List[int] = []  # new-file start line of each hunk (sorted)
+        self.hunks: List[Dict[str, Any]] = []  # {"start", "end", "positions": {new_line: position}}
+        # the k-th line analyzers see (section lines starting with "+" but not "+++")
+        self.added: List[Optional[int]] = []
+        self.added_text_lines: List[str] = []
+        self.new_file = False
+
+        position = 0
+        new_no = 0
+        old_left = new_left = 0
+        current: Optional[Dict[str, Any]] = None
+        for ln in section:
+            if current is not None and (old_left > 0 or new_left > 0):
+                position += 1
+                if ln.startswith("-"):
+                    old_left -= 1
+                elif ln.startswith("+"):
+                    current["positions"][new_no] = position
+                    if not ln.startswith("+++"):
+                        self.added.append(new_no)
+                        self.added_text_lines.append(ln[1:])
+                    new_no += 1
+                    new_left -= 1
+                elif not ln.startswith("\\"):
+                    current["positions"][new_no] = position
+                    new_no += 1
+                    old_left -= 1
+                    new_left -= 1
+                continue
+            if current is None and (ln.startswith("new file mode") or ln.startswith("--- /dev/null")):
+                self.new_file = True
+                continue
+            m = HUNK_RE.match(ln)
+            if m:
+                if current is not None:
+                    position += 1  # later hunk headers take a position too
+                new_no = int(m.group(3))
+                old_left, new_left = int(m.group(2) or 1), int(m.group(4) or 1)
+                current = {"start": new_no, "end": new_no + max(new_left, 1) - 1, "positions": {}}
+                self.hunks.append(current)
+                self.starts.append(new_no)
+            elif ln.startswith("+") and not ln.startswith("+++"):
+                # loose "+" lines outside hunks (snippets): no real line number
+                self.added.append(None)
+                self.added_text_lines.append(ln[1:])
+
+    @property
+    def added_text(self) -> str:
+        return "\n".join(self.added_text_lines)
+
+    def hunk_for(self, line: int) -> Optional[Dict[str, Any]]:
+        i = bisect_right(self.starts, line) - 1
+        if i < 0:
+            return None
+        hunk = self.hunks[i]
+        return hunk if hunk["start"] <= line <= hunk["end"] else None
+
+    def position(self, line: int) -> Optional[int]:
+        hunk = self.hunk_for(line)
+        return hunk["positions"].get(line) if hunk else None
+
+    def added_line(self, k: int) -> Optional[int]:
+        """New-file line of the k-th (1-based) added line, if it lies in a hunk."""
+        if 1 <= k <= len(self.added):
+            return self.added[k - 1]
+        return None
+
+
+class DiffIndex:
+    """Per-file :class:`FileIndex` for a whole diff."""
+
+    def __init__(self, diff_text: str):
+        self.files: Dict[str, FileIndex] = {}
+        for path, section in iter_file_diffs(diff_text.splitlines()):
+            self.files[path] = FileIndex(path, section)
+
+    def locate(self, path: Optional[str], line: Optional[int]) -> Optional[Dict[str, Any]]:
+        """``{"file", "line", "position"}`` when ``line`` is part of the diff of ``path``."""
+        fi = self.files.get(path or "")
+        if fi is None or line is None:
+            return None
+        position = fi.position(int(line))
+        if position is None:
+            return None
+        return {"file": fi.path, "line": int(line), "position": position}
+
+    def added_line(self, path: str, k: int) -> Optional[int]:
+        fi = self.files.get(path)
+        return fi.added_line(k) if fi else None
+
+
+def place(finding: Dict[str, Any], index: DiffIndex) -> Dict[str, Any]:
+    """Attach ``position`` to a finding whose file/line is inside the diff."""
+    loc = index.locate(finding.get("file"), finding.get("line"))
+    if loc:
+        finding["position"] = loc["position"]
+    return finding
+
+
+def comment_body(finding: Dict[str, Any]) -> str:
+    body = f"**{finding.get('type')}** ({finding.get('severity') or 'info'}): {finding.get('message')}"
+    if finding.get("count", 1) > 1 and finding.get("lines"):
+        body += f"\n\nAlso on lines: {', '.join(str(n) for n in finding['lines'][1:])}"
+    return body
+
+
+def review_payload(findings: Iterable[Dict[str, Any]], summary: str, commit_id: Optional[str] = None, event: str = "COMMENT", max_comments: int = 50) -> Dict[str, Any]:
+    """Build one pull-request review: inline comments for positioned findings, the rest in the body."""
+    comments: List[Dict[str, Any]] = []
+    general: List[Dict[str, Any]] = []
+    for f in findings:
+        if f.get("file") and f.get("position") and len(comments) < max_comments:
+            comments.append({"path": f["file"], "position": f["position"], "body": comment_body(f)})
+        else:
+            general.append(f)
+    body = summary.rstrip() + "\n"
+    if general:
+        body += "\n"
+        for f in general:
+            where = f" `{f['file']}:{f['line']}`" if f.get("file") and f.get("line") else (f" `{f['file']}`" if f.get("file") else "")
+            body += f"- {comment_body(f)}{where}\n"
+    payload: Dict[str, Any] = {"body": body, "event": event, "comments": comments}
+    if commit_id:
+        payload["commit_id"] = commit_id
+    return payload
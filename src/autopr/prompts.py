@@ -16,6 +16,21 @@ PR_DESCRIPTION_PROMPT = (
     "Provide only valid JSON (no surrounding markdown).")
 
 REVIEW_PROMPT = (
-    "You are an automated code reviewer. Given a code diff, return a JSON object describing: summary, findings (array of objects with keys: type, message, severity), and confidence (0.0-1.0).\n\n"
+    "You are an automated code reviewer. Given a code diff, return a JSON object describing: summary, findings (array of objects with keys: type, message, severity, and optionally file and line), and confidence (0.0-1.0).\n"
+    "The diff may be in compact form: 'F<n> path' starts a file and each line is prefixed with its line number; cite such locations as file 'F<n>' and that line number.\n\n"
     "Diff:\n{diff}\n\nReturn only valid JSON."
 )
+
+JSON_REPAIR_PROMPT = (
+    "The text below was supposed to be a single JSON object with the keys: {keys}.\n"
+    "Problems found: {errors}\n\n"
+    "Text:\n{reply}\n\n"
+    "Return only the corrected JSON object. Keep the original content; do not add commentary or markdown."
+)
+
+CHANGELOG_PROMPT = (
+    "You are writing release notes. Each group below starts with an id in brackets, its change type and pull request, followed by its commit messages.\n"
+    "For every group write one line of user-facing release notes (max 25 words, no trailing period).\n\n"
+    "Groups:\n{diff}\n\n"
+    "Return only a JSON object mapping each group id to its line, e.g. {{\"g1\": \"...\"}}."
+)
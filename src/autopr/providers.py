@@ -1,8 +1,80 @@
+import contextvars
 import os
 import json
-from typing import Any, Dict
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+import httpx
+
+from . import deadline
 from . import prompts
+from . import scanner
+from . import tokens
+from . import validators
+from .cache import cache_key, shared_cache
+from .extraction import FindingStream, extract_json
+
+# usage reported by the upstream API for the most recent _chat call on this thread
+_reported_usage = threading.local()
+
+
+def _note_reported_usage(resp: Any) -> None:
+    """Remember token counts the API reported, if the response carries any."""
+    u = getattr(resp, "usage", None)
+    if u is None and isinstance(resp, dict):
+        u = resp.get("usage")
+    if u is None:
+        return
+
+    def pick(*names):
+        for n in names:
+            v = u.get(n) if isinstance(u, dict) else getattr(u, n, None)
+            if isinstance(v, int):
+                return v
+        return None
+
+    _reported_usage.value = {
+        "prompt_tokens": pick("prompt_tokens", "input_tokens"),
+        "completion_tokens": pick("completion_tokens", "output_tokens"),
+    }
+
+
+def _iter_sse(response: httpx.Response) -> Iterator[Dict[str, Any]]:
+    """Decode ``data:`` events from a server-sent-events response."""
+    for line in response.iter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def max_findings_setting() -> Optional[int]:
+    from . import config
+
+    value = os.getenv("AUTOPR_MAX_FINDINGS") or config.get_section("llm").get("max_findings")
+    return int(value) if value else None
+
+
+def _merge_reviews(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-chunk review results into one review."""
+    if len(parts) == 1:
+        return parts[0]
+    summaries = [str(p.get("summary") or p.get("raw") or "") for p in parts]
+    findings: List[Any] = []
+    confidences = []
+    for p in parts:
+        findings.extend(p.get("findings", []) if isinstance(p.get("findings"), list) else [])
+        if isinstance(p.get("confidence"), (int, float)):
+            confidences.append(float(p["confidence"]))
+    return {"summary": " ".join(s for s in summaries if s), "findings": findings, "confidence": min(confidences) if confidences else 0.0}
 
 
 class BaseProvider:
@@ -17,8 +89,214 @@ class BaseProvider:
     def review_code(self, diff: str) -> Dict[str, Any]:
         raise NotImplementedError()
 
+    def summarize_changes(self, groups: str) -> Dict[str, str]:
+        """One release-notes line per group id for the text built by ``changelog.format_groups``."""
+        raise NotImplementedError()
+
+    def warm(self) -> Dict[str, Any]:
+        """Prepare clients before serving traffic; returns what was warmed."""
+        return {"provider": type(self).__name__}
+
+
+class ChatProvider(BaseProvider):
+    """Base for providers that talk to a chat/completion API through ``_chat``.
+
+    Every prompt is checked against the token budget before it is sent
+    (see ``tokens.fit_diff``), and prompt/completion tokens are recorded per call.
+    """
+
+    provider_name = "chat"
+    model = ""
+    base_url = ""
+    _http: Optional[httpx.Client] = None
+    _http_pid: Optional[int] = None
+    _http_lock = threading.Lock()
+
+    def _http_client(self) -> httpx.Client:
+        """Pooled HTTP client, re-created after a fork so workers never share sockets."""
+        with self._http_lock:
+            if self._http is None or self._http_pid != os.getpid():
+                self._http = httpx.Client(timeout=60.0)
+                self._http_pid = os.getpid()
+            return self._http
+
+    def warm(self) -> Dict[str, Any]:
+        """Load the tokenizer and open connections on every client the provider calls through.
+
+        ``connected`` is the pooled HTTP client used for streaming; ``sdk_connected``
+        the SDK client used for non-streaming calls, when there is one.
+        """
+        tokens.get_tokenizer(self.model)
+        connected = False
+        if self.base_url:
+            try:
+                self._http_client().head(self.base_url, timeout=5.0)
+                connected = True
+            except httpx.HTTPError:
+                pass
+        out: Dict[str, Any] = {"provider": self.provider_name, "model": self.model, "connected": connected}
+        sdk = self._warm_sdk()
+        if sdk is not None:
+            out["sdk_connected"] = sdk
+        return out
+
+    def _warm_sdk(self) -> Optional[bool]:
+        """Open the SDK client's connection pool; None when ``_chat`` does not use one."""
+        return None
+
+    @staticmethod
+    def _list_models(client: Any) -> Optional[bool]:
+        # listing models is the cheapest authenticated call both SDKs offer
+        models = getattr(client, "models", None)
+        if client is None or not hasattr(models, "list"):
+            return None
+        try:
+            models.list(timeout=5.0)
+            return True
+        except Exception:
+            return False
+
+    def _chat(self, prompt: str) -> str:
+        raise NotImplementedError()
+
+    def _chat_stream(self, prompt: str) -> Iterator[str]:
+        """Yield the completion in chunks; without a streaming API it is one chunk."""
+        yield self._chat(prompt)
+
+    def review_code_streaming(self, diff: str, max_findings: Optional[int] = None, on_finding: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Review while the completion streams in, stopping as early as possible.
+
+        Findings are parsed as each JSON object completes and handed to
+        ``on_finding``. Reading stops (closing the upstream connection) once the
+        top-level object is closed or ``max_findings`` findings have arrived.
+        """
+        fitted = tokens.fit_diff(prompts.REVIEW_PROMPT, diff, model=self.model, strategy="truncate")
+        prompt = fitted["prompts"][0]
+        parser = FindingStream()
+        stopped_early = out_of_time = False
+        _reported_usage.value = None
+        stream = self._chat_stream(prompt)
+        try:
+            for chunk in stream:
+                for finding in parser.feed(chunk or ""):
+                    if on_finding is not None:
+                        on_finding(finding)
+                if parser.closed:
+                    break
+                if max_findings and len(parser.findings) >= max_findings:
+                    stopped_early = True
+                    break
+                if deadline.expired():
+                    # out of time: keep the findings that already arrived
+                    stopped_early = out_of_time = True
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        reported = getattr(_reported_usage, "value", None) or {}
+        prompt_tokens = reported.get("prompt_tokens") or fitted["prompt_tokens"][0]
+        completion_tokens = tokens.count_tokens(parser.buffer, self.model)
+        tokens.usage.record(f"{self.provider_name}:{self.model}", prompt_tokens, completion_tokens)
+        meta = {"calls": 1, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "truncated": fitted["truncated"], "chunks": 1}
+        if out_of_time:
+            meta["partial"] = True
+
+        if parser.result() is None and not stopped_early:
+            out = self._structured(parser.buffer, "review", meta)
+        else:
+            out = parser.result() or {}
+            out["findings"] = parser.findings[:max_findings] if max_findings else out.get("findings", parser.findings)
+            out.setdefault("summary", "")
+            out.setdefault("confidence", 0.0)
+        out["_usage"] = meta
+        out["_stream"] = {"stopped_early": stopped_early, "completed": parser.closed, "findings": len(parser.findings)}
+        return out
+
+    def _complete(self, template: str, diff: str, strategy: str | None = None, **fmt: Any) -> Tuple[List[str], Dict[str, Any]]:
+        fitted = tokens.fit_diff(template, diff, model=self.model, strategy=strategy, **fmt)
+        replies: List[str] = []
+        meta = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "truncated": fitted["truncated"], "chunks": len(fitted["prompts"])}
+        cache = shared_cache()
+        for prompt, estimated in zip(fitted["prompts"], fitted["prompt_tokens"]):
+            if replies and deadline.expired():
+                # answer from the chunks done so far rather than not at all
+                meta["partial"] = True
+                break
+            deadline.check("llm")
+
+            def call(prompt: str = prompt, estimated: int = estimated) -> str:
+                _reported_usage.value = None
+                text = self._chat(prompt)
+                reported = getattr(_reported_usage, "value", None) or {}
+                prompt_tokens = reported.get("prompt_tokens") or estimated
+                completion_tokens = reported.get("completion_tokens") or tokens.count_tokens(text or "", self.model)
+                tokens.usage.record(f"{self.provider_name}:{self.model}", prompt_tokens, completion_tokens)
+                meta["calls"] += 1
+                meta["prompt_tokens"] += prompt_tokens
+                meta["completion_tokens"] += completion_tokens
+                return text
+
+            if cache is None:
+                replies.append(call())
+                continue
+            # identical prompts (retries, redeliveries, other workers) are answered once
+            calls_before = meta["calls"]
+            replies.append(cache.get_or_set(cache_key(self.provider_name, self.model, prompt), call))
+            if meta["calls"] == calls_before:
+                meta["cached"] = meta.get("cached", 0) + 1
+        return replies, meta
+
+    def _structured(self, text: str, kind: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract and validate a JSON reply, spending at most one small repair call.
+
+        The repair prompt carries only the broken reply, never the diff, so a
+        malformed answer costs a short round-trip instead of a full re-generation.
+        """
+        validate = validators.validate_review_output if kind == "review" else validators.validate_generate_output
+        keys = "summary, findings, confidence" if kind == "review" else "title, what_changed, why, files_impacted, tests, risk_level, rollback_plan"
+        obj = extract_json(text)
+        errors = ["no JSON object found"] if obj is None else validate(obj)["errors"]
+        if not errors:
+            return obj
+        try:
+            replies, repair_meta = self._complete(prompts.JSON_REPAIR_PROMPT, text or "", strategy="truncate", field="reply", keys=keys, errors="; ".join(errors))
+        except Exception:
+            replies, repair_meta = [], {}
+        for k in ("calls", "prompt_tokens", "completion_tokens"):
+            meta[k] = meta.get(k, 0) + repair_meta.get(k, 0)
+        meta["repairs"] = meta.get("repairs", 0) + 1
+        repaired = extract_json(replies[0]) if replies else None
+        if repaired is not None and not validate(repaired)["errors"]:
+            return repaired
+        return obj if obj is not None else {"raw": text}
+
+    def generate_pr_title(self, diff: str, commits: list[str], issue: str | None) -> str:
+        replies, _ = self._complete(prompts.TITLE_PROMPT, diff, strategy="truncate", commits="\n".join(commits), issue=issue or "")
+        return replies[0].strip()
+
+    def generate_pr_description(self, diff: str, commits: list[str], issue: str | None) -> Dict[str, Any]:
+        replies, meta = self._complete(prompts.PR_DESCRIPTION_PROMPT, diff, strategy="truncate", commits="\n".join(commits), issue=issue or "")
+        out = self._structured(replies[0], "description", meta)
+        out["_usage"] = meta
+        return out
+
+    def review_code(self, diff: str) -> Dict[str, Any]:
+        replies, meta = self._complete(prompts.REVIEW_PROMPT, diff)
+        out = _merge_reviews([self._structured(text, "review", meta) for text in replies])
+        out["_usage"] = meta
+        return out
+
+    def summarize_changes(self, groups: str) -> Dict[str, str]:
+        replies, _ = self._complete(prompts.CHANGELOG_PROMPT, groups, strategy="truncate")
+        obj = extract_json(replies[0]) or {}
+        return {str(k): v.strip() for k, v in obj.items() if isinstance(v, str) and v.strip()}
+
+
+class OpenAIProvider(ChatProvider):
+    provider_name = "openai"
 
-class OpenAIProvider(BaseProvider):
     def __init__(self, api_key: str | None = None, model: str | None = None):
         # lazy import so module import doesn't fail in tests without package
         import openai
@@ -27,58 +305,91 @@ class OpenAIProvider(BaseProvider):
         api_key = api_key or os.getenv("OPENAI_API_KEY")
         if api_key:
             self._openai.api_key = api_key
+        self.api_key = api_key
         self.model = model or os.getenv("OPENAI_MODEL", "gpt-4o")
+        self.base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+        # openai>=1.0 exposes a client class; it honours base_url (e.g. the fake LLM server)
+        self._client = openai.OpenAI(api_key=api_key, base_url=self.base_url) if hasattr(openai, "OpenAI") and api_key else None
+
+    def _warm_sdk(self) -> Optional[bool]:
+        return self._list_models(self._client)
 
     def _chat(self, prompt: str) -> str:
+        if self._client is not None:
+            resp = self._client.chat.completions.create(model=self.model, messages=[{"role": "user", "content": prompt}], temperature=0.2, timeout=deadline.timeout(60.0))
+            _note_reported_usage(resp)
+            return resp.choices[0].message.content
         client = self._openai
         # Prefer ChatCompletion style but fall back to Completion if not available
         if hasattr(client, "ChatCompletion"):
             resp = client.ChatCompletion.create(model=self.model, messages=[{"role": "user", "content": prompt}], temperature=0.2)
+            _note_reported_usage(resp)
             content = resp.choices[0].message.content
             return content
         # fallback
         resp = client.Completion.create(model=self.model, prompt=prompt, max_tokens=800, temperature=0.2)
+        _note_reported_usage(resp)
         return resp.choices[0].text
 
-    def generate_pr_title(self, diff: str, commits: list[str], issue: str | None) -> str:
-        prompt = prompts.TITLE_PROMPT.format(diff=diff, commits="\n".join(commits), issue=issue or "")
-        return self._chat(prompt).strip()
-
-    def generate_pr_description(self, diff: str, commits: list[str], issue: str | None) -> Dict[str, Any]:
-        prompt = prompts.PR_DESCRIPTION_PROMPT.format(diff=diff, commits="\n".join(commits), issue=issue or "")
-        text = self._chat(prompt)
-        try:
-            return json.loads(text)
-        except Exception:
-            return {"raw": text}
+    def _chat_stream(self, prompt: str) -> Iterator[str]:
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        with self._http_client().stream("POST", f"{self.base_url}/chat/completions", json=body, headers=headers, timeout=deadline.timeout(60.0)) as resp:
+            resp.raise_for_status()
+            for event in _iter_sse(resp):
+                if event.get("usage"):
+                    _note_reported_usage(event)
+                for choice in event.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
 
-    def review_code(self, diff: str) -> Dict[str, Any]:
-        prompt = prompts.REVIEW_PROMPT.format(diff=diff)
-        text = self._chat(prompt)
-        try:
-            return json.loads(text)
-        except Exception:
-            return {"raw": text}
 
+class AnthropicProvider(ChatProvider):
+    provider_name = "anthropic"
 
-class AnthropicProvider(BaseProvider):
     def __init__(self, api_key: str | None = None, model: str | None = None):
         # lazy import
         import anthropic
 
         self._anthropic = anthropic
         api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-        self.client = anthropic.Client(api_key=api_key) if api_key else None
+        base_url = os.getenv("ANTHROPIC_BASE_URL")
+        self.client = None
+        if api_key:
+            try:
+                self.client = anthropic.Client(api_key=api_key, **({"base_url": base_url} if base_url else {}))
+            except TypeError:
+                # older SDKs don't take base_url; streaming still honours it below
+                self.client = anthropic.Client(api_key=api_key)
+        self.api_key = api_key
         self.model = model or os.getenv("ANTHROPIC_MODEL", "claude-2")
+        self.base_url = (base_url or "https://api.anthropic.com").rstrip("/")
+
+    def _warm_sdk(self) -> Optional[bool]:
+        return self._list_models(self.client)
 
     def _chat(self, prompt: str) -> str:
         # anthopic clients vary across versions; support a couple of shapes
         if self.client is None:
             raise RuntimeError("Anthropic client is not configured (missing ANTHROPIC_API_KEY)")
 
+        # current SDKs: Messages API
+        if hasattr(self.client, "messages") and hasattr(self.client.messages, "create"):
+            resp = self.client.messages.create(model=self.model, max_tokens=1024, messages=[{"role": "user", "content": prompt}], timeout=deadline.timeout(60.0))
+            _note_reported_usage(resp)
+            return "".join(getattr(block, "text", "") for block in (resp.content or []))
+
         # Try a chat-like method
         if hasattr(self.client, "create_chat_completion"):
             resp = self.client.create_chat_completion(model=self.model, messages=[{"role": "user", "content": prompt}])
+            _note_reported_usage(resp)
             # try to extract content
             if hasattr(resp, "content"):
                 return resp.content
@@ -87,6 +398,7 @@ class AnthropicProvider(BaseProvider):
         # fallback to classic complete/complete method
         if hasattr(self.client, "complete"):
             resp = self.client.complete(prompt=prompt, model=self.model, max_tokens=800)
+            _note_reported_usage(resp)
             if hasattr(resp, "completion"):
                 return resp.completion
             return resp["completion"] if isinstance(resp, dict) and "completion" in resp else str(resp)
@@ -94,6 +406,7 @@ class AnthropicProvider(BaseProvider):
         # final fallback: attempt to call .create
         if hasattr(self.client, "create"):
             resp = self.client.create(model=self.model, prompt=prompt)
+            _note_reported_usage(resp)
             # resp might be a dict
             if isinstance(resp, dict) and "completion" in resp:
                 return resp["completion"]
@@ -101,25 +414,26 @@ class AnthropicProvider(BaseProvider):
 
         raise RuntimeError("Unsupported Anthropic client interface")
 
-    def generate_pr_title(self, diff: str, commits: list[str], issue: str | None) -> str:
-        prompt = prompts.TITLE_PROMPT.format(diff=diff, commits="\n".join(commits), issue=issue or "")
-        return self._chat(prompt).strip()
-
-    def generate_pr_description(self, diff: str, commits: list[str], issue: str | None) -> Dict[str, Any]:
-        prompt = prompts.PR_DESCRIPTION_PROMPT.format(diff=diff, commits="\n".join(commits), issue=issue or "")
-        text = self._chat(prompt)
-        try:
-            return json.loads(text)
-        except Exception:
-            return {"raw": text}
-
-    def review_code(self, diff: str) -> Dict[str, Any]:
-        prompt = prompts.REVIEW_PROMPT.format(diff=diff)
-        text = self._chat(prompt)
-        try:
-            return json.loads(text)
-        except Exception:
-            return {"raw": text}
+    def _chat_stream(self, prompt: str) -> Iterator[str]:
+        if not self.api_key:
+            raise RuntimeError("Anthropic client is not configured (missing ANTHROPIC_API_KEY)")
+        body = {"model": self.model, "max_tokens": 1024, "messages": [{"role": "user", "content": prompt}], "stream": True}
+        headers = {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"}
+        usage: Dict[str, int] = {}
+        with self._http_client().stream("POST", f"{self.base_url}/v1/messages", json=body, headers=headers, timeout=deadline.timeout(60.0)) as resp:
+            resp.raise_for_status()
+            for event in _iter_sse(resp):
+                kind = event.get("type")
+                if kind == "message_start":
+                    usage.update((event.get("message") or {}).get("usage") or {})
+                    _note_reported_usage({"usage": usage})
+                elif kind == "message_delta":
+                    usage.update(event.get("usage") or {})
+                    _note_reported_usage({"usage": usage})
+                elif kind == "content_block_delta":
+                    text = (event.get("delta") or {}).get("text")
+                    if text:
+                        yield text
 
 
 class StubProvider(BaseProvider):
@@ -143,10 +457,215 @@ class StubProvider(BaseProvider):
         }
 
     def review_code(self, diff: str) -> Dict[str, Any]:
+        hits = {f["type"] for f in scanner.default_scanner().scan_text(diff, groups=("hygiene",))}
         findings = []
-        if "TODO" in diff:
+        if "todo" in hits:
             findings.append({"type": "todo", "message": "Found TODOs in changes", "severity": "low"})
-        if "print(" in diff:
+        if "debug_print" in hits:
             findings.append({"type": "debug", "message": "Possible debug prints detected", "severity": "low"})
 
         return {"summary": "Minimal automated review", "findings": findings, "confidence": 0.65}
+
+    def summarize_changes(self, groups: str) -> Dict[str, str]:
+        # offline: the group's commit subjects, shortened
+        out: Dict[str, str] = {}
+        gid = None
+        for line in groups.splitlines():
+            if line.startswith("[") and "]" in line:
+                gid = line[1:line.index("]")]
+                out[gid] = ""
+            elif gid is not None and line.startswith("- "):
+                out[gid] = f"{out[gid]}; {line[2:]}" if out[gid] else line[2:]
+        return {k: v if len(v) <= 200 else v[:197] + "..." for k, v in out.items()}
+
+
+class CircuitBreaker:
+    """Per-provider breaker: opens after consecutive failures, half-opens after a cool-down.
+
+    Half-open lets exactly one probe call through; until it succeeds or fails
+    every other caller sees the breaker as open. A probe that never reports
+    back is given up on after another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _state(self, now: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at < self.reset_timeout:
+            return "open"
+        if self.probe_started is not None and now - self.probe_started < self.reset_timeout:
+            return "open"  # a probe is in flight
+        return "half_open"
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go through; in half-open this claims the single probe."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "half_open":
+                self.probe_started = now
+            return state != "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.probe_started = None
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                # a failed half-open probe re-opens the breaker for another cool-down
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            data = sorted(self._samples)
+        if len(data) < 5:
+            return None
+        idx = min(len(data) - 1, int(round(pct / 100.0 * (len(data) - 1))))
+        return data[idx]
+
+
+class FailoverProvider(BaseProvider):
+    """Ordered provider chain with circuit breakers and hedged requests.
+
+    Calls go to the first provider whose breaker is closed. If it has not
+    answered within its observed p95 latency (``hedge_delay`` until enough
+    samples exist), the next provider is fired as well and whichever succeeds
+    first wins. Failures move on to the next provider immediately.
+    """
+
+    def __init__(self, providers: List[BaseProvider], hedge: bool = True, hedge_delay: float = 2.0, min_hedge_delay: float = 0.05,
+                 breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker, max_workers: int = 16):
+        if not providers:
+            raise ValueError("FailoverProvider needs at least one provider")
+        self.providers = list(providers)
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.breakers = [breaker_factory() for _ in self.providers]
+        self.latency = [LatencyTracker() for _ in self.providers]
+        self.stats = {"calls": 0, "hedges": 0, "failovers": 0, "wins": [0] * len(self.providers)}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="autopr-provider")
+
+    @property
+    def model(self) -> str:
+        return getattr(self.providers[0], "model", "")
+
+    def _delay_for(self, idx: int) -> float:
+        p95 = self.latency[idx].percentile(95)
+        return max(self.min_hedge_delay, p95 if p95 is not None else self.hedge_delay)
+
+    def _timed(self, idx: int, method: str, args: tuple, kwargs: dict) -> Any:
+        start = time.monotonic()
+        try:
+            out = getattr(self.providers[idx], method)(*args, **kwargs)
+        except Exception:
+            self.breakers[idx].record_failure()
+            raise
+        self.breakers[idx].record_success()
+        self.latency[idx].add(time.monotonic() - start)
+        return out
+
+    def _call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        self.stats["calls"] += 1
+        # breakers are only asked to allow a call when it is launched, so a half-open
+        # provider's probe is claimed by a call that actually reaches it
+        order = [i for i, p in enumerate(self.providers) if hasattr(p, method) and self.breakers[i].state != "open"]
+        forced = not order
+        if forced:
+            # every breaker is open: try the chain anyway rather than failing outright
+            order = [i for i, p in enumerate(self.providers) if hasattr(p, method)]
+        if not order:
+            raise NotImplementedError(f"No provider in the chain implements {method}")
+        pending: Dict[Future, int] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> bool:
+            while order:
+                idx = order.pop(0)
+                if forced or self.breakers[idx].allow():
+                    break
+            else:
+                return False
+            # workers see the caller's deadline
+            pending[self._pool.submit(contextvars.copy_context().run, self._timed, idx, method, args, kwargs)] = idx
+            return True
+
+        if not launch():
+            raise RuntimeError(f"No provider available for {method}: every circuit breaker is open")
+        while pending:
+            timeout = None
+            if self.hedge and order and len(pending) == 1:
+                timeout = self._delay_for(next(iter(pending.values())))
+            left = deadline.remaining()
+            if left is not None:
+                timeout = left if timeout is None else min(timeout, left)
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done and deadline.expired():
+                raise deadline.DeadlineExceeded(method)
+            if not done:
+                self.stats["hedges"] += 1
+                launch()
+                continue
+            for fut in done:
+                idx = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    last_error = e
+                    self.stats["failovers"] += 1
+                    if not pending:
+                        launch()
+                    continue
+                self.stats["wins"][idx] += 1
+                return result
+        raise RuntimeError(f"All providers failed: {last_error}") from last_error
+
+    def generate_pr_title(self, diff: str, commits: list[str], issue: str | None) -> str:
+        return self._call("generate_pr_title", diff, commits, issue)
+
+    def generate_pr_description(self, diff: str, commits: list[str], issue: str | None) -> Dict[str, Any]:
+        return self._call("generate_pr_description", diff, commits, issue)
+
+    def review_code(self, diff: str) -> Dict[str, Any]:
+        return self._call("review_code", diff)
+
+    def review_code_streaming(self, diff: str, max_findings: Optional[int] = None, on_finding: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        return self._call("review_code_streaming", diff, max_findings, on_finding)
+
+    def summarize_changes(self, groups: str) -> Dict[str, str]:
+        return self._call("summarize_changes", groups)
+
+    def _complete(self, template: str, diff: str, strategy: str | None = None, **fmt: Any) -> Tuple[List[str], Dict[str, Any]]:
+        return self._call("_complete", template, diff, strategy, **fmt)
+
+    def warm(self) -> Dict[str, Any]:
+        return {"provider": "failover", "chain": [p.warm() for p in self.providers if hasattr(p, "warm")]}
@@ -0,0 +1,121 @@
+"""Keep one AutoPR summary comment per pull request and edit it in place.
+
+The comment body starts with a hidden marker and the sha256 of the rendered
+Markdown::
+
+    <!-- autopr:summary -->
+    <!-- autopr:sha256=<hex> -->
+
+:func:`publish` remembers ``{comment id, hash}`` per PR in the client's ETag
+store (the shared disk cache when configured, else an in-memory LRU). A re-run
+whose rendered body hashes the same makes no API call at all. Without that
+state the existing comment is found by its marker, stopping at the first
+match, and its embedded hash is compared instead. Only a changed body is sent,
+as a ``PATCH`` of the existing comment. A new comment is created only when
+none exists, or when the remembered one was deleted.
+
+:func:`publish_review` applies the same check to the inline comments of a
+batched review. A review whose comments were already posted for this PR is
+not posted again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from .github import GitHubClient, GitHubError
+
+MARKER = "<!-- autopr:summary -->"
+_HASH_RE = re.compile(r"<!-- autopr:sha256=([0-9a-f]{64}) -->")
+
+stats: Dict[str, int] = {"created": 0, "updated": 0, "unchanged": 0, "reviews_posted": 0, "reviews_skipped": 0}
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def stamp(body: str, digest: str, marker: str = MARKER) -> str:
+    """The comment text actually sent: marker, hash, then the rendered body."""
+    return f"{marker}\n<!-- autopr:sha256={digest} -->\n{body}"
+
+
+def stamped_hash(text: str) -> Optional[str]:
+    m = _HASH_RE.search(text or "")
+    return m.group(1) if m else None
+
+
+def find_comment(client: GitHubClient, repo: str, number: int, marker: str = MARKER) -> Optional[Dict[str, Any]]:
+    """First issue comment carrying ``marker``; later pages are never fetched once found."""
+    for comment in client.issue_comments(repo, number):
+        if marker in (comment.get("body") or ""):
+            return comment
+    return None
+
+
+def _state_key(client: GitHubClient, kind: str, repo: str, number: int, marker: str = "") -> str:
+    return f"autopr-{kind}:{client.base_url}:{repo}:{number}:{marker}"
+
+
+def publish(client: GitHubClient, repo: str, number: int, body: str, marker: str = MARKER) -> Dict[str, Any]:
+    """Create or edit the PR's summary comment so it shows ``body``.
+
+    Returns ``{"action": "created"|"updated"|"unchanged", "comment_id": ..., "hash": ...}``.
+    """
+    digest = content_hash(body)
+    key = _state_key(client, "comment", repo, number, marker)
+    known = client.etags.get(key) or {}
+    comment_id = known.get("id")
+    action = "unchanged"
+    if comment_id is not None and known.get("hash") == digest:
+        stats[action] += 1
+        return {"action": action, "comment_id": comment_id, "hash": digest}
+
+    if comment_id is None:
+        existing = find_comment(client, repo, number, marker)
+        if existing is not None:
+            comment_id = existing["id"]
+            if stamped_hash(existing.get("body", "")) == digest:
+                client.etags.set(key, {"id": comment_id, "hash": digest})
+                stats[action] += 1
+                return {"action": action, "comment_id": comment_id, "hash": digest}
+
+    text = stamp(body, digest, marker)
+    if comment_id is not None:
+        try:
+            client.update_issue_comment(repo, comment_id, text)
+            action = "updated"
+        except GitHubError as e:
+            if e.status != 404:
+                raise
+            comment_id = None  # deleted since we last saw it
+    if comment_id is None:
+        comment_id = client.create_issue_comment(repo, number, text)["id"]
+        action = "created"
+    client.etags.set(key, {"id": comment_id, "hash": digest})
+    stats[action] += 1
+    return {"action": action, "comment_id": comment_id, "hash": digest}
+
+
+def _comments_hash(comments: Iterable[Dict[str, Any]]) -> str:
+    # positions shift between pushes; the same finding on the same file is the same comment
+    keyed = sorted((c.get("path", ""), c.get("body", "")) for c in comments)
+    return content_hash(json.dumps(keyed))
+
+
+def publish_review(client: GitHubClient, repo: str, number: int, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Post ``payload`` as a review unless it has no inline comments or they were already posted."""
+    comments = payload.get("comments") or []
+    if not comments:
+        return None
+    digest = _comments_hash(comments)
+    key = _state_key(client, "review", repo, number)
+    if (client.etags.get(key) or {}).get("hash") == digest:
+        stats["reviews_skipped"] += 1
+        return None
+    out = client.create_review(repo, number, payload)
+    client.etags.set(key, {"id": out.get("id"), "hash": digest})
+    stats["reviews_posted"] += 1
+    return out
@@ -0,0 +1,76 @@
+"""Render a review (and optional generated PR) as the Markdown of a PR comment.
+
+The output is deterministic for a given input, so the publisher can hash it
+and skip edits that would not change anything.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+TITLE = "# AutoPR — Review Summary"
+FOOTER = "*This comment was generated automatically by AutoPR.*"
+
+
+def render_markdown(js: Dict[str, Any], title: str = TITLE) -> str:
+    """Markdown for ``{"pr": {...}, "review": {...}}`` as produced by the review runner."""
+    md: List[str] = [title, ""]
+
+    pr = js.get("pr") or {}
+    review = js.get("review") or {}
+
+    if pr:
+        md.append("## 📝 Generated PR")
+        md.append(f"**Title:** {pr.get('title', '')}\n")
+        md.append("<details><summary>Generated PR description</summary>\n")
+        if pr.get("what_changed"):
+            md.append(f"**What changed:** {pr.get('what_changed')}\n")
+        if pr.get("why"):
+            md.append(f"**Why:** {pr.get('why')}\n")
+        if pr.get("files_impacted"):
+            md.append(f"**Files:** {', '.join(pr.get('files_impacted'))}\n")
+        if pr.get("tests"):
+            md.append(f"**Tests:** {pr.get('tests')}\n")
+        if pr.get("risk_level"):
+            md.append(f"**Risk level:** {pr.get('risk_level')}\n")
+        if pr.get("rollback_plan"):
+            md.append(f"**Rollback:** {pr.get('rollback_plan')}\n")
+        md.append("</details>\n")
+
+    if review:
+        md.append("## ✅ AI Review Summary")
+        if review.get("summary"):
+            md.append(review.get("summary"))
+
+        if review.get("findings"):
+            md.append("\n### Findings")
+            for f in review["findings"][:25]:
+                md.append(f"- **{f.get('type', 'unknown')}** ({f.get('severity') or 'info'}): {f.get('message')}")
+
+    if review.get("_tests"):
+        t = review["_tests"]
+        md.append("\n## 🧪 Tests")
+        md.append(f"Passed: {t.get('passed')} • Failed: {t.get('failed')} • Errors: {t.get('errors')} • Skipped: {t.get('skipped')}")
+
+    if review.get("_coverage"):
+        c = review["_coverage"]
+        md.append("\n## 📊 Coverage")
+        md.append(f"Before: {c.get('before')}% • After: {c.get('after')}% • Δ: {c.get('delta')}%")
+
+    if review.get("_issue_alignment"):
+        ia = review["_issue_alignment"]
+        md.append("\n## 🎯 Issue alignment")
+        md.append(f"Score: {ia.get('score')} • Matched: {', '.join(ia.get('matched', []))}")
+
+    if review.get("_filtered"):
+        fl = review["_filtered"]
+        md.append("\n## 🧹 Filtered files")
+        md.append(f"Skipped {len(fl.get('excluded_files', []))} generated/vendored/lock file(s), saving ~{fl.get('tokens_saved')} prompt tokens")
+
+    files_changed = (pr.get("_context") or {}).get("files_changed") or []
+    if files_changed:
+        md.append("\n## 🗂️ Files changed")
+        md.extend(f"- {path}" for path in files_changed)
+
+    md.append("\n---")
+    md.append(FOOTER)
+    return "\n".join(md)
@@ -0,0 +1,270 @@
+"""Repository-wide definition/reference index for cross-file review checks.
+
+For every Python file at a revision the index stores its blob SHA, top-level
+definitions, the modules it imports and the names it references with their
+lines: ``from x import name``, bare ``name()`` calls and ``module.name()``
+calls through an imported module (``obj.name()`` could be any method). Two dictionaries are derived on load, ``definitions``
+(name -> files) and ``references`` (name -> {file: lines}), so looking up who
+still uses a name is a single dict access.
+
+The index is persisted in ``<git-dir>/autopr/index.json`` and brought up to
+date incrementally: ``git ls-tree`` lists the blob SHAs at the new revision,
+and only files whose SHA changed are summarized again (through the per-blob
+cache in :mod:`autopr.symbols`, so a blob seen in any earlier run is free).
+Cold builds (``pr-ai index``) read blobs in batches and parse them in a
+process pool started with ``forkserver``, never by forking a threaded API
+process. The review path parses in-process, and the file is only rewritten
+when the update changed something.
+
+``dangling_references`` uses the index to find definitions a diff removes
+that are no longer defined anywhere but are still referenced.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import symbols
+from .parser import iter_file_diffs
+
+INDEX_VERSION = 3
+# below this many files to parse, a process pool costs more than it saves
+PARALLEL_MIN_FILES = 200
+BATCH_SIZE = 500
+
+# top-level definitions only (column 0): a removed method says nothing about module-level names
+_DEF_RE = re.compile(r"^-(?:async\s+)?(?:def|class)\s+([A-Za-z_][A-Za-z0-9_]*)")
+_ADDED_DEF_RE = re.compile(r"^\+(?:async\s+)?(?:def|class)\s+([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def _entry(blob: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+    refs: Dict[str, List[int]] = {}
+    for name, line in summary.get("refs", []):
+        refs.setdefault(name, []).append(line)
+    defs = [[name, line, kind] for name, line, kind in summary.get("defs", []) if kind != "method"]
+    imports = sorted({full.lstrip(".") for _, _, full in summary.get("imports", [])})
+    return {"blob": blob, "defs": defs, "refs": {name: sorted(set(lines)) for name, lines in refs.items()}, "imports": imports}
+
+
+def _summarize_batch(items: List[Tuple[str, str]]) -> List[Tuple[str, Dict[str, Any]]]:
+    return [(sha, symbols.summarize(text)) for sha, text in items]
+
+
+class RepoIndex:
+    def __init__(self, files: Optional[Dict[str, Dict[str, Any]]] = None, rev: Optional[str] = None):
+        self.files: Dict[str, Dict[str, Any]] = files or {}
+        self.rev = rev
+        self.stats = {"files": 0, "updated": 0, "removed": 0, "parsed": 0}
+        self._derive()
+
+    def _derive(self) -> None:
+        self._importers: Optional[Dict[str, Set[str]]] = None
+        self.definitions: Dict[str, Set[str]] = {}
+        self.references: Dict[str, Dict[str, List[int]]] = {}
+        for path, entry in self.files.items():
+            for name, _, _ in entry["defs"]:
+                self.definitions.setdefault(name, set()).add(path)
+            for name, lines in entry["refs"].items():
+                self.references.setdefault(name, {})[path] = lines
+        self.stats["files"] = len(self.files)
+
+    # -- queries ---------------------------------------------------------
+
+    def defined_in(self, name: str) -> Set[str]:
+        return self.definitions.get(name, set())
+
+    def call_sites(self, name: str, exclude: Iterable[str] = ()) -> List[Tuple[str, int]]:
+        skip = set(exclude)
+        return [(path, line) for path, lines in sorted(self.references.get(name, {}).items()) if path not in skip for line in lines]
+
+    def _module_paths(self) -> Dict[str, List[str]]:
+        """Every dotted suffix of every file's module name -> paths (``a/b/c.py`` gives c, b.c, a.b.c)."""
+        out: Dict[str, List[str]] = {}
+        for path in self.files:
+            parts = path[:-3].split("/")
+            if parts[-1] == "__init__":
+                parts.pop()
+            for i in range(len(parts)):
+                out.setdefault(".".join(parts[i:]), []).append(path)
+        return out
+
+    def _resolve(self, modules: Dict[str, List[str]], importer: str, name: str) -> List[str]:
+        parts = name.split(".")
+        while parts:
+            paths = modules.get(".".join(parts))
+            if paths:
+                if len(paths) > 1:
+                    # ambiguous (relative imports lose their package): prefer the importer's directory
+                    near = [p for p in paths if os.path.dirname(p) == os.path.dirname(importer)]
+                    paths = near or paths
+                return paths
+            parts.pop()
+        return []
+
+    def importers(self) -> Dict[str, Set[str]]:
+        """Reverse import graph: path -> files that import it directly (built once per index)."""
+        if self._importers is None:
+            modules = self._module_paths()
+            graph: Dict[str, Set[str]] = {}
+            for path, entry in self.files.items():
+                for name in entry.get("imports", []):
+                    for target in self._resolve(modules, path, name):
+                        if target != path:
+                            graph.setdefault(target, set()).add(path)
+            self._importers = graph
+        return self._importers
+
+    def dependents(self, paths: Iterable[str]) -> Set[str]:
+        """Files that import any of ``paths``, directly or transitively."""
+        graph = self.importers()
+        seen: Set[str] = set()
+        stack = list(paths)
+        while stack:
+            for dep in graph.get(stack.pop(), ()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    # -- building --------------------------------------------------------
+
+    def update(self, repo: str, rev: str = "HEAD", workers: Optional[int] = None) -> Dict[str, int]:
+        """Bring the index to ``rev``, re-summarizing only files whose blob changed."""
+        current = _python_blobs(repo, rev)
+        removed = [p for p in self.files if p not in current]
+        changed = {p: sha for p, sha in current.items() if self.files.get(p, {}).get("blob") != sha}
+        for p in removed:
+            del self.files[p]
+
+        cache = symbols.symbol_cache()
+        summaries: Dict[str, Dict[str, Any]] = {}
+        misses: List[str] = []
+        for sha in dict.fromkeys(changed.values()):
+            cached = cache.get(symbols._key(sha))
+            if cached is not None:
+                summaries[sha] = cached
+            else:
+                misses.append(sha)
+        self.stats["parsed"] = len(misses)
+        for sha, summary in _summarize_blobs(repo, misses, workers):
+            cache.set(symbols._key(sha), summary)
+            summaries[sha] = summary
+        for path, sha in changed.items():
+            if sha in summaries:
+                self.files[path] = _entry(sha, summaries[sha])
+        self.rev = rev
+        self.stats.update(updated=len(changed), removed=len(removed))
+        self._derive()
+        return dict(self.stats)
+
+    # -- persistence -----------------------------------------------------
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".index-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "rev": self.rev, "files": self.files}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RepoIndex":
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get("version") != INDEX_VERSION:
+            return cls()
+        return cls(data.get("files") or {}, data.get("rev"))
+
+
+def _python_blobs(repo: str, rev: str) -> Dict[str, str]:
+    raw = symbols._git(repo, "ls-tree", "-r", "-z", symbols.check_rev(rev))
+    out: Dict[str, str] = {}
+    for entry in raw.split(b"\0"):
+        meta, _, path = entry.partition(b"\t")
+        parts = meta.split()
+        if len(parts) == 3 and parts[1] == b"blob" and path.endswith(b".py"):
+            out[path.decode("utf-8", "replace")] = parts[2].decode("ascii")
+    return out
+
+
+def _summarize_blobs(repo: str, shas: List[str], workers: Optional[int] = None):
+    """Yield ``(sha, summary)``; blobs are read in batches and parsed in parallel when there are many."""
+    batches = [shas[i:i + BATCH_SIZE] for i in range(0, len(shas), BATCH_SIZE)]
+    if len(shas) < PARALLEL_MIN_FILES or workers == 0:
+        for batch in batches:
+            for sha, data in symbols.read_blobs(repo, batch).items():
+                yield sha, symbols.summarize(data.decode("utf-8", "replace"))
+        return
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = []
+        for batch in batches:
+            blobs = symbols.read_blobs(repo, batch)
+            items = [(sha, data.decode("utf-8", "replace")) for sha, data in blobs.items()]
+            step = max(1, len(items) // (4 * (workers or os.cpu_count() or 1)))
+            futures.extend(pool.submit(_summarize_batch, items[i:i + step]) for i in range(0, len(items), step))
+        for fut in futures:
+            yield from fut.result()
+
+
+def index_path(repo: str) -> str:
+    git_dir = symbols._git(repo, "rev-parse", "--git-dir").decode("utf-8").strip()
+    if not os.path.isabs(git_dir):
+        git_dir = os.path.join(repo, git_dir)
+    return os.path.join(git_dir, "autopr", "index.json")
+
+
+def load_index(repo: str, rev: str = "HEAD", workers: Optional[int] = None) -> RepoIndex:
+    """Load the persisted index, update it to ``rev`` and save it back if anything changed."""
+    path = index_path(repo)
+    index = RepoIndex.load(path)
+    stats = index.update(repo, rev, workers)
+    if stats["updated"] or stats["removed"] or not os.path.exists(path):
+        index.save(path)
+    return index
+
+
+def removed_definitions(diff: str) -> Dict[str, List[str]]:
+    """``{path: [names]}`` of functions/classes a diff deletes without re-adding."""
+    out: Dict[str, List[str]] = {}
+    for path, section in iter_file_diffs(diff.splitlines()):
+        removed = [m.group(1) for m in map(_DEF_RE.match, section) if m]
+        added = {m.group(1) for m in map(_ADDED_DEF_RE.match, section) if m}
+        gone = [n for n in dict.fromkeys(removed) if n not in added]
+        if gone:
+            out[path] = gone
+    return out
+
+
+def dangling_references(diff: str, index: RepoIndex, max_sites: int = 10) -> List[Dict[str, Any]]:
+    """Findings for definitions removed by ``diff`` that are still referenced elsewhere.
+
+    ``index`` must describe the post-change revision; a name that is still
+    defined anywhere in it (e.g. moved to another module) is not reported.
+    """
+    findings: List[Dict[str, Any]] = []
+    for path, names in removed_definitions(diff).items():
+        for name in names:
+            if index.defined_in(name):
+                continue
+            sites = index.call_sites(name)
+            if not sites:
+                continue
+            files = sorted({p for p, _ in sites})
+            listed = ", ".join(f"{p}:{line}" for p, line in sites[:max_sites]) + (", ..." if len(sites) > max_sites else "")
+            findings.append({
+                "type": "dangling_reference",
+                "message": f"`{name}` is removed from {path} but still referenced in {len(files)} file(s) ({len(sites)} site(s)): {listed}",
+                "severity": "high",
+                "file": path,
+                "call_sites": [{"file": p, "line": line} for p, line in sites[:max_sites]],
+            })
+    return findings
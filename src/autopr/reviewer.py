@@ -1,17 +1,185 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List
+import os
+from typing import Dict, Any, List, Optional, Tuple
 
 from .llm import llm
-from . import analysis, lint, validators
-from . import ci_parser, coverage_utils, issue_validator
+from . import analysis_pool, config, repo_index, symbols, test_impact, validators
+from . import ci_parser, coverage_utils, deadline as deadline_mod, issue_validator
+from . import compaction, findings as findings_mod, pathfilter, positions
+from .extraction import extract_json
+from .providers import max_findings_setting
 
 
-def review_pr(diff: str, commits: list[str] | None = None, issue_text: str | None = None, test_log: str | None = None, coverage_before: str | None = None, coverage_after: str | None = None) -> Dict[str, Any]:
-    # LLM review (may return dict or raw)
-    raw = llm.review_code(diff)
+# checks that are answered from the whole post-image file when it is available
+WHOLE_FILE_TYPES = {"unused_import", "missing_error_handling"}
+
+
+def _post_images(index: positions.DiffIndex, repo: str | None, head: str | None) -> Dict[str, Dict[str, Any]]:
+    if not repo:
+        return {}
+    paths = [p for p, fi in index.files.items() if p.endswith(".py") and fi.hunks]
+    try:
+        if head:
+            return symbols.post_image_summaries(repo, head, paths)
+        return symbols.worktree_summaries(repo, paths)
+    except (RuntimeError, OSError):
+        # not a git checkout / unknown revision: fall back to added lines only
+        return {}
+
+
+def _local_findings(diff: str, index: positions.DiffIndex, repo: str | None = None, head: str | None = None) -> List[Dict[str, Any]]:
+    """Static analysis and lint per file, with real new-file line numbers.
+
+    With ``repo`` (and ``head``, else the working tree) Python files are also
+    checked as whole post-image files, so imports used in unchanged code and
+    ``try`` blocks outside the hunk are taken into account.
+    """
+    summaries = _post_images(index, repo, head)
+    if any(fi.hunks or fi.added for fi in index.files.values()):
+        sources = [(path, fi.added_text, fi) for path, fi in index.files.items()]
+    else:
+        # a plain snippet: analyze it as-is, its own line numbers are the real ones
+        sources = [("", diff, None)]
+    results = analysis_pool.analyze_files([(path, text) for path, text, _ in sources])
+    out: List[Dict[str, Any]] = []
+    for (path, _, fi), (static_items, lint_items) in zip(sources, results):
+        summary = summaries.get(path)
+        if summary is not None and not summary.get("error") and fi is not None:
+            static_items = [f for f in static_items if f.get("type") not in WHOLE_FILE_TYPES]
+            for wf in symbols.whole_file_findings(summary, {n for n in fi.added if n is not None}):
+                out.append(positions.place({**wf, "file": path, "source": "static"}, index))
+        for source, items in (("static", static_items), ("lint", lint_items)):
+            for ef in items:
+                finding = {"type": ef.get("type", source), "message": ef.get("message", ""), "severity": ef.get("severity"), "source": source}
+                if path:
+                    finding["file"] = path
+                line = ef.get("line")
+                if line is not None and fi is not None and fi.hunks:
+                    line = fi.added_line(line)
+                if line is not None:
+                    finding["line"] = line
+                out.append(positions.place(finding, index))
+    return out
+
+
+def _cross_file_findings(diff: str, index: positions.DiffIndex, repo: str | None, head: str | None) -> List[Dict[str, Any]]:
+    """Definitions the diff removes that other files at ``head`` still reference."""
+    if not (repo and head) or not config.get_section("index").get("enabled", True):
+        return []
+    try:
+        # parse in-process: no worker pool from inside API threads (cold builds: `pr-ai index`)
+        repo_idx = repo_index.load_index(repo, head, workers=0)
+    except (RuntimeError, OSError):
+        return []
+    return [positions.place({**f, "source": "static"}, index) for f in repo_index.dangling_references(diff, repo_idx)]
+
+
+def _untested_findings(diff: str, index: positions.DiffIndex, repo: str | None, head: str | None) -> List[Dict[str, Any]]:
+    """Changed functions that no test executed in the recorded baseline (needs a test map)."""
+    if not repo:
+        return []
+    try:
+        test_map = test_impact.TestMap.load(test_impact.map_path(repo))
+        found = test_impact.untested_findings(diff, repo, head, test_map)
+    except (RuntimeError, OSError):
+        return []
+    return [positions.place({**f, "source": "static"}, index) for f in found]
+
+
+def _slow_test_findings(test_summary: Dict[str, Any], base_test_summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """``slow_test`` findings for tests much slower than in the base run (records them in ``test_summary["slower"]``)."""
+    section = config.get_section("tests")
+    slower = ci_parser.slower_tests(base_test_summary, test_summary, float(section.get("slow_ratio", ci_parser.SLOW_RATIO)),
+                                    float(section.get("slow_min_seconds", ci_parser.SLOW_MIN_SECONDS)))
+    test_summary["slower"] = slower
+    out = []
+    for t in slower:
+        finding = {"type": "slow_test", "message": f"Test `{t['name']}` took {t['after']:.2f}s, up from {t['before']:.2f}s", "severity": "low", "source": "tests"}
+        path = t["name"].split("::", 1)[0]
+        if path.endswith(".py"):
+            finding["file"] = path
+        out.append(finding)
+    return out
+
+
+def _llm_review(prompt_diff: str) -> Any:
+    if os.getenv("AUTOPR_STREAM") == "1" and hasattr(llm, "review_code_streaming"):
+        return llm.review_code_streaming(prompt_diff, max_findings=max_findings_setting())
+    return llm.review_code(prompt_diff)
+
+
+def _ai_location(f: Dict[str, Any], refs: Dict[str, str], index: positions.DiffIndex) -> Tuple[str, Optional[int]] | None:
+    """Where an AI finding points: a compact ``F<n>:line`` ref, or a real path from the diff."""
+    loc = compaction.resolve(f"{f['file']}:{f.get('line')}", refs) or compaction.resolve(str(f["file"]), refs)
+    if loc:
+        return loc
+    path = str(f["file"])
+    if path not in index.files:
+        return None
+    try:
+        return path, int(f["line"]) if f.get("line") is not None else None
+    except (TypeError, ValueError):
+        return path, None
+
+
+def _optional(stage: str, skipped: List[str], fn: Any, *args: Any, default: Any = None) -> Any:
+    """Run an optional stage within the request deadline; record it in ``skipped`` if time runs out."""
+    try:
+        return deadline_mod.call(stage, fn, *args)
+    except deadline_mod.DeadlineExceeded:
+        skipped.append(stage)
+        return default
+
+
+def review_pr(diff: str, commits: list[str] | None = None, issue_text: str | None = None, test_log: str | None = None, coverage_before: str | None = None, coverage_after: str | None = None,
+              repo: str | None = None, head: str | None = None, test_summary: Dict[str, Any] | None = None,
+              base_test_summary: Dict[str, Any] | None = None, deadline: float | None = None) -> Dict[str, Any]:
+    """Review a diff. With ``deadline`` (seconds) optional stages are skipped once it passes.
+
+    Static analysis, lint and test-log parsing always run. The LLM review,
+    cross-file and untested-change checks, slow tests, coverage and issue
+    alignment are dropped when the budget is spent, and the result carries
+    ``_partial`` and ``_skipped_stages``.
+    """
+    with deadline_mod.budget(deadline):
+        return _review(diff, commits, issue_text, test_log, coverage_before, coverage_after, repo, head, test_summary, base_test_summary)
+
+
+def _review(diff: str, commits: list[str] | None, issue_text: str | None, test_log: str | None, coverage_before: str | None, coverage_after: str | None,
+            repo: str | None, head: str | None, test_summary: Dict[str, Any] | None, base_test_summary: Dict[str, Any] | None) -> Dict[str, Any]:
+    skipped: List[str] = []
+    # keep generated/vendored/lock files away from the LLM and analyzers
+    diff, filtered = pathfilter.filter_diff(diff)
+
+    # LLM review (may return dict or raw) on a compacted, line-addressable diff; under a
+    # deadline it runs in the background while the deterministic checks below proceed
+    prompt_diff, compact_stats = compaction.compact_for_prompt(diff)
+    try:
+        pending = deadline_mod.start("llm_review", _llm_review, prompt_diff)
+    except deadline_mod.DeadlineExceeded:
+        pending = None
+        skipped.append("llm_review")
+
+    index = positions.DiffIndex(diff)
+    # deterministic static analysis and lint, per file
+    local = _local_findings(diff, index, repo, head)
+    # cross-file: removed definitions still used elsewhere in the repository
+    cross = _optional("cross_file", skipped, _cross_file_findings, diff, index, repo, head, default=[])
+    # changed functions without a test, when a baseline test map was recorded
+    untested = _optional("untested", skipped, _untested_findings, diff, index, repo, head, default=[])
+
+    raw: Any = {"summary": "Review incomplete: the LLM review did not finish within the deadline.", "findings": [], "confidence": 0.0}
+    if pending is not None:
+        try:
+            raw = pending.result(grace=0.25)
+        except deadline_mod.DeadlineExceeded:
+            skipped.append("llm_review")
     if isinstance(raw, dict):
         review = raw
+        if "raw" in raw and not raw.get("findings"):
+            # keep AI findings even when the provider could not parse its own reply
+            review = {**raw, **(extract_json(raw["raw"]) or {})}
     else:
         # try to coerce
         try:
@@ -19,36 +187,43 @@ def review_pr(diff: str, commits: list[str] | None = None, issue_text: str | Non
         except Exception:
             review = {"summary": "", "findings": [], "confidence": 0.0}
 
-    # deterministic static analysis
-    static_findings = analysis.analyze_diff(diff, language="python")
-    # lint findings
-    lint_findings = lint.run_basic_lint(diff)
+    if isinstance(review.get("_usage"), dict) and review["_usage"].get("partial"):
+        # the provider stopped at the deadline: later chunks or the rest of the stream are missing
+        skipped.append("llm_review_remainder")
 
     findings: List[Dict[str, Any]] = []
     for f in review.get("findings", []):
         # already expected shape or massage
-        findings.append({"type": f.get("type", "ai"), "message": f.get("message", str(f)), "severity": f.get("severity") if isinstance(f, dict) else None})
+        finding = {"type": f.get("type", "ai"), "message": f.get("message", str(f)), "severity": f.get("severity") if isinstance(f, dict) else None, "source": "ai"}
+        loc = _ai_location(f, compact_stats["files"], index) if isinstance(f, dict) and f.get("file") else None
+        if loc:
+            finding["file"] = loc[0]
+            if loc[1] is not None:
+                finding["line"] = loc[1]
+        findings.append(positions.place(finding, index))
 
-    # add static & lint findings
-    for sf in static_findings:
-        findings.append({"type": sf.get("type", "static"), "message": sf.get("message", ""), "severity": sf.get("severity")})
-    for lf in lint_findings:
-        findings.append({"type": lf.get("type", "lint"), "message": lf.get("message", ""), "severity": lf.get("severity")})
+    findings.extend(local)
+    findings.extend(cross)
+    findings.extend(untested)
 
-    # parse test output if provided
-    test_summary = None
-    if test_log:
+    # parse test output if provided (callers with many shard logs pass a parsed summary)
+    if test_log and test_summary is None:
         test_summary = ci_parser.parse_pytest_output(test_log)
+    if test_summary is not None and base_test_summary is not None:
+        findings.extend(_optional("slow_tests", skipped, _slow_test_findings, test_summary, base_test_summary, default=[]))
+
+    # one entry per issue across sources, repeated noise aggregated, most severe first, capped
+    findings, findings_report = findings_mod.process(findings)
 
     # compare coverage if both texts provided
     coverage_summary = None
     if coverage_before is not None and coverage_after is not None:
-        coverage_summary = coverage_utils.compare_coverage(coverage_before, coverage_after)
+        coverage_summary = _optional("coverage", skipped, coverage_utils.compare_coverage, coverage_before, coverage_after)
 
     # evaluate issue alignment heuristics when issue_text or commits provided
     issue_alignment = None
     if issue_text and commits:
-        issue_alignment = issue_validator.simple_issue_alignment(issue_text, diff, commits)
+        issue_alignment = _optional("issue_alignment", skipped, issue_validator.simple_issue_alignment, issue_text, diff, commits)
 
     # lint findings
     conf = float(review.get("confidence", 0.0)) if isinstance(review.get("confidence", 0.0), (int, float)) else 0.0
@@ -58,10 +233,18 @@ def review_pr(diff: str, commits: list[str] | None = None, issue_text: str | Non
     # validate shape, attach validation info
     val = validators.validate_review_output(out)
     out["_validation"] = val
+    out["_findings"] = findings_report
     if test_summary is not None:
         out["_tests"] = test_summary
     if coverage_summary is not None:
         out["_coverage"] = coverage_summary
     if issue_alignment is not None:
         out["_issue_alignment"] = issue_alignment
+    if filtered["excluded_files"]:
+        out["_filtered"] = filtered
+    if isinstance(review.get("_usage"), dict):
+        out["_usage"] = review["_usage"]
+    if skipped:
+        out["_partial"] = True
+        out["_skipped_stages"] = skipped
     return out
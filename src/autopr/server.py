@@ -0,0 +1,152 @@
+"""Pre-forking server for the AutoPR API (``pr-ai serve``).
+
+The parent process binds the listening socket, loads the app, configuration,
+path filter and tokenizer once (``preload``), then forks ``workers`` children
+that share the socket and inherit the warm state copy-on-write. Each child
+warms its own provider connections (sockets are never shared across a fork)
+and runs uvicorn on the inherited socket.
+
+On SIGTERM/SIGINT the parent forwards SIGTERM to every worker. uvicorn stops
+accepting new connections and finishes in-flight requests (up to
+``drain_timeout`` seconds); each worker then runs any debounced webhook
+reviews that are still pending before it exits. Workers that die while the
+server is running are replaced.
+
+Without ``os.fork`` (Windows) or with ``workers=1`` the server runs in-process.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> Any:
+    """Import the app and load shared, fork-safe state; returns the ASGI app."""
+    from . import config
+    from . import pathfilter
+    from . import tokens
+    from .main import app
+    from .llm import llm
+
+    config.load_config()
+    pathfilter.get_filter()
+    tokens.get_tokenizer(getattr(llm, "model", None) or None)
+    return app
+
+
+def warm_worker() -> Dict[str, Any]:
+    """Per-process warm-up: open provider connections before taking traffic."""
+    from .llm import llm
+
+    try:
+        return llm.warm()
+    except Exception as e:  # a cold provider is still usable
+        logger.warning("AutoPR provider warm-up failed: %s", e)
+        return {"error": str(e)}
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app: Any, sock: socket.socket, drain_timeout: float, log_level: str) -> None:
+    import uvicorn
+
+    from . import webhooks
+
+    # uvicorn re-raises the shutdown signal once it has drained; swallow it so
+    # the pending-review flush below still runs
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: None)
+    warm_worker()
+    config = uvicorn.Config(app, log_level=log_level, timeout_graceful_shutdown=drain_timeout, lifespan="off")
+    uvicorn.Server(config).run(sockets=[sock])
+    # don't lose debounced reviews on a rolling deploy
+    webhooks.scheduler.flush()
+
+
+def _spawn(app: Any, sock: socket.socket, drain_timeout: float, log_level: str) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 0
+    try:
+        _run_worker(app, sock, drain_timeout, log_level)
+    except BaseException:
+        logger.exception("AutoPR worker %s crashed", os.getpid())
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: int = 2, drain_timeout: float = 30.0, log_level: str = "info",
+          sock: Optional[socket.socket] = None) -> int:
+    """Run the API until SIGTERM/SIGINT; returns the process exit code."""
+    app = preload()
+    sock = sock or bind_socket(host, port)
+    if workers <= 1 or not hasattr(os, "fork"):
+        _run_worker(app, sock, drain_timeout, log_level)
+        return 0
+
+    stopping = False
+
+    def on_signal(signum: int, frame: Any) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    children: List[int] = [_spawn(app, sock, drain_timeout, log_level) for _ in range(workers)]
+    logger.info("AutoPR serving on %s:%s with %d workers", host, sock.getsockname()[1], workers)
+    while not stopping:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid and pid in children:
+            children.remove(pid)
+            if not stopping:
+                logger.warning("AutoPR worker %s exited (status %s); restarting", pid, status)
+                children.append(_spawn(app, sock, drain_timeout, log_level))
+        time.sleep(0.1)
+
+    for pid in children:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + drain_timeout + 5.0
+    exit_code = 0
+    while children and time.monotonic() < deadline:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            if pid in children:
+                children.remove(pid)
+            if not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+                exit_code = 1
+        else:
+            time.sleep(0.05)
+    for pid in children:
+        # drain deadline passed: stop stragglers hard
+        logger.warning("AutoPR worker %s did not drain in time; killing", pid)
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+        exit_code = 1
+    sock.close()
+    return exit_code
@@ -0,0 +1,265 @@
+"""Per-file symbol summaries, cached on disk by git blob SHA.
+
+A summary records what whole-file checks need without keeping the source:
+imports, top-level definitions, referenced names, calls and function spans
+(with their risky calls and whether they contain a ``try``). Summaries are
+keyed by the git blob SHA of the file contents, so a file that did not change
+between pushes, PRs or processes is parsed once.
+
+The cache directory is ``AUTOPR_SYMBOL_CACHE_DIR``, ``[symbols] cache_dir`` or
+``~/.cache/autopr/symbols``, shared by CLI and API runs, and bounded by
+``[symbols] max_mb`` (default 256) with least-recently-used eviction.
+
+``post_image_summaries`` loads summaries for a set of paths at a git revision
+with one ``git ls-tree`` plus one ``git cat-file --batch`` for cache misses.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+import re
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from . import config
+from .cache import DiskCache
+
+SUMMARY_VERSION = 2
+RISKY_NAMES = {"open", "requests", "subprocess", "socket"}
+
+stats = {"hits": 0, "misses": 0}
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The SHA git would assign to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _callee(node: ast.Call) -> Optional[str]:
+    if isinstance(node.func, ast.Name):
+        return node.func.id
+    if isinstance(node.func, ast.Attribute):
+        return node.func.attr
+    return None
+
+
+def _root_name(node: ast.expr) -> Optional[str]:
+    """``a`` for ``a``, ``a.b`` and ``a.b.c``; None when the chain starts elsewhere (calls, subscripts)."""
+    while isinstance(node, ast.Attribute):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def summarize(text: str) -> Dict[str, Any]:
+    """Symbol summary of a Python source file (JSON-serializable)."""
+    out: Dict[str, Any] = {"version": SUMMARY_VERSION, "imports": [], "defs": [], "names": [], "calls": [], "refs": [], "functions": [], "error": None}
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        out["error"] = type(e).__name__
+        return out
+
+    names: Set[str] = set()
+    modules: Set[str] = set()
+    calls: List[ast.Call] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                out["imports"].append([alias.asname or alias.name.split(".")[0], node.lineno, alias.name])
+                modules.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                out["imports"].append([alias.asname or alias.name, node.lineno, f"{node.module or ''}.{alias.name}"])
+                out["refs"].append([alias.name, node.lineno])
+        elif isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            names.add(node.attr)
+        elif isinstance(node, ast.Call):
+            callee = _callee(node)
+            if callee:
+                out["calls"].append([callee, node.lineno])
+                calls.append(node)
+    # references to module-level definitions: ``from x import name``, ``name()`` and
+    # ``module.name()`` after ``import module``; ``obj.name()`` may be any object's method
+    for node in calls:
+        if isinstance(node.func, ast.Name) or (isinstance(node.func, ast.Attribute) and _root_name(node.func.value) in modules):
+            out["refs"].append([_callee(node), node.lineno])
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            out["defs"].append([node.name, node.lineno, "class" if isinstance(node, ast.ClassDef) else "function"])
+            if isinstance(node, ast.ClassDef):
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        out["defs"].append([f"{node.name}.{item.name}", item.lineno, "method"])
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for t in targets:
+                if isinstance(t, ast.Name):
+                    out["defs"].append([t.id, node.lineno, "variable"])
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            risky = []
+            has_try = False
+            for child in ast.walk(node):
+                if isinstance(child, ast.Try):
+                    has_try = True
+                if isinstance(child, ast.Call):
+                    if isinstance(child.func, ast.Name) and child.func.id in RISKY_NAMES:
+                        risky.append([child.func.id, child.lineno])
+                    elif isinstance(child.func, ast.Attribute) and isinstance(child.func.value, ast.Name) and child.func.value.id in RISKY_NAMES:
+                        risky.append([f"{child.func.value.id}.{child.func.attr}", child.lineno])
+            out["functions"].append({"name": node.name, "start": node.lineno, "end": getattr(node, "end_lineno", node.lineno), "has_try": has_try, "risky": risky})
+    out["names"] = sorted(names)
+    return out
+
+
+_cache: Optional[DiskCache] = None
+_cache_dir: Optional[str] = None
+
+
+def symbol_cache() -> DiskCache:
+    global _cache, _cache_dir
+    section = config.get_section("symbols")
+    directory = os.getenv("AUTOPR_SYMBOL_CACHE_DIR") or section.get("cache_dir") or os.path.join(os.path.expanduser("~"), ".cache", "autopr", "symbols")
+    if _cache is None or _cache_dir != directory:
+        _cache = DiskCache(directory, max_bytes=int(float(section.get("max_mb", 256)) * 1024 * 1024))
+        _cache_dir = directory
+    return _cache
+
+
+def _key(blob_sha: str) -> str:
+    return f"symbols:v{SUMMARY_VERSION}:{blob_sha}"
+
+
+def summary_for_text(text: str) -> Dict[str, Any]:
+    """Cached summary for file contents (the blob SHA is computed locally)."""
+    cache = symbol_cache()
+    key = _key(git_blob_sha(text.encode("utf-8")))
+    cached = cache.get(key)
+    if cached is not None:
+        stats["hits"] += 1
+        return cached
+    stats["misses"] += 1
+    summary = summarize(text)
+    cache.set(key, summary)
+    return summary
+
+
+def _git(repo: str, *args: str, input: Optional[bytes] = None) -> bytes:
+    proc = subprocess.run(["git", "-C", repo, *args], input=input, capture_output=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {proc.stderr.decode('utf-8', 'replace').strip()}")
+    return proc.stdout
+
+
+# commit ids and ref expressions (main, origin/pr-1, HEAD~2, v1.0^{commit}); never a leading "-"
+_REV_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_./@^~{}+-]*$")
+
+
+def check_rev(rev: str) -> str:
+    """``rev`` unchanged if it is a commit id or ref name; RuntimeError for anything git could parse as an option."""
+    if not _REV_RE.match(rev or "") or ".." in rev:
+        raise RuntimeError(f"Not a commit id or ref name: {rev!r}")
+    return rev
+
+
+def blob_shas(repo: str, rev: str, paths: Iterable[str]) -> Dict[str, str]:
+    """``{path: blob_sha}`` for the paths that exist at ``rev``."""
+    paths = list(paths)
+    if not paths:
+        return {}
+    out: Dict[str, str] = {}
+    raw = _git(repo, "ls-tree", "-z", check_rev(rev), "--", *paths)
+    for entry in raw.split(b"\0"):
+        if not entry:
+            continue
+        meta, _, path = entry.partition(b"\t")
+        parts = meta.split()
+        if len(parts) == 3 and parts[1] == b"blob":
+            out[path.decode("utf-8", "replace")] = parts[2].decode("ascii")
+    return out
+
+
+def read_blobs(repo: str, shas: Iterable[str]) -> Dict[str, bytes]:
+    """Contents of many blobs through a single ``git cat-file --batch``."""
+    shas = list(dict.fromkeys(shas))
+    if not shas:
+        return {}
+    raw = _git(repo, "cat-file", "--batch", input=("\n".join(shas) + "\n").encode("ascii"))
+    out: Dict[str, bytes] = {}
+    pos = 0
+    for sha in shas:
+        nl = raw.index(b"\n", pos)
+        header = raw[pos:nl].split()
+        pos = nl + 1
+        if len(header) < 3 or header[1] == b"missing":
+            continue
+        size = int(header[2])
+        out[sha] = raw[pos:pos + size]
+        pos += size + 1  # content is followed by a newline
+    return out
+
+
+def post_image_summaries(repo: str, rev: str, paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Summaries of ``paths`` as they are at ``rev``; unchanged blobs come from the cache."""
+    cache = symbol_cache()
+    shas = blob_shas(repo, rev, paths)
+    out: Dict[str, Dict[str, Any]] = {}
+    missing: Dict[str, List[str]] = {}
+    for path, sha in shas.items():
+        cached = cache.get(_key(sha))
+        if cached is not None:
+            stats["hits"] += 1
+            out[path] = cached
+        else:
+            missing.setdefault(sha, []).append(path)
+    for sha, data in read_blobs(repo, missing).items():
+        stats["misses"] += 1
+        summary = summarize(data.decode("utf-8", "replace"))
+        cache.set(_key(sha), summary)
+        for path in missing[sha]:
+            out[path] = summary
+    return out
+
+
+def worktree_summaries(repo: str, paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Summaries of ``paths`` as they are in the working tree of ``repo``."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        try:
+            with open(os.path.join(repo, path), encoding="utf-8", errors="replace") as f:
+                out[path] = summary_for_text(f.read())
+        except OSError:
+            continue
+    return out
+
+
+def whole_file_findings(summary: Dict[str, Any], changed_lines: Set[int]) -> List[Dict[str, Any]]:
+    """Unused-import and missing-error-handling checks using the full post-image file.
+
+    Only imports and risky calls on changed lines are reported, but usage and
+    ``try`` blocks anywhere in the file count.
+    """
+    if summary.get("error"):
+        return []
+    findings: List[Dict[str, Any]] = []
+    names = set(summary.get("names", []))
+    for name, line, _ in summary.get("imports", []):
+        if line in changed_lines and name not in names and name != "*":
+            findings.append({"type": "unused_import", "message": f"Imported `{name}` is not used", "line": line, "severity": "low"})
+    for fn in summary.get("functions", []):
+        if fn["has_try"]:
+            continue
+        for name, line in fn["risky"]:
+            if line in changed_lines:
+                findings.append({
+                    "type": "missing_error_handling",
+                    "message": f"Function uses {name} without try/except — consider handling potential errors",
+                    "line": line,
+                    "severity": "medium",
+                })
+    return findings
@@ -0,0 +1,232 @@
+"""Select the tests affected by a change.
+
+A *test map* records, for each source function, which tests executed it. It is
+built from a coverage.py data file recorded with per-test dynamic contexts
+(``pytest --cov --cov-context=test``); the SQLite file is read directly, so
+coverage.py itself is not needed here. Lines are folded into the innermost
+enclosing function of the file as it was measured, which keeps the map small
+and lets it survive later line shifts. The map is persisted next to the
+repository index in ``<git-dir>/autopr/test_map.json``.
+
+For a diff, the affected tests are:
+
+- changed test files themselves
+- tests that executed a changed function (``file::function`` lookups)
+- for files the map knows nothing about (new files, no baseline yet), test
+  files that import them, directly or transitively, via :mod:`autopr.repo_index`
+
+``untested_findings`` reports changed functions no baseline test executed and
+no changed test references. Only files the map has measured count, plus new
+files under a measured directory; a file coverage never looked at says
+nothing about its tests.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from . import positions, repo_index, symbols
+
+MAP_VERSION = 1
+MODULE = "<module>"
+_TEST_FILE_RE = re.compile(r"(^|/)(test_[^/]*|[^/]*_test)\.py$")
+
+
+def is_test_file(path: str) -> bool:
+    return bool(_TEST_FILE_RE.search(path))
+
+
+def _numbits_to_lines(numbits: bytes) -> List[int]:
+    """Decode coverage.py's ``numbits`` blob (bit n set = line n executed)."""
+    return [i * 8 + bit for i, byte in enumerate(numbits) if byte for bit in range(8) if byte & (1 << bit)]
+
+
+def _test_id(context: Optional[str]) -> Optional[str]:
+    # pytest-cov labels contexts "tests/test_x.py::test_y|run" (or |setup, |teardown)
+    if not context:
+        return None
+    return context.split("|", 1)[0]
+
+
+def read_coverage_contexts(data_file: str) -> Dict[str, Dict[str, Set[int]]]:
+    """``{measured file: {test id: executed lines}}`` from a coverage.py data file."""
+    out: Dict[str, Dict[str, Set[int]]] = {}
+    con = sqlite3.connect(f"file:{data_file}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in con.execute("select name from sqlite_master where type = 'table'")}
+        if "line_bits" in tables:
+            rows = con.execute("select file.path, context.context, line_bits.numbits from line_bits "
+                               "join file on file.id = line_bits.file_id join context on context.id = line_bits.context_id")
+            for path, context, numbits in rows:
+                test = _test_id(context)
+                if test:
+                    out.setdefault(path, {}).setdefault(test, set()).update(_numbits_to_lines(numbits))
+        if "arc" in tables:
+            rows = con.execute("select file.path, context.context, arc.fromno, arc.tono from arc "
+                               "join file on file.id = arc.file_id join context on context.id = arc.context_id")
+            for path, context, fromno, tono in rows:
+                test = _test_id(context)
+                if test:
+                    out.setdefault(path, {}).setdefault(test, set()).update(n for n in (fromno, tono) if n > 0)
+    finally:
+        con.close()
+    return out
+
+
+def _innermost(functions: List[Dict[str, Any]], line: int) -> str:
+    best: Optional[Dict[str, Any]] = None
+    for fn in functions:
+        if fn["start"] <= line <= fn["end"] and (best is None or fn["end"] - fn["start"] < best["end"] - best["start"]):
+            best = fn
+    return best["name"] if best else MODULE
+
+
+class TestMap:
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, tests: Optional[List[str]] = None, functions: Optional[Dict[str, Dict[str, List[int]]]] = None):
+        self.tests: List[str] = tests or []
+        # path -> function name -> indices into ``tests``
+        self.functions: Dict[str, Dict[str, List[int]]] = functions or {}
+
+    @classmethod
+    def from_coverage(cls, data_file: str, repo: str = ".") -> "TestMap":
+        root = os.path.realpath(repo)
+        tests: Dict[str, int] = {}
+        functions: Dict[str, Dict[str, Set[int]]] = {}
+        for measured, per_test in read_coverage_contexts(data_file).items():
+            path = os.path.relpath(os.path.realpath(os.path.join(root, measured)), root)
+            if path.startswith(".."):
+                continue
+            summary = symbols.worktree_summaries(root, [path]).get(path, {})
+            spans = summary.get("functions", [])
+            per_fn = functions.setdefault(path.replace(os.sep, "/"), {})
+            for test, lines in per_test.items():
+                idx = tests.setdefault(test, len(tests))
+                for name in {_innermost(spans, n) for n in lines}:
+                    per_fn.setdefault(name, set()).add(idx)
+        return cls(list(tests), {p: {fn: sorted(ix) for fn, ix in fns.items()} for p, fns in functions.items()})
+
+    def knows(self, path: str) -> bool:
+        return path in self.functions
+
+    def under_measured_root(self, path: str) -> bool:
+        """Whether ``path`` sits in a directory (or below one) that holds measured files."""
+        roots = {os.path.dirname(p) for p in self.functions}
+        parent = os.path.dirname(path)
+        return any(not root or parent == root or parent.startswith(root + "/") for root in roots)
+
+    def tests_for(self, path: str, names: Optional[Iterable[str]] = None) -> Set[str]:
+        """Tests that executed ``names`` in ``path`` (any function when ``names`` is None)."""
+        per_fn = self.functions.get(path, {})
+        keys = per_fn.keys() if names is None else names
+        return {self.tests[i] for name in keys for i in per_fn.get(name, ())}
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".test_map-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MAP_VERSION, "tests": self.tests, "functions": self.functions}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["TestMap"]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MAP_VERSION:
+            return None
+        return cls(data.get("tests"), data.get("functions"))
+
+
+def map_path(repo: str) -> str:
+    return os.path.join(os.path.dirname(repo_index.index_path(repo)), "test_map.json")
+
+
+def _summaries(repo: str, head: Optional[str], paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    if head:
+        return symbols.post_image_summaries(repo, head, paths)
+    return symbols.worktree_summaries(repo, paths)
+
+
+def changed_functions(index: positions.DiffIndex, summaries: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """``{path: {function: first changed line}}`` for the Python files of a diff."""
+    out: Dict[str, Dict[str, int]] = {}
+    for path, fi in index.files.items():
+        if not path.endswith(".py"):
+            continue
+        lines = [n for n in fi.added if n is not None]
+        # pure deletions: the hunk's new-file start still lies in the edited function
+        lines += [h["start"] for h in fi.hunks if not any(h["start"] <= n <= h["end"] for n in lines)]
+        spans = summaries.get(path, {}).get("functions", [])
+        names: Dict[str, int] = {}
+        for n in sorted(lines):
+            names.setdefault(_innermost(spans, n), n)
+        if names:
+            out[path] = names
+    return out
+
+
+def affected_tests(diff: str, repo: str = ".", head: Optional[str] = None, test_map: Optional[TestMap] = None) -> Dict[str, Any]:
+    """Tests to run for ``diff``: ``{"tests": [...], "reasons": {test: why}}``."""
+    index = positions.DiffIndex(diff)
+    paths = [p for p in index.files if p.endswith(".py")]
+    changed = changed_functions(index, _summaries(repo, head, paths))
+    reasons: Dict[str, str] = {}
+    unmapped: List[str] = []
+    for path in paths:
+        if is_test_file(path):
+            reasons[path] = "changed"
+        elif test_map is not None and test_map.knows(path):
+            for name in changed.get(path, {}):
+                for test in test_map.tests_for(path, [name]):
+                    reasons.setdefault(test, f"executes {path}::{name}")
+        else:
+            unmapped.append(path)
+    if unmapped:
+        try:
+            graph = repo_index.load_index(repo, head or "HEAD", workers=0)
+        except RuntimeError:
+            graph = None
+        for path in unmapped:
+            for dep in sorted(graph.dependents([path]) if graph else ()):
+                if is_test_file(dep):
+                    reasons.setdefault(dep, f"imports {path}")
+    # a whole selected test file makes its individual test ids redundant
+    files = {t for t in reasons if "::" not in t}
+    tests = sorted(t for t in reasons if "::" not in t or t.split("::", 1)[0] not in files)
+    return {"tests": tests, "reasons": {t: reasons[t] for t in tests}}
+
+
+def untested_findings(diff: str, repo: str, head: Optional[str] = None, test_map: Optional[TestMap] = None) -> List[Dict[str, Any]]:
+    """``untested_change`` findings for changed functions no test executed or references."""
+    if test_map is None:
+        return []
+    index = positions.DiffIndex(diff)
+    paths = [p for p in index.files if p.endswith(".py")]
+    summaries = _summaries(repo, head, paths)
+    # names called by tests changed in the same diff count as covered
+    referenced = {callee for p in paths if is_test_file(p) for callee, _ in summaries.get(p, {}).get("calls", [])}
+    findings: List[Dict[str, Any]] = []
+    for path, names in changed_functions(index, summaries).items():
+        if is_test_file(path):
+            continue
+        if not (test_map.knows(path) or (index.files[path].new_file and test_map.under_measured_root(path))):
+            continue
+        for name, line in names.items():
+            if name == MODULE or name in referenced or test_map.tests_for(path, [name]):
+                continue
+            findings.append({
+                "type": "untested_change",
+                "message": f"Changed function `{name}` is not executed by any test in the baseline coverage",
+                "severity": "low",
+                "file": path,
+                "line": line,
+            })
+    return findings
@@ -0,0 +1,213 @@
+"""Token estimation, prompt budgeting and usage accounting for provider calls.
+
+Tokenizers are pluggable: ``ApproxTokenizer`` is a fast offline estimate that
+needs no dependencies, and ``TiktokenTokenizer`` gives exact counts for
+OpenAI-style models when ``tiktoken`` is installed. Select one with
+``AUTOPR_TOKENIZER`` (``auto`` | ``approx`` | ``tiktoken``; default ``auto``).
+
+Prompt budgets come from ``AUTOPR_MAX_PROMPT_TOKENS`` or ``[llm]
+max_prompt_tokens`` in ``.autopr.toml``; ``overflow`` chooses ``chunk`` or
+``truncate`` when a diff does not fit. Per-call usage is recorded in the
+module-level ``usage`` counters, keyed by ``"provider:model"``, with optional
+cost estimates from ``[llm.pricing."provider:model"]`` (e.g.
+``[llm.pricing."openai:gpt-4o"]``; ``prompt_per_1k`` / ``completion_per_1k``).
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from . import config
+
+DEFAULT_MAX_PROMPT_TOKENS = 100_000
+# tokens kept free for the model's answer and template drift
+RESERVED_TOKENS = 1_000
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class PromptTooLarge(ValueError):
+    """Raised when a prompt cannot be brought under the configured budget."""
+
+
+class ApproxTokenizer:
+    """Offline estimate: one token per word/punctuation piece, ~4 chars per token for long runs."""
+
+    name = "approx"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return max(len(_PIECE_RE.findall(text)), (len(text) + 3) // 4)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if self.count(text) <= max_tokens:
+            return text
+        # binary search on a character cut point
+        lo, hi = 0, len(text)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.count(text[:mid]) <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        return text[:lo]
+
+
+class TiktokenTokenizer:
+    name = "tiktoken"
+
+    def __init__(self, model: Optional[str] = None):
+        import tiktoken
+
+        try:
+            self._enc = tiktoken.encoding_for_model(model or "")
+        except Exception:
+            self._enc = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text or "", disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        ids = self._enc.encode(text or "", disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text
+        return self._enc.decode(ids[:max_tokens])
+
+
+_tokenizers: Dict[str, Any] = {}
+
+
+def get_tokenizer(model: Optional[str] = None) -> Any:
+    """Return a (cached) tokenizer for ``model`` according to AUTOPR_TOKENIZER."""
+    kind = os.getenv("AUTOPR_TOKENIZER", "auto").lower()
+    key = f"{kind}:{model or ''}"
+    tok = _tokenizers.get(key)
+    if tok is not None:
+        return tok
+    tok = ApproxTokenizer()
+    if kind in ("auto", "tiktoken"):
+        try:
+            tok = TiktokenTokenizer(model)
+        except ImportError:
+            if kind == "tiktoken":
+                raise
+    _tokenizers[key] = tok
+    return tok
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    return get_tokenizer(model).count(text)
+
+
+def max_prompt_tokens() -> int:
+    env = os.getenv("AUTOPR_MAX_PROMPT_TOKENS")
+    if env:
+        return int(env)
+    return int(config.get_section("llm").get("max_prompt_tokens", DEFAULT_MAX_PROMPT_TOKENS))
+
+
+def overflow_strategy() -> str:
+    return (os.getenv("AUTOPR_PROMPT_OVERFLOW") or config.get_section("llm").get("overflow", "chunk")).lower()
+
+
+def fit_diff(template: str, diff: str, model: Optional[str] = None, strategy: Optional[str] = None, field: str = "diff", **fmt: Any) -> Dict[str, Any]:
+    """Render ``template`` with ``diff`` so every prompt fits the token budget.
+
+    ``diff`` is substituted for the ``{<field>}`` placeholder.
+    Returns ``{"prompts": [...], "prompt_tokens": [...], "truncated": bool}``.
+    With the ``chunk`` strategy an oversized diff is split on file boundaries
+    (``diff --git`` sections, or ``F<n>`` headers of a compacted diff) into
+    several prompts; with ``truncate`` (or when the caller cannot merge
+    chunks) the diff is cut to fit.
+    """
+    from .compaction import split_files
+    from .parser import iter_file_diffs
+
+    tok = get_tokenizer(model)
+    budget = max_prompt_tokens()
+    strategy = strategy or overflow_strategy()
+    fmt = dict(fmt)
+
+    def render(text: str) -> str:
+        return template.format(**{field: text}, **fmt)
+
+    prompt = render(diff)
+    n = tok.count(prompt)
+    if n <= budget:
+        return {"prompts": [prompt], "prompt_tokens": [n], "truncated": False}
+
+    room = budget - tok.count(render("")) - RESERVED_TOKENS
+    if room <= 0:
+        raise PromptTooLarge(f"Prompt template alone exceeds the {budget} token budget")
+
+    marker = "\n[... diff truncated to fit the prompt budget ...]"
+    if strategy != "chunk":
+        cut = tok.truncate(diff, room) + marker
+        prompt = render(cut)
+        return {"prompts": [prompt], "prompt_tokens": [tok.count(prompt)], "truncated": True}
+
+    chunks: List[str] = []
+    current: List[str] = []
+    used = 0
+    truncated = False
+    sections = split_files(diff)
+    for _, section in sections if sections is not None else iter_file_diffs(diff.splitlines()):
+        text = "\n".join(section)
+        size = tok.count(text)
+        if size > room:
+            text = tok.truncate(text, room) + marker
+            size = room
+            truncated = True
+        if current and used + size > room:
+            chunks.append("\n".join(current))
+            current, used = [], 0
+        current.append(text)
+        used += size
+    if current:
+        chunks.append("\n".join(current))
+    prompts = [render(c) for c in chunks]
+    return {"prompts": prompts, "prompt_tokens": [tok.count(p) for p in prompts], "truncated": truncated}
+
+
+class UsageCounters:
+    """Thread-safe aggregate of prompt/completion tokens (and cost) per provider model."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_model: Dict[str, Dict[str, float]] = {}
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            row = self._by_model.setdefault(model, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0})
+            row["calls"] += 1
+            row["prompt_tokens"] += prompt_tokens
+            row["completion_tokens"] += completion_tokens
+            row["cost"] += cost or 0.0
+        return {"model": model, "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost": cost}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            by_model = {k: dict(v) for k, v in self._by_model.items()}
+        totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0}
+        for row in by_model.values():
+            for k in totals:
+                totals[k] += row[k]
+        return {"totals": totals, "by_model": by_model}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._by_model.clear()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    pricing = config.get_section("llm").get("pricing", {}).get(model)
+    if not isinstance(pricing, dict):
+        return None
+    return prompt_tokens / 1000 * float(pricing.get("prompt_per_1k", 0)) + completion_tokens / 1000 * float(pricing.get("completion_per_1k", 0))
+
+
+usage = UsageCounters()
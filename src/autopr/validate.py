@@ -0,0 +1,121 @@
+"""Run the base and head test suites side by side in temporary git worktrees.
+
+Each revision is checked out with ``git worktree add --detach`` into its own
+temporary directory, so the caller's working tree is never touched, and both
+suites run at the same time. With ``shards > 1`` the tests pytest itself
+collects in each worktree (so ``pytest.ini`` paths and patterns apply) are
+split by file, biggest files spread first, into that many concurrent pytest
+processes. Shard logs are parsed with :mod:`autopr.ci_parser` and merged, and
+head failures and errors are split into new ones (passing on base) and
+pre-existing ones. A head shard that timed out or ended without pytest's
+summary line makes the run incomplete, which fails the gate as well.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import ci_parser, symbols
+
+TIMEOUT_MARKER = "autopr: pytest timed out"
+
+
+@contextmanager
+def worktree(repo: str, rev: str) -> Iterator[str]:
+    """A detached checkout of ``rev`` in a temporary directory, removed afterwards."""
+    path = tempfile.mkdtemp(prefix="autopr-wt-")
+    symbols._git(repo, "worktree", "add", "--detach", "--force", path, rev)
+    try:
+        yield path
+    finally:
+        try:
+            symbols._git(repo, "worktree", "remove", "--force", path)
+        except RuntimeError:
+            shutil.rmtree(path, ignore_errors=True)
+            symbols._git(repo, "worktree", "prune")
+
+
+def list_test_files(cwd: str, pytest_args: Optional[List[str]] = None, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """``[{"path", "size"}]`` (size = number of tests) from ``pytest --collect-only -q`` in ``cwd``.
+
+    None when collection fails; the caller then runs that suite unsharded, so
+    the collection errors show up in its results.
+    """
+    log = _run_pytest(cwd, ["--collect-only", *(pytest_args or [])], timeout)
+    if TIMEOUT_MARKER in log or ci_parser.parse_pytest_output(log)["errors"]:
+        return None
+    counts: Dict[str, int] = {}
+    for line in log.splitlines():
+        path, sep, _ = line.partition("::")
+        if sep and path.endswith(".py"):
+            counts[path] = counts.get(path, 0) + 1
+    return [{"path": p, "size": n} for p, n in counts.items()]
+
+
+def shard(files: List[Dict[str, Any]], n: int) -> List[List[str]]:
+    """Split files into ``n`` groups of similar total size (greedy, largest first)."""
+    groups: List[List[str]] = [[] for _ in range(max(1, n))]
+    sizes = [0] * len(groups)
+    for f in sorted(files, key=lambda f: f["size"], reverse=True):
+        i = sizes.index(min(sizes))
+        groups[i].append(f["path"])
+        sizes[i] += f["size"]
+    return [g for g in groups if g]
+
+
+def _run_pytest(cwd: str, args: List[str], timeout: Optional[float]) -> str:
+    env = dict(os.environ)
+    paths = [cwd] + ([os.path.join(cwd, "src")] if os.path.isdir(os.path.join(cwd, "src")) else [])
+    env["PYTHONPATH"] = os.pathsep.join(paths + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    cmd = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *args]
+    try:
+        proc = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        out = e.stdout.decode("utf-8", "replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+        return out + f"\n{TIMEOUT_MARKER} after {timeout:g}s\n"
+    return proc.stdout + proc.stderr
+
+
+def _incomplete(log: str, summary: Dict[str, Any]) -> Optional[str]:
+    """Why a shard's results cannot be trusted, or None."""
+    if TIMEOUT_MARKER in log:
+        return "timed out"
+    if not summary.get("complete"):
+        return "ended without a pytest summary line (crashed or killed)"
+    return None
+
+
+def validate(repo: str, base: str, head: str = "HEAD", shards: int = 1, pytest_args: Optional[List[str]] = None,
+             timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run both suites concurrently and compare them; see the module docstring."""
+    started = time.monotonic()
+    extra = list(pytest_args or [])
+    with worktree(repo, base) as base_dir, worktree(repo, head) as head_dir:
+        jobs = []
+        for side, cwd in (("base", base_dir), ("head", head_dir)):
+            files = list_test_files(cwd, extra, timeout) if shards > 1 else None
+            groups = shard(files, shards) if files else []
+            for group in groups or [[]]:
+                jobs.append((side, cwd, extra + group))
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            logs = list(pool.map(lambda job: _run_pytest(job[1], job[2], timeout), jobs))
+    out: Dict[str, Any] = {}
+    for side in ("base", "head"):
+        side_logs = [log for (s, _, _), log in zip(jobs, logs) if s == side]
+        summaries = [ci_parser.parse_pytest_output(log) for log in side_logs]
+        out[side] = ci_parser.merge_summaries(summaries)
+        out[side]["shards"] = len(side_logs)
+        out[side]["incomplete"] = [f"shard {i}: {why}" for i, (log, s) in enumerate(zip(side_logs, summaries), 1) for why in [_incomplete(log, s)] if why]
+        out[f"_{side}_log"] = "\n".join(side_logs)
+    out.update(ci_parser.compare_runs(out["base"], out["head"]))
+    # a head run that was not read to the end may hide failures
+    out["passed"] = not out["new_failures"] and not out["head"]["incomplete"]
+    out["wall_seconds"] = round(time.monotonic() - started, 3)
+    return out
@@ -49,6 +49,13 @@ def validate_review_output(result: Dict[str, Any]) -> Dict[str, Any]:
             if not isinstance(result[k], t):
                 warnings.append(f"Key {k} expected type {t}, got {type(result[k])}")
 
+    findings = result.get("findings")
+    if isinstance(findings, list):
+        for i, f in enumerate(findings):
+            if not isinstance(f, dict) or "message" not in f:
+                errors.append(f"Finding {i} must be an object with a message")
+                break
+
     conf = result.get("confidence", 0.0)
     try:
         c = float(conf)
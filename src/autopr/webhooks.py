@@ -0,0 +1,184 @@
+"""GitHub webhook handling: signature checks, delivery de-duplication and
+debounced, cancellable PR reviews.
+
+A burst of pushes to one pull request produces a burst of ``synchronize``
+deliveries. Instead of starting one review per delivery, the scheduler keeps a
+single pending review per PR and restarts its debounce timer on every event,
+so only the latest head SHA is reviewed. If a review for an older head is
+already running when a newer SHA arrives, its cancel event is set so the runner
+can stop before doing (or posting) any more work.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import github, positions, publisher, render
+
+# PR actions that should (re)start a review
+REVIEW_ACTIONS = {"opened", "synchronize", "reopened", "ready_for_review"}
+
+PRKey = Tuple[str, int]
+Runner = Callable[[Dict[str, Any], threading.Event], Any]
+
+
+def verify_signature(secret: str, body: bytes, signature_header: str | None, allow_unsigned: bool = False) -> bool:
+    """Check an ``X-Hub-Signature-256`` header against the raw request body.
+
+    Without a secret every delivery is rejected, unless ``allow_unsigned`` is set
+    (``AUTOPR_WEBHOOK_ALLOW_UNSIGNED=1``, for local development only).
+    """
+    if not secret:
+        return allow_unsigned
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header)
+
+
+class DeliveryCache:
+    """Bounded record of recently seen ``X-GitHub-Delivery`` ids."""
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, delivery_id: str) -> bool:
+        """Return True if the id was already recorded, otherwise record it."""
+        with self._lock:
+            if delivery_id in self._seen:
+                self._seen.move_to_end(delivery_id)
+                return True
+            self._seen[delivery_id] = None
+            if len(self._seen) > self.max_size:
+                self._seen.popitem(last=False)
+            return False
+
+
+class ReviewScheduler:
+    """Debounce review requests per PR and cancel superseded in-flight runs.
+
+    ``runner(event, cancelled)`` is called on a background thread with the
+    latest event for the PR; it should check ``cancelled.is_set()`` between
+    stages and bail out early when it is.
+    """
+
+    def __init__(self, runner: Runner, debounce_seconds: float = 30.0):
+        self.runner = runner
+        self.debounce_seconds = debounce_seconds
+        self._lock = threading.Lock()
+        self._pending: Dict[PRKey, Tuple[threading.Timer, Dict[str, Any]]] = {}
+        self._inflight: Dict[PRKey, Tuple[str, threading.Event]] = {}
+        self.stats = {"scheduled": 0, "debounced": 0, "cancelled": 0, "started": 0}
+
+    def submit(self, key: PRKey, head_sha: str, event: Dict[str, Any]) -> str:
+        """Schedule a review of ``head_sha``; returns 'scheduled' or 'debounced'."""
+        with self._lock:
+            status = "scheduled"
+            pending = self._pending.pop(key, None)
+            if pending is not None:
+                pending[0].cancel()
+                status = "debounced"
+                self.stats["debounced"] += 1
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[0] != head_sha and not inflight[1].is_set():
+                inflight[1].set()
+                self.stats["cancelled"] += 1
+            timer = threading.Timer(self.debounce_seconds, self._fire, args=(key,))
+            timer.daemon = True
+            self._pending[key] = (timer, event)
+            self.stats["scheduled"] += 1
+        timer.start()
+        return status
+
+    def flush(self) -> None:
+        """Start every pending review immediately (used on shutdown and in tests)."""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self._fire(key, wait=True)
+
+    def _fire(self, key: PRKey, wait: bool = False) -> None:
+        with self._lock:
+            pending = self._pending.pop(key, None)
+            if pending is None:
+                return
+            timer, event = pending
+            timer.cancel()
+            head_sha = _head_sha(event)
+            cancelled = threading.Event()
+            previous = self._inflight.get(key)
+            if previous is not None and previous[0] != head_sha:
+                previous[1].set()
+            self._inflight[key] = (head_sha, cancelled)
+            self.stats["started"] += 1
+
+        thread = threading.Thread(target=self._run, args=(key, event, cancelled), daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+
+    def _run(self, key: PRKey, event: Dict[str, Any], cancelled: threading.Event) -> None:
+        try:
+            self.runner(event, cancelled)
+        finally:
+            with self._lock:
+                current = self._inflight.get(key)
+                if current is not None and current[1] is cancelled:
+                    del self._inflight[key]
+
+
+def _head_sha(event: Dict[str, Any]) -> str:
+    return ((event.get("pull_request") or {}).get("head") or {}).get("sha", "")
+
+
+def pr_key(event: Dict[str, Any]) -> Optional[PRKey]:
+    repo = (event.get("repository") or {}).get("full_name")
+    number = (event.get("pull_request") or {}).get("number") or event.get("number")
+    if not repo or not number:
+        return None
+    return repo, int(number)
+
+
+def handle_event(event_name: str, delivery_id: str, event: Dict[str, Any], scheduler: ReviewScheduler, deliveries: DeliveryCache) -> Dict[str, Any]:
+    """Route a verified webhook delivery; returns a small status dict."""
+    if delivery_id and deliveries.seen(delivery_id):
+        return {"status": "duplicate"}
+    if event_name == "ping":
+        return {"status": "pong"}
+    if event_name != "pull_request" or event.get("action") not in REVIEW_ACTIONS:
+        return {"status": "ignored"}
+    key = pr_key(event)
+    if key is None:
+        return {"status": "ignored"}
+    status = scheduler.submit(key, _head_sha(event), event)
+    return {"status": status, "pr": f"{key[0]}#{key[1]}", "head_sha": _head_sha(event)}
+
+
+def github_review_runner(event: Dict[str, Any], cancelled: threading.Event) -> Dict[str, Any] | None:
+    """Default runner: fetch the PR diff, review it, edit the summary comment and post new inline comments."""
+    from . import reviewer
+
+    repo, number = pr_key(event) or ("", 0)
+    client = github.default_client()
+    diff = client.pull_diff(repo, number)
+    if cancelled.is_set():
+        return None
+    out = reviewer.review_pr(diff)
+    if cancelled.is_set():
+        return None
+    # the summary lives in one comment edited in place; inline comments go out as one batched review
+    publisher.publish(client, repo, number, render.render_markdown({"review": out}))
+    inline = [f for f in out.get("findings", []) if f.get("file") and f.get("position")]
+    summary = f"## AutoPR review for {_head_sha(event)[:7]}"
+    publisher.publish_review(client, repo, number, positions.review_payload(inline, summary, commit_id=_head_sha(event) or None))
+    return out
+
+
+deliveries = DeliveryCache()
+scheduler = ReviewScheduler(github_review_runner, debounce_seconds=float(os.getenv("AUTOPR_WEBHOOK_DEBOUNCE_SECONDS", "30")))
@@ -0,0 +1,105 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(*parts):
+    return json.loads((FIXTURES.joinpath(*parts)).read_text(encoding="utf-8"))
+
+
+class FakeGitHub:
+    """Tiny local stand-in for the GitHub REST API.
+
+    Routes map (method, path) to a callable ``(handler, body) -> (status, headers, payload)``
+    or a static ``(status, payload)`` tuple. Every request is recorded in ``requests``.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        handler = self._make_handler()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def route(self, method, path, response):
+        self.routes[(method, path)] = response
+
+    def calls(self, method=None, path=None):
+        return [r for r in self.requests if (method is None or r["method"] == method) and (path is None or r["path"] == path)]
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                path, _, query = self.path.partition("?")
+                fake.requests.append({"method": method, "path": path, "query": query, "headers": dict(self.headers), "body": raw})
+                route = fake.routes.get((method, path))
+                if route is None:
+                    status, headers, payload = 404, {}, {"message": "Not Found"}
+                elif callable(route):
+                    status, headers, payload = route(self, raw)
+                else:
+                    status, payload = route
+                    headers = {}
+                data = payload if isinstance(payload, (bytes, str)) else json.dumps(payload)
+                data = data.encode("utf-8") if isinstance(data, str) else data
+                if not isinstance(payload, (bytes, str)):
+                    headers = {"Content-Type": "application/json", **headers}
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PATCH(self):
+                self._handle("PATCH")
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def _isolate_provider_env(monkeypatch):
+    # never let a developer's real provider endpoints/keys leak into tests
+    for name in ("OPENAI_BASE_URL", "ANTHROPIC_BASE_URL", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "AUTOPR_STREAM"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture(autouse=True)
+def _isolate_caches(monkeypatch, tmp_path_factory):
+    monkeypatch.setenv("AUTOPR_SYMBOL_CACHE_DIR", str(tmp_path_factory.mktemp("symbols")))
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    gh = FakeGitHub().start()
+    monkeypatch.setenv("GITHUB_API_URL", gh.url)
+    yield gh
+    gh.stop()
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from autopr import admission, reviewer
+from autopr.main import app
+
+
+def _diff(files, lines_per_file=1):
+    return "".join(f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n@@ -0,0 +1 @@\n" + "+x = 1\n" * lines_per_file for i in range(files))
+
+
+def test_measure_and_classify():
+    gate = admission.Admission(small_max_files=2, max_files=10)
+    assert admission.measure(_diff(3))["files"] == 3
+    assert admission.measure("+x = 1\n")["files"] == 1
+    assert gate.classify(admission.measure(_diff(2))) == "small"
+    assert gate.classify(admission.measure(_diff(3))) == "large"
+    with pytest.raises(admission.RequestTooLarge, match="11 files"):
+        gate.classify(admission.measure(_diff(11)))
+    assert gate.snapshot()["too_large"] == 1
+
+
+def test_large_lane_does_not_block_small_lane():
+    gate = admission.Admission(small_max_files=1, large_concurrency=1, max_queue=1, queue_timeout_seconds=0.05)
+
+    async def scenario():
+        entered, release = asyncio.Event(), asyncio.Event()
+
+        async def hold_large():
+            async with gate.admit(_diff(5)):
+                entered.set()
+                await release.wait()
+
+        task = asyncio.ensure_future(hold_large())
+        await asyncio.wait_for(entered.wait(), 2)
+        async with gate.admit(_diff(1)) as lane:
+            assert lane == "small"
+        with pytest.raises(admission.LaneBusy):
+            async with gate.admit(_diff(5)):
+                pass
+        release.set()
+        await task
+
+    asyncio.run(scenario())
+    stats = gate.snapshot()["lanes"]
+    assert stats["large"]["timed_out"] == 1 and stats["large"]["admitted"] == 1
+    assert stats["small"]["admitted"] == 1 and stats["small"]["queue_depth"] == 0
+
+
+def test_small_request_is_served_while_large_lane_is_saturated(monkeypatch):
+    # more large requests in flight than Starlette's 40 threadpool threads: only
+    # the admitted one may hold a thread, the rest wait on the event loop
+    monkeypatch.setattr(admission, "_gate", admission.Admission(small_max_files=1, large_concurrency=1, max_queue=64, queue_timeout_seconds=10))
+    release = threading.Event()
+
+    def fake_review(diff, **kwargs):
+        if admission.measure(diff)["files"] > 1:
+            release.wait(10)
+        return {"summary": "ok", "findings": [], "confidence": 1.0}
+
+    monkeypatch.setattr(reviewer, "review_pr", fake_review)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            large = [asyncio.ensure_future(client.post("/review", json={"diff": _diff(5)})) for _ in range(50)]
+            for _ in range(200):
+                if admission.gate().lanes["large"].waiting == 49:
+                    break
+                await asyncio.sleep(0.01)
+            assert admission.gate().lanes["large"].snapshot()["active"] == 1
+            small = await asyncio.wait_for(client.post("/review", json={"diff": _diff(1)}), 5)
+            release.set()
+            done = await asyncio.gather(*large)
+        return small, done
+
+    small, done = asyncio.run(scenario())
+    assert small.status_code == 200 and small.headers["X-AutoPR-Lane"] == "small"
+    assert all(r.status_code == 200 for r in done)
+
+
+def test_api_rejects_oversized_and_reports_lanes(monkeypatch):
+    monkeypatch.setattr(admission, "_gate", admission.Admission(max_bytes=1024))
+    client = TestClient(app)
+    r = client.post("/review", json={"diff": "+x = 1\n" * 400})
+    assert r.status_code == 413
+    assert "exceeds the limit" in r.json()["detail"]
+    r = client.post("/review", json={"diff": "+x = 1\n" * 4000})
+    assert r.status_code == 413  # refused from Content-Length alone
+    r = client.post("/review", json={"diff": "+x = 1\n"})
+    assert r.status_code == 200 and r.headers["X-AutoPR-Lane"] == "small"
+    lanes = client.get("/admission").json()["lanes"]
+    assert lanes["small"]["admitted"] == 1 and set(lanes) == {"small", "large"}
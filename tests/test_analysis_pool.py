@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from autopr import analysis_pool, reviewer
+
+
+@pytest.fixture
+def pool():
+    p = analysis_pool.AnalysisPool(workers=1, timeout=20, memory_limit_mb=300, maxtasksperchild=2)
+    yield p
+    p.close()
+
+
+def test_pool_matches_inline_and_keeps_input_order(pool):
+    files = [("a.py", "print(1)\n"), ("b.py", "import os\n# TODO\n" * 50), ("c.py", "x = 1 \n")]
+    assert pool.run(files) == [analysis_pool.analyze_file(p, t) for p, t in files]
+    assert pool.stats["files"] == 3
+
+
+def test_memory_ceiling_becomes_a_finding(pool):
+    huge_literal = "x = [" + "1," * 3_000_000 + "]\n"
+    (static, lint), small = pool.run([("gen.py", huge_literal), ("ok.py", "print(1)\n")])
+    assert static[0]["type"] == "analysis_memory_limit"
+    assert static[0]["file"] == "gen.py"
+    assert small[0][0]["type"] == "debug_print"
+
+
+def test_timeout_is_reported_and_other_files_still_analyzed():
+    p = analysis_pool.AnalysisPool(workers=1, timeout=0.2)
+    try:
+        fast, slow = p.run([("fast.py", "# TODO\n"), ("slow.py", "x = 1\n" * 100_000)])
+    finally:
+        p.close()
+    assert slow[0][0]["type"] == "analysis_timeout"
+    assert fast[0][0]["type"] == "todo"
+    assert p.stats["timeouts"] == 1 and p.stats["restarts"] == 1
+
+
+def test_review_uses_pool_for_large_diffs(monkeypatch):
+    monkeypatch.setenv("AUTOPR_ANALYSIS_WORKERS", "1")
+    monkeypatch.setattr(analysis_pool, "DEFAULTS", {**analysis_pool.DEFAULTS, "inline_max_bytes": 0})
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -1,0 +1,2 @@\n+print('x')\n+# TODO\n"
+    out = reviewer.review_pr(diff)
+    assert {("debug_print", 1), ("todo", 2)} <= {(f["type"], f.get("line")) for f in out["findings"]}
+    assert analysis_pool.get_pool().stats["files"] >= 1
+
+
+def test_reset_by_another_caller_resubmits_instead_of_timing_out():
+    p = analysis_pool.AnalysisPool(workers=1, timeout=30)
+    files = [("b.py", "x = 1\n" * 50_000)]
+    out = []
+    try:
+        worker = threading.Thread(target=lambda: out.append(p.run(files)))
+        worker.start()
+        for _ in range(200):
+            if p._pool is not None:
+                break
+            time.sleep(0.05)
+        time.sleep(0.3)
+        # what another review's timeout does: only the generation it saw is reset
+        generation = p._generation
+        p._reset(generation)
+        p._reset(generation)
+        worker.join(60)
+    finally:
+        p.close()
+    assert out == [[analysis_pool.analyze_file(*files[0])]]
+    assert p.stats["restarts"] == 1 and p.stats["timeouts"] == 0
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 
 from autopr.main import app
+from autopr.providers import ChatProvider
 
 
 client = TestClient(app)
@@ -58,3 +59,43 @@ def test_review_includes_static_findings():
     body = r.json()
     types = {f.get("type") for f in body.get("findings", [])}
     assert "debug_print" in types or "todo" in types
+
+
+def test_review_reports_findings_left_out(monkeypatch):
+    from autopr import findings
+
+    monkeypatch.setattr(findings, "DEFAULTS", {**findings.DEFAULTS, "max_per_type": 1, "aggregate_threshold": 100})
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -0,0 +1,3 @@\n+print(1)\n+print(2)\n+print(3)\n"
+    body = client.post("/review", json={"diff": diff}).json()
+    report = body["_findings"]
+    assert report["omitted"]["total"] >= 2
+    assert report["returned"] == len(body["findings"])
+    assert sum(1 for f in body["findings"] if f["type"] == "debug_print") == 1
+
+
+class _JSONProvider(ChatProvider):
+    provider_name = "fake"
+    model = "m"
+
+    def _chat(self, prompt):
+        return '{"title": "t", "what_changed": "w", "why": "y", "files_impacted": [], "tests": "", "risk_level": "low", "rollback_plan": "", "summary": "ok", "findings": [], "confidence": 0.5}'
+
+
+def test_responses_carry_per_call_token_usage(monkeypatch):
+    from autopr import generator, reviewer
+
+    monkeypatch.setattr(generator, "llm", _JSONProvider())
+    monkeypatch.setattr(reviewer, "llm", _JSONProvider())
+    for endpoint, payload in (("/generate", {"diff": "+x = 1\n", "commits": []}), ("/review", {"diff": "+x = 1\n"})):
+        usage = client.post(endpoint, json=payload).json()["_usage"]
+        assert usage["calls"] == 1 and usage["prompt_tokens"] > 0 and usage["completion_tokens"] > 0
+
+
+def test_responses_report_filtered_files():
+    diff = ("diff --git a/app.py b/app.py\n--- a/app.py\n+++ b/app.py\n@@ -0,0 +1 @@\n+x = 1\n"
+            "diff --git a/package-lock.json b/package-lock.json\n--- a/package-lock.json\n+++ b/package-lock.json\n@@ -0,0 +1,2 @@\n"
+            + '+"lockfileVersion": 3,\n+"requires": true\n')
+    for endpoint, payload in (("/generate", {"diff": diff, "commits": []}), ("/review", {"diff": diff})):
+        filtered = client.post(endpoint, json=payload).json()["_filtered"]
+        assert filtered["excluded_files"] == ["package-lock.json"]
+        assert filtered["tokens_saved"] > 0
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from autopr import cache
+from autopr.providers import ChatProvider
+
+
+def test_set_get_and_ttl(tmp_path):
+    c = cache.DiskCache(str(tmp_path))
+    assert c.get("k") is None
+    c.set("k", {"a": [1, 2]})
+    assert c.get("k") == {"a": [1, 2]}
+    assert not [p for p in tmp_path.rglob(".tmp-*")]
+    short = cache.DiskCache(str(tmp_path), ttl=0.01)
+    time.sleep(0.05)
+    assert short.get("k", "expired") == "expired"
+    assert not list(tmp_path.rglob("*.json"))  # expired entries are deleted
+
+
+def test_get_or_set_removes_lock_files(tmp_path):
+    c = cache.DiskCache(str(tmp_path))
+    assert c.get_or_set("k", lambda: 1) == 1
+    assert c.get_or_set("k", lambda: 2) == 1
+    assert not list(tmp_path.rglob("*.lock"))
+
+
+def test_shared_cache_is_size_bounded(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTOPR_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache.config, "get_section", lambda name: {"max_mb": 0.5} if name == "cache" else {})
+    monkeypatch.setattr(cache, "_shared", None)
+    shared = cache.shared_cache()
+    assert shared.max_bytes == 512 * 1024
+    monkeypatch.setattr(cache.config, "get_section", lambda name: {})
+    monkeypatch.setattr(cache, "_shared", None)
+    assert cache.shared_cache().max_bytes == 256 * 1024 * 1024
+
+
+def _compute_once(directory, marker):
+    c = cache.DiskCache(directory)
+
+    def compute():
+        with open(marker, "a") as f:
+            f.write("x")
+        time.sleep(0.2)
+        return os.getpid()
+
+    c.get_or_set("shared", compute)
+
+
+@pytest.mark.skipif(cache.fcntl is None, reason="needs fcntl")
+def test_get_or_set_computes_once_across_processes(tmp_path):
+    marker = tmp_path / "computed"
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_compute_once, args=(str(tmp_path / "c"), str(marker))) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(10)
+    assert marker.read_text() == "x"
+
+
+class CountingProvider(ChatProvider):
+    provider_name = "counting"
+    model = "m"
+
+    def __init__(self):
+        self.calls = 0
+
+    def _chat(self, prompt):
+        self.calls += 1
+        return '{"summary": "ok", "findings": [], "confidence": 0.5}'
+
+
+def test_provider_replies_are_cached_when_configured(tmp_path, monkeypatch):
+    monkeypatch.setenv("AUTOPR_CACHE_DIR", str(tmp_path))
+    p = CountingProvider()
+    first = p.review_code("+x = 1\n")
+    second = p.review_code("+x = 1\n")
+    assert p.calls == 1
+    assert "cached" not in first["_usage"]
+    assert second["_usage"]["cached"] == 1
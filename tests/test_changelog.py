@@ -0,0 +1,70 @@
+import subprocess
+
+import pytest
+
+from autopr import changelog
+from autopr.providers import StubProvider
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _commit(repo, message):
+    _git(repo, "commit", "-q", "--allow-empty", "-m", message)
+
+
+class CountingStub(StubProvider):
+    def __init__(self):
+        self.prompts = []
+
+    def summarize_changes(self, groups):
+        self.prompts.append(groups)
+        return super().summarize_changes(groups)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    _commit(tmp_path, "chore: initial")
+    _git(tmp_path, "tag", "v1")
+    _commit(tmp_path, "feat(api): add deadlines (#12)")
+    _commit(tmp_path, "fix: handle empty diff")
+    _commit(tmp_path, "feat!: drop python 3.8\n\nBREAKING CHANGE: 3.9+ only")
+    _commit(tmp_path, "update readme")
+    return tmp_path
+
+
+def test_classify_conventional_and_pr():
+    c = changelog.classify({"sha": "a", "subject": "fix(parser): skip binary files (#7)", "body": ""})
+    assert (c["type"], c["scope"], c["description"], c["pr"], c["breaking"]) == ("fix", "parser", "skip binary files", 7, False)
+    merge = changelog.classify({"sha": "b", "subject": "Merge pull request #9 from o/branch", "body": "perf: faster scan\n\ndetails"})
+    assert (merge["type"], merge["pr"], merge["description"]) == ("perf", 9, "faster scan")
+    assert changelog.classify({"sha": "c", "subject": "wip", "body": ""})["type"] == "other"
+
+
+def test_groups_chunk_commits_without_pr(monkeypatch):
+    monkeypatch.setattr(changelog, "CHUNK", 2)
+    commits = [{"sha": str(i), "subject": f"fix: bug {i}", "body": ""} for i in range(5)]
+    commits.append({"sha": "p", "subject": "fix: part of a PR (#3)", "body": ""})
+    groups = changelog.group_commits(iter(commits))
+    assert [len(g["commits"]) for g in groups] == [2, 2, 1, 1]
+    assert groups[-1]["pr"] == 3
+
+
+def test_changelog_streams_groups_and_reuses_cached_summaries(repo, monkeypatch):
+    stub = CountingStub()
+    monkeypatch.setattr(changelog, "llm", stub)
+    out = changelog.generate(str(repo), "v1..HEAD", batch_size=2)
+    md = out["markdown"]
+    assert md.index("## ⚠️ Breaking changes") < md.index("## Features") < md.index("## Bug fixes") < md.index("## Other changes")
+    assert "- add deadlines (#12)" in md and "- drop python 3.8" in md
+    assert "initial" not in md
+    assert out["stats"] == {"groups": 4, "cached": 0, "summarized": 4, "calls": 2, "commits": 4}
+
+    _commit(repo, "fix: one more (#13)")
+    again = changelog.generate(str(repo), "v1..HEAD", batch_size=2)
+    assert again["stats"]["cached"] == 4 and again["stats"]["summarized"] == 1
+    assert "PR #13" in stub.prompts[-1] and "deadlines" not in stub.prompts[-1]
@@ -36,3 +36,74 @@ tests/test_example.py:5: AssertionError
     res = ci_parser.parse_pytest_output(log)
     assert res["failed"] == 1
     assert len(res["failures"]) >= 1
+
+
+def _shard_log(passed, failed_names, seconds):
+    lines = ["============================= test session starts ==============================", ""]
+    if failed_names:
+        lines.append("=================================== FAILURES ===================================")
+        for name in failed_names:
+            lines += [f"_____________________________ {name} _____________________________", f"AssertionError: {name} broke", ""]
+    counts = ([f"{len(failed_names)} failed"] if failed_names else []) + [f"{passed} passed"]
+    lines.append(f"========================= {', '.join(counts)} in {seconds}s =========================")
+    return "\n".join(lines) + "\n"
+
+
+def test_summary_line_wins_over_earlier_mentions():
+    log = "print output: 99 passed earlier\n" + _shard_log(3, ["test_x"], 1.5)
+    res = ci_parser.parse_pytest_output(log)
+    assert (res["passed"], res["failed"], res["total"], res["duration"]) == (3, 1, 4, 1.5)
+    assert res["failures"] == [{"name": "test_x", "message": "AssertionError: test_x broke"}]
+
+
+def test_parse_logs_merges_shards(tmp_path):
+    (tmp_path / "shard-1.log").write_text(_shard_log(5, ["test_a"], 12.0))
+    (tmp_path / "shard-2.log").write_text(_shard_log(4, ["test_a", "test_b"], 30.5))
+    (tmp_path / "shard-3.log").write_text(_shard_log(6, [], 3.0))
+    paths = ci_parser.expand_logs(str(tmp_path))
+    assert ci_parser.expand_logs(str(tmp_path / "shard-*.log")) == paths
+    res = ci_parser.parse_logs(paths, workers=2)
+    assert (res["passed"], res["failed"]) == (15, 3)
+    assert [(f["name"], f["shards"]) for f in res["failures"]] == [("test_a", ["shard-1.log", "shard-2.log"]), ("test_b", ["shard-2.log"])]
+    assert [s["shard"] for s in res["slowest_shards"]] == ["shard-2.log", "shard-1.log", "shard-3.log"]
+    assert res["shards"][2]["passed"] == 6
+
+
+JUNIT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites><testsuite name="pytest" tests="4" time="3.5">
+<testcase classname="tests.test_a" name="test_ok" time="0.1"/>
+<testcase classname="tests.test_a" name="test_slow" time="2.5"/>
+<testcase classname="tests.test_a" name="test_bad" time="0.2"><failure message="assert 1 == 2">trace</failure></testcase>
+<testcase classname="tests.test_a" name="test_skip" time="0.0"><skipped message="later"/></testcase>
+</testsuite></testsuites>
+"""
+
+
+def test_parse_junit_xml(tmp_path):
+    path = tmp_path / "junit.xml"
+    path.write_text(JUNIT)
+    res = ci_parser.parse_report_file(str(path))
+    assert (res["passed"], res["failed"], res["skipped"], res["total"], res["duration"]) == (2, 1, 1, 4, 3.5)
+    assert res["failures"] == [{"name": "tests.test_a::test_bad", "message": "assert 1 == 2"}]
+    assert res["durations"]["tests.test_a::test_slow"] == 2.5
+
+
+def test_parse_reportlog_and_slower_tests(tmp_path):
+    import json
+
+    def rec(nodeid, when, outcome, duration, **extra):
+        return json.dumps({"$report_type": "TestReport", "nodeid": nodeid, "when": when, "outcome": outcome, "duration": duration, **extra})
+
+    lines = [json.dumps({"$report_type": "SessionStart", "pytest_version": "8"})]
+    for nodeid, outcome, duration in (("tests/test_b.py::test_fast", "passed", 0.1), ("tests/test_b.py::test_grew", "passed", 3.0)):
+        lines += [rec(nodeid, "setup", "passed", 0.0), rec(nodeid, "call", outcome, duration), rec(nodeid, "teardown", "passed", 0.0)]
+    lines += [rec("tests/test_b.py::test_err", "setup", "failed", 0.0, longrepr={"reprcrash": {"message": "fixture broke"}}),
+              rec("tests/test_b.py::test_err", "teardown", "passed", 0.0)]
+    path = tmp_path / "report.log"
+    path.write_text("\n".join(lines) + "\n")
+    head = ci_parser.parse_report_file(str(path))
+    assert (head["passed"], head["errors"], head["total"]) == (2, 1, 3)
+    assert head["failures"] == [{"name": "tests/test_b.py::test_err", "message": "fixture broke"}]
+
+    base = {"durations": {"tests/test_b.py::test_fast": 0.1, "tests/test_b.py::test_grew": 1.0}}
+    assert ci_parser.slower_tests(base, head) == [{"name": "tests/test_b.py::test_grew", "before": 1.0, "after": 3.0}]
@@ -16,3 +16,42 @@ def test_cli_gen_and_review():
     ra = runner.invoke(cli, ["analyze", "--diff", "+def foo():\n+    print('x')\n+    # TODO", "--lang", "python"])
     assert ra.exit_code == 0
     assert "debug_print" in ra.output or "TODO" in ra.output
+
+
+def test_cli_diff_file_and_stdin(tmp_path):
+    runner = CliRunner()
+    p = tmp_path / "pr.diff"
+    p.write_text("+++ b/foo.py\n@@ -0,0 +1,2 @@\n+def foo():\n+    print('x')\n", encoding="utf-8")
+    r = runner.invoke(cli, ["analyze", "--diff-file", str(p)])
+    assert r.exit_code == 0
+    assert '"file": "foo.py"' in r.output
+
+    r2 = runner.invoke(cli, ["review", "--diff", "-"], input="print('x')\n# TODO: fix\n")
+    assert r2.exit_code == 0
+    assert "findings" in r2.output
+
+    r3 = runner.invoke(cli, ["review"])
+    assert r3.exit_code != 0
+
+
+def test_cli_git_range(tmp_path):
+    import subprocess
+
+    def git(*args):
+        subprocess.run(["git", "-C", str(tmp_path), *args], check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "t@example.com")
+    git("config", "user.name", "t")
+    (tmp_path / "a.py").write_text("x = 1\n")
+    (tmp_path / "blob.bin").write_bytes(b"\x00\x01")
+    git("add", ".")
+    git("commit", "-qm", "base")
+    (tmp_path / "a.py").write_text("x = 1\nprint(x)\n")
+    (tmp_path / "blob.bin").write_bytes(b"\x00\x02")
+    git("commit", "-qam", "head")
+
+    r = CliRunner().invoke(cli, ["analyze", "--git-range", "HEAD~1..HEAD", "--repo", str(tmp_path)])
+    assert r.exit_code == 0, r.output
+    assert "debug_print" in r.output
+    assert "blob.bin" not in r.output
@@ -0,0 +1,74 @@
+import pytest
+
+from autopr import compaction, reviewer
+
+
+def _file(path, hunks):
+    out = [f"diff --git a/{path} b/{path}", "index 1111111..2222222 100644", f"--- a/{path}", f"+++ b/{path}"]
+    for h in hunks:
+        out.extend(h)
+    return out
+
+
+CONTEXT = [" line %d" % i for i in range(1, 11)]
+
+
+def test_context_is_trimmed_and_lines_are_addressable():
+    hunk = ["@@ -1,20 +1,21 @@"] + CONTEXT + ["+added = True"] + CONTEXT
+    diff = "\n".join(_file("src/app.py", [hunk]))
+    text, stats = compaction.compact_diff(diff, context_radius=1)
+    assert text.splitlines()[0] == "F1 src/app.py"
+    assert "11+ added = True" in text
+    assert "10  line 10" in text and "12  line 1" in text
+    assert "line 5" not in text
+    assert stats["context_dropped"] == 18
+    assert compaction.resolve("F1:11", stats["files"]) == ("src/app.py", 11)
+    assert compaction.resolve("F9:1", stats["files"]) is None
+
+
+def test_whitespace_only_hunks_are_folded():
+    hunk = ["@@ -3,2 +3,2 @@", "-def f(a,b):", "-    return a+b", "+def f(a, b):", "+    return a + b"]
+    text, stats = compaction.compact_diff("\n".join(_file("m.py", [hunk])))
+    assert "whitespace-only change" in text
+    assert "return a + b" not in text
+    assert stats["whitespace_folded"] == 1
+
+
+def test_repeated_hunks_collapse_to_one_example():
+    files = []
+    for i in range(5):
+        files += _file(f"pkg/mod{i}.py", [[f"@@ -{i + 1},1 +{i + 1},1 @@", "-from old_name import thing", "+from new_name import thing"]])
+    text, stats = compaction.compact_diff("\n".join(files))
+    assert text.count("new_name") == 1
+    assert "same change repeated 4 more time(s): F2:2, F3:3, F4:4, F5:5" in text
+    assert stats["repeats_collapsed"] == 4
+
+
+def test_snippets_pass_through():
+    snippet = "print('x')\n# TODO"
+    assert compaction.compact_diff(snippet)[0] == snippet
+
+
+class _FixedReview:
+    def __init__(self, findings):
+        self.findings = findings
+
+    def review_code(self, diff):
+        return {"summary": "", "findings": self.findings, "confidence": 0.5}
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_ai_findings_keep_real_paths_with_or_without_compaction(monkeypatch, enabled):
+    monkeypatch.setattr(reviewer.config, "get_section", lambda name: {"enabled": enabled} if name == "compaction" else {})
+    monkeypatch.setattr(reviewer, "llm", _FixedReview([
+        {"type": "perf", "message": "compact ref", "file": "F1", "line": 2},
+        {"type": "bug", "message": "real path", "file": "src/app.py", "line": 1},
+        {"type": "style", "message": "unknown path", "file": "elsewhere.py", "line": 1},
+    ]))
+    diff = "\n".join(_file("src/app.py", [["@@ -0,0 +1,2 @@", "+a = 1", "+b = 2"]])) + "\n"
+    found = {f["message"]: f for f in reviewer.review_pr(diff)["findings"] if f.get("source") == "ai"}
+    assert (found["real path"]["file"], found["real path"]["line"]) == ("src/app.py", 1)
+    assert "position" in found["real path"]
+    if enabled:
+        assert (found["compact ref"]["file"], found["compact ref"]["line"]) == ("src/app.py", 2)
+    assert "file" not in found["unknown path"]
@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from autopr import deadline, generator, reviewer
+from autopr.providers import ChatProvider, FailoverProvider, StubProvider
+
+
+class SlowStub(StubProvider):
+    def __init__(self, delay):
+        self.delay = delay
+
+    def review_code(self, diff):
+        time.sleep(self.delay)
+        return super().review_code(diff)
+
+    def generate_pr_description(self, diff, commits, issue):
+        time.sleep(self.delay)
+        return super().generate_pr_description(diff, commits, issue)
+
+
+class SlowChat(ChatProvider):
+    model = "test"
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    def _chat(self, prompt):
+        self.calls += 1
+        time.sleep(self.delay)
+        return '{"summary": "chunk", "findings": [{"type": "ai", "message": "m%d", "severity": "low"}], "confidence": 0.5}' % self.calls
+
+
+def test_parse():
+    assert deadline.parse("30") == 30.0
+    assert deadline.parse("2.5s") == 2.5
+    assert deadline.parse("1500ms") == 1.5
+    assert deadline.parse("") is None
+    with pytest.raises(ValueError):
+        deadline.parse("-1")
+
+
+def test_review_returns_partial_result_when_llm_is_late(monkeypatch):
+    monkeypatch.setattr(reviewer, "llm", SlowStub(2.0))
+    start = time.monotonic()
+    out = reviewer.review_pr("print('x')\n", deadline=0.3, coverage_before="TOTAL 10 5 50%", coverage_after="TOTAL 10 4 60%")
+    assert time.monotonic() - start < 1.5
+    assert out["_partial"] is True
+    assert out["_skipped_stages"] == ["llm_review", "coverage"]
+    # deterministic checks still ran
+    assert "debug_print" in {f["type"] for f in out["findings"]}
+
+
+def test_review_within_budget_is_complete(monkeypatch):
+    monkeypatch.setattr(reviewer, "llm", SlowStub(0.0))
+    out = reviewer.review_pr("print('x')\n# TODO\n", deadline=10)
+    assert "_partial" not in out
+    assert out["summary"] == "Minimal automated review"
+
+
+def test_generate_falls_back_without_llm(monkeypatch):
+    monkeypatch.setattr(generator, "llm", SlowStub(2.0))
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -0,0 +1 @@\n+x = 1\n"
+    out = generator.generate_pr_from(diff, ["fix: handle empty input"], deadline=0.2)
+    assert out["title"] == "fix: handle empty input"
+    assert out["_skipped_stages"] == ["llm_description"]
+
+
+def test_chunked_review_stops_between_chunks(monkeypatch):
+    monkeypatch.setenv("AUTOPR_MAX_PROMPT_TOKENS", "1400")
+    provider = SlowChat(0.3)
+    diff = "".join(f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n@@ -0,0 +1 @@\n" + "+value = compute(value)\n" * 60 for i in range(6))
+    with deadline.budget(0.45):
+        out = provider.review_code(diff)
+    assert out["_usage"]["chunks"] > provider.calls >= 1
+    assert out["_usage"]["partial"] is True
+
+
+def test_failover_chain_gives_up_at_the_deadline():
+    fp = FailoverProvider([SlowStub(1.0), SlowStub(1.0)], hedge_delay=0.05)
+    start = time.monotonic()
+    with deadline.budget(0.2), pytest.raises(deadline.DeadlineExceeded):
+        fp.review_code("+x")
+    assert time.monotonic() - start < 0.6
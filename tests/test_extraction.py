@@ -0,0 +1,23 @@
+from autopr.extraction import extract_json
+
+
+def test_extracts_fenced_json_with_prose_and_trailing_commas():
+    text = 'Here is the review:\n```json\n{"summary": "ok", "findings": [{"type": "x", "message": "m",},], "confidence": 0.7,}\n```\nLet me know!'
+    assert extract_json(text) == {"summary": "ok", "findings": [{"type": "x", "message": "m"}], "confidence": 0.7}
+
+
+def test_extracts_object_embedded_in_prose():
+    text = 'Sure. {"title": "Fix {edge} case", "risk_level": "low"} Hope this helps {"not": "this"}'
+    assert extract_json(text) == {"title": "Fix {edge} case", "risk_level": "low"}
+
+
+def test_repairs_truncated_tail():
+    text = '{"summary": "partial", "findings": [{"type": "todo", "message": "TODO left"}, {"type": "debug", "mess'
+    out = extract_json(text)
+    assert out["summary"] == "partial"
+    assert out["findings"][0]["type"] == "todo"
+
+
+def test_returns_none_without_object():
+    assert extract_json("I could not review this diff.") is None
+    assert extract_json(None) is None
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from autopr.providers import CircuitBreaker, FailoverProvider, StubProvider
+
+
+class SlowProvider(StubProvider):
+    def __init__(self, delay, name, fail=False):
+        self.delay = delay
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    def review_code(self, diff):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return {"summary": self.name, "findings": [], "confidence": 0.5}
+
+
+def test_hedged_request_takes_faster_secondary():
+    slow = SlowProvider(1.0, "primary")
+    fast = SlowProvider(0.01, "secondary")
+    fp = FailoverProvider([slow, fast], hedge_delay=0.05)
+    start = time.monotonic()
+    out = fp.review_code("+x")
+    assert out["summary"] == "secondary"
+    assert time.monotonic() - start < 0.5
+    assert fp.stats["hedges"] == 1
+
+
+def test_no_hedge_when_primary_is_fast():
+    primary = SlowProvider(0.0, "primary")
+    secondary = SlowProvider(0.0, "secondary")
+    fp = FailoverProvider([primary, secondary], hedge_delay=0.5)
+    assert fp.review_code("+x")["summary"] == "primary"
+    assert secondary.calls == 0
+
+
+def test_failover_and_circuit_breaker_skip_failing_primary():
+    bad = SlowProvider(0.0, "bad", fail=True)
+    good = SlowProvider(0.0, "good")
+    fp = FailoverProvider([bad, good], hedge=False, breaker_factory=lambda: CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(4):
+        assert fp.review_code("+x")["summary"] == "good"
+    # breaker opened after two failures, so the bad provider was not retried
+    assert bad.calls == 2
+    assert fp.breakers[0].state == "open"
+
+
+def test_all_providers_failing_raises():
+    fp = FailoverProvider([SlowProvider(0.0, "a", fail=True), SlowProvider(0.0, "b", fail=True)], hedge=False)
+    with pytest.raises(RuntimeError):
+        fp.review_code("+x")
+
+
+def test_breaker_half_opens_after_timeout():
+    br = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    br.record_failure()
+    assert not br.allow()
+    time.sleep(0.06)
+    assert br.state == "half_open" and br.allow()
+    br.record_success()
+    assert br.state == "closed"
+
+
+def test_half_open_breaker_allows_a_single_probe():
+    br = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    br.record_failure()
+    time.sleep(0.06)
+    assert br.state == "half_open"
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(br.allow())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results.count(True) == 1
+    assert br.state == "open" and not br.allow()
+    br.record_failure()  # the probe failed: another cool-down
+    assert not br.allow()
+    time.sleep(0.06)
+    assert br.allow() and not br.allow()
+    br.record_success()
+    assert br.state == "closed" and br.allow() and br.allow()
+
+
+def test_probe_is_claimed_only_by_a_call_that_reaches_the_provider():
+    bad, good = SlowProvider(0.0, "bad", fail=True), SlowProvider(0.0, "good")
+    fp = FailoverProvider([good, bad], hedge=False, breaker_factory=lambda: CircuitBreaker(failure_threshold=1, reset_timeout=0.05))
+    fp.breakers[1].record_failure()
+    time.sleep(0.06)
+    for _ in range(3):
+        fp.review_code("+x")
+    # the healthy primary answered every call, so the secondary's probe is still available
+    assert fp.breakers[1].state == "half_open"
@@ -0,0 +1,45 @@
+from autopr import findings, reviewer
+
+
+def test_dedupe_across_sources_keeps_highest_severity():
+    raw = [
+        {"type": "todo", "message": "Found TODOs in changes", "severity": "low", "source": "ai"},
+        {"type": "todo", "message": "TODO found in added code", "line": 3, "severity": "low", "source": "static"},
+        {"type": "debug", "message": "print here", "line": 5, "severity": "low"},
+        {"type": "debug_print", "message": "Found print() call", "line": 5, "severity": "medium"},
+    ]
+    out, dropped = findings.dedupe(raw)
+    assert dropped == 2
+    assert [f["type"] for f in out] == ["todo", "debug"]
+    assert out[1]["severity"] == "medium"
+
+
+def test_aggregate_collapses_repeated_low_severity_per_file():
+    raw = [{"type": "long_line", "message": "Line exceeds 120 characters", "line": i, "severity": "low", "file": "app.min.js"} for i in range(1, 1001)]
+    raw.append({"type": "long_line", "message": "Line exceeds 120 characters", "line": 1, "severity": "low", "file": "other.py"})
+    out, stats = findings.aggregate(raw, threshold=3)
+    assert len(out) == 2
+    assert out[0]["count"] == 1000
+    assert out[0]["lines"][:3] == [1, 2, 3]
+    assert stats == {"groups": 1, "findings": 1000}
+
+
+def test_process_ranks_caps_and_counts_omissions():
+    raw = [{"type": "style", "message": f"style {i}", "line": i, "severity": "low"} for i in range(10)]
+    raw += [{"type": "unsafe_eval", "message": "eval", "severity": "high"}]
+    raw += [{"type": "style", "message": "style 0", "line": 0, "severity": "low"}]
+    out, report = findings.process(raw, {"max_per_type": 4, "max_total": 3, "aggregate_threshold": 100})
+    assert out[0]["type"] == "unsafe_eval"
+    assert len(out) == 3
+    assert report["duplicates"] == 1
+    assert report["omitted"] == {"total": 8, "by_type": {"style": 8}, "by_severity": {"low": 8}}
+    assert report["input"] == report["returned"] + report["duplicates"] + report["omitted"]["total"]
+
+
+def test_review_pr_reports_findings_processing():
+    diff = "\n".join("+x = 1 " for _ in range(50)) + "\n+# TODO: tidy\n"
+    out = reviewer.review_pr(diff)
+    ws = [f for f in out["findings"] if f["type"] == "trailing_whitespace"]
+    assert len(ws) == 1 and ws[0]["count"] == 50
+    assert len([f for f in out["findings"] if f["type"] == "todo"]) == 1
+    assert out["_findings"]["aggregated"]["findings"] >= 50
@@ -0,0 +1,81 @@
+import pytest
+
+from autopr import github
+
+
+def _client(fake_github, **kwargs):
+    sleeps = []
+    client = github.GitHubClient(token="t", base_url=fake_github.url, min_write_interval=0, sleep=sleeps.append, **kwargs)
+    return client, sleeps
+
+
+def _paged(fake_github, path, pages):
+    def handler(req, body):
+        query = dict(p.split("=") for p in req.path.partition("?")[2].split("&") if p)
+        page = int(query.get("page", 1))
+        headers = {}
+        if page < len(pages):
+            headers["Link"] = f'<{fake_github.url}{path}?per_page={query.get("per_page")}&page={page + 1}>; rel="next"'
+        return 200, headers, pages[page - 1]
+
+    fake_github.route("GET", path, handler)
+
+
+def test_pagination_is_lazy(fake_github):
+    _paged(fake_github, "/repos/octo/demo/pulls/7/files", [[{"filename": "a.py"}, {"filename": "b.py"}], [{"filename": "c.py"}], [{"filename": "d.py"}]])
+    client, _ = _client(fake_github)
+    files = client.pull_files("octo/demo", 7)
+    assert next(files)["filename"] == "a.py"
+    assert len(fake_github.calls("GET")) == 1
+    assert [f["filename"] for f in files] == ["b.py", "c.py", "d.py"]
+    calls = fake_github.calls("GET")
+    assert len(calls) == 3
+    assert "per_page=100" in calls[0]["query"] and "page=3" in calls[2]["query"]
+
+
+def test_etag_revalidation_serves_304_from_cache(fake_github):
+    def handler(req, body):
+        if req.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"ETag": '"v1"'}, {"number": 7, "title": "Demo"}
+
+    fake_github.route("GET", "/repos/octo/demo/pulls/7", handler)
+    client, _ = _client(fake_github)
+    assert client.pull_request("octo/demo", 7)["title"] == "Demo"
+    assert client.pull_request("octo/demo", 7)["title"] == "Demo"
+    assert client.stats["not_modified"] == 1
+    assert fake_github.calls("GET")[1]["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_secondary_rate_limit_is_waited_out(fake_github):
+    attempts = []
+
+    def handler(req, body):
+        attempts.append(1)
+        if len(attempts) == 1:
+            return 403, {"Retry-After": "7"}, {"message": "You have exceeded a secondary rate limit"}
+        return 200, {}, {"id": 1}
+
+    fake_github.route("POST", "/repos/octo/demo/pulls/7/reviews", handler)
+    client, sleeps = _client(fake_github)
+    assert client.create_review("octo/demo", 7, {"body": "x", "event": "COMMENT", "comments": []}) == {"id": 1}
+    assert sleeps == [7.0]
+    assert client.stats["rate_limit_waits"] == 1
+
+
+def test_rate_limit_beyond_max_wait_raises(fake_github):
+    fake_github.route("GET", "/repos/octo/demo/pulls/7", (429, {"message": "slow down"}))
+    client, _ = _client(fake_github, max_wait=5)
+    with pytest.raises(github.RateLimited):
+        client.pull_request("octo/demo", 7)
+
+
+def test_errors_and_diff_accept_header(fake_github):
+    fake_github.route("GET", "/repos/octo/demo/pulls/8", (404, {"message": "Not Found"}))
+    fake_github.route("GET", "/repos/octo/demo/pulls/7", (200, "diff --git a/a b/a\n"))
+    client, _ = _client(fake_github)
+    with pytest.raises(github.GitHubError) as exc:
+        client.pull_request("octo/demo", 8)
+    assert exc.value.status == 404
+    assert client.pull_diff("octo/demo", 7).startswith("diff --git")
+    assert fake_github.calls("GET")[-1]["headers"]["Accept"] == "application/vnd.github.v3.diff"
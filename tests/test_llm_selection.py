@@ -29,3 +29,28 @@ def test_autopr_provider_anthropic_missing(monkeypatch):
     import autopr.llm as llm_mod
     importlib.reload(llm_mod)
     assert llm_mod.llm is not None
+
+
+def test_autopr_provider_chain_builds_failover(monkeypatch):
+    monkeypatch.setenv('AUTOPR_PROVIDER', 'openai,anthropic')
+    monkeypatch.setitem(sys.modules, 'openai', types.SimpleNamespace())
+    monkeypatch.setitem(sys.modules, 'anthropic', types.SimpleNamespace(Client=lambda api_key=None: object()))
+    import autopr.llm as llm_mod
+    importlib.reload(llm_mod)
+    from autopr.providers import FailoverProvider
+    assert isinstance(llm_mod.llm, FailoverProvider)
+    assert len(llm_mod.llm.providers) == 2
+    monkeypatch.setenv('AUTOPR_PROVIDER', 'stub')
+    importlib.reload(llm_mod)
+
+
+def test_autopr_provider_chain_keeps_stub_fallback(monkeypatch):
+    monkeypatch.setenv('AUTOPR_PROVIDER', 'anthropic,stub')
+    monkeypatch.setitem(sys.modules, 'anthropic', types.SimpleNamespace(Client=lambda api_key=None: object()))
+    import autopr.llm as llm_mod
+    importlib.reload(llm_mod)
+    from autopr.providers import FailoverProvider, StubProvider
+    assert isinstance(llm_mod.llm, FailoverProvider)
+    assert isinstance(llm_mod.llm.providers[-1], StubProvider)
+    monkeypatch.setenv('AUTOPR_PROVIDER', 'stub')
+    importlib.reload(llm_mod)
@@ -0,0 +1,83 @@
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from autopr import admission, loadtest
+from autopr.fakellm import FakeLLMServer, parse_latency
+from autopr.main import app
+
+
+def test_parse_latency_distributions():
+    import random
+
+    rng = random.Random(1)
+    assert parse_latency("const:0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+    assert parse_latency(None)(rng) == 0.0
+    with pytest.raises(ValueError):
+        parse_latency("uniform:0.1")
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+
+
+def test_fake_llm_injects_latency_and_rate_limits():
+    with FakeLLMServer(latency="const:0.05", rate_limit_rate=1.0, retry_after=3, seed=0) as fake:
+        t0 = time.perf_counter()
+        r = httpx.post(fake.url + "/v1/chat/completions", json={"messages": [{"role": "user", "content": "hi"}]})
+        assert time.perf_counter() - t0 >= 0.05
+        assert r.status_code == 429
+        assert r.headers["Retry-After"] == "3"
+        assert fake.stats["rate_limited"] == 1
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert loadtest.percentile(values, 50) == 50
+    assert loadtest.percentile(values, 99) == 99
+    assert loadtest.percentile([], 95) == 0.0
+
+
+def test_load_corpus_reads_directory(tmp_path):
+    (tmp_path / "a.diff").write_text("+print('x')\n")
+    (tmp_path / "b.patch").write_text("+# TODO\n")
+    (tmp_path / "notes.txt").write_text("ignored")
+    assert len(loadtest.load_corpus(str(tmp_path))) == 2
+    with pytest.raises(ValueError):
+        loadtest.load_corpus(str(tmp_path / "missing"))
+
+
+def test_closed_loop_run_reports_per_endpoint_stats():
+    client = TestClient(app)
+    report = loadtest.run_loadtest("", ["+print('x')\n", "+# TODO\n"], concurrency=2, max_requests=8, client=client)
+    assert report["mode"] == "closed"
+    assert report["requests"] == 8
+    assert report["errors"] == 0
+    assert set(report["endpoints"]) == {"review", "generate"}
+    review = report["endpoints"]["review"]
+    assert review["status"] == {"200": 4}
+    assert review["latency_ms"]["p50"] <= review["latency_ms"]["max"]
+    assert report["rss_kb"]["end"]
+
+
+def test_open_loop_run_counts_errors(monkeypatch):
+    # diffs over max_bytes are refused with 413, which the report must count as errors
+    monkeypatch.setattr(admission, "_gate", admission.Admission(max_bytes=16))
+    client = TestClient(app)
+    report = loadtest.run_loadtest("", ["+x\n", "+" + "y" * 64 + "\n"], endpoints=["review"], rps=200, max_requests=6, client=client)
+    assert report["mode"] == "open"
+    review = report["endpoints"]["review"]
+    assert review["requests"] == 6
+    assert review["status"] == {"200": 3, "413": 3}
+    assert review["errors"] == 3 and report["errors"] == 3 and report["error_rate"] == 0.5
+
+
+def test_rss_kb_converts_macos_bytes(monkeypatch):
+    import resource
+
+    monkeypatch.setattr(resource, "getrusage", lambda who: type("R", (), {"ru_maxrss": 4 * 1024 * 1024})())
+    monkeypatch.setattr(loadtest.sys, "platform", "darwin")
+    assert loadtest.rss_kb() == 4096
+    monkeypatch.setattr(loadtest.sys, "platform", "linux")
+    assert loadtest.rss_kb() == 4 * 1024 * 1024
@@ -15,3 +15,36 @@ def test_parse_diff_basic():
     assert "src/foo.py" in out["files_changed"]
     assert out["added_lines"] >= 2
     assert "added" in ",".join(out["added_functions"]) or "added" # quick contains check
+
+
+def test_iter_file_diffs_splits_files_and_skips_binary():
+    diff = """diff --git a/src/a.py b/src/a.py
+index 111..222 100644
+--- a/src/a.py
++++ b/src/a.py
+@@ -1,2 +1,2 @@
+--- not a header, a removed SQL comment line
++x = 1
+ y = 2
+diff --git a/logo.png b/logo.png
+Binary files a/logo.png and b/logo.png differ
+diff --git a/old.py b/new.py
+similarity index 90%
+rename from old.py
+rename to new.py
+--- a/old.py
++++ b/new.py
+@@ -1 +1 @@
+-a = 1
++a = 2
+"""
+    sections = list(parser.iter_file_diffs(diff.splitlines()))
+    assert [p for p, _ in sections] == ["src/a.py", "new.py"]
+    assert "--- not a header, a removed SQL comment line" in sections[0][1]
+
+
+def test_parse_diff_lines_accepts_iterables():
+    lines = iter(["+++ b/x.py\n", "+def f():\n", "+    pass\n"])
+    out = parser.parse_diff_lines(lines)
+    assert out["files_changed"] == ["x.py"]
+    assert out["added_functions"] == ["f"]
@@ -0,0 +1,60 @@
+from autopr import pathfilter, reviewer
+from autopr.generator import generate_pr_from
+
+
+DIFF = """diff --git a/src/app.py b/src/app.py
+--- a/src/app.py
++++ b/src/app.py
+@@ -1 +1,2 @@
+ x = 1
++print(x)
+diff --git a/package-lock.json b/package-lock.json
+--- a/package-lock.json
++++ b/package-lock.json
+@@ -1 +1 @@
+-{"lockfileVersion": 1}
++{"lockfileVersion": 2, "packages": {"eval(": "TODO"}}
+diff --git a/web/vendor/lib.min.js b/web/vendor/lib.min.js
+--- a/web/vendor/lib.min.js
++++ b/web/vendor/lib.min.js
+@@ -0,0 +1 @@
++var a=1;eval(a);
+"""
+
+
+def test_default_and_configured_globs():
+    pf = pathfilter.PathFilter(exclude=["docs/generated/**"], include=["vendor/ours/**"])
+    assert pf.excluded("yarn.lock")
+    assert pf.excluded("a/b/node_modules/x/index.js")
+    assert pf.excluded("proto/api_pb2.py")
+    assert pf.excluded("docs/generated/ref.md")
+    assert not pf.excluded("docs/guide.md")
+    assert not pf.excluded("vendor/ours/patch.py")
+    assert not pf.excluded("src/app.py")
+    assert not pathfilter.PathFilter(use_defaults=False).excluded("yarn.lock")
+
+
+def test_filter_diff_reports_excluded_files_and_tokens():
+    kept, report = pathfilter.filter_diff(DIFF)
+    assert "src/app.py" in kept
+    assert "lockfileVersion" not in kept
+    assert report["excluded_files"] == ["package-lock.json", "web/vendor/lib.min.js"]
+    assert report["tokens_saved"] > 0
+
+
+def test_config_file_is_honoured(tmp_path, monkeypatch):
+    cfg = tmp_path / ".autopr.toml"
+    cfg.write_text('[filter]\nexclude = ["src/**"]\n', encoding="utf-8")
+    monkeypatch.setenv("AUTOPR_CONFIG", str(cfg))
+    kept, report = pathfilter.filter_diff(DIFF)
+    assert "src/app.py" in report["excluded_files"]
+
+
+def test_review_and_generate_skip_excluded_content():
+    out = reviewer.review_pr(DIFF)
+    assert not any(f["type"] == "unsafe_eval" for f in out["findings"])
+    assert out["_filtered"]["tokens_saved"] > 0
+
+    pr = generate_pr_from(DIFF, ["chore: bump deps"])
+    assert "package-lock.json" in pr["files_impacted"]
+    assert "lockfileVersion" not in pr["what_changed"]
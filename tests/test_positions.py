@@ -0,0 +1,55 @@
+from autopr import positions, reviewer
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,3 +1,4 @@
+ import os
+-import sys
++import json
++print(os.name)
+ x = 1
+@@ -20,2 +21,3 @@ def f():
+     return 1
++# TODO: later
+ y = 2
+diff --git a/lib.py b/lib.py
+--- a/lib.py
++++ b/lib.py
+@@ -5,0 +6,1 @@
++z = eval("1")
+"""
+
+
+def test_positions_count_from_first_hunk_header():
+    index = positions.DiffIndex(DIFF)
+    assert index.locate("app.py", 1) == {"file": "app.py", "line": 1, "position": 1}
+    assert index.locate("app.py", 2)["position"] == 3  # after the removed line
+    assert index.locate("app.py", 22)["position"] == 8  # second header takes a position
+    assert index.locate("lib.py", 6)["position"] == 1
+    assert index.locate("app.py", 10) is None
+    assert index.locate("missing.py", 1) is None
+
+
+def test_added_line_maps_to_new_file_line():
+    fi = positions.DiffIndex(DIFF).files["app.py"]
+    assert fi.added_text.splitlines() == ["import json", "print(os.name)", "# TODO: later"]
+    assert [fi.added_line(k) for k in (1, 2, 3, 4)] == [2, 3, 22, None]
+
+
+def test_review_findings_carry_file_line_and_position():
+    out = reviewer.review_pr(DIFF)
+    located = {(f["type"], f.get("file"), f.get("line"), f.get("position")) for f in out["findings"]}
+    assert ("debug_print", "app.py", 3, 4) in located
+    assert ("todo", "app.py", 22, 8) in located
+
+
+def test_review_payload_batches_inline_comments():
+    findings = [
+        {"type": "todo", "message": "TODO", "severity": "low", "file": "a.py", "line": 3, "position": 2},
+        {"type": "unused_import", "message": "unused", "severity": "low", "file": "a.py"},
+    ]
+    payload = positions.review_payload(findings, "Summary", commit_id="abc")
+    assert payload["commit_id"] == "abc"
+    assert payload["comments"] == [{"path": "a.py", "position": 2, "body": "**todo** (low): TODO"}]
+    assert "unused" in payload["body"]
@@ -109,3 +109,48 @@ def test_anthropic_provider_title_and_description(monkeypatch):
     d = p.generate_pr_description("+ added", ["fix: a"], None)
     assert isinstance(d, dict)
     assert d.get("title", "").startswith("Fix:")
+
+
+def test_openai_provider_extracts_fenced_json_without_repair(monkeypatch):
+    wrapped = "Here you go:\n```json\n" + json.dumps({"summary": "ok", "findings": [], "confidence": 0.8}) + "\n```"
+    fake = _make_fake_openai_module(wrapped)
+    monkeypatch.setitem(sys.modules, "openai", fake)
+
+    from autopr.providers import OpenAIProvider
+
+    r = OpenAIProvider(api_key="fake").review_code("+x = 1")
+    assert r["summary"] == "ok"
+    assert fake.ChatCompletion.call_count == 1
+    assert "repairs" not in r["_usage"]
+
+
+def test_openai_provider_uses_small_repair_prompt(monkeypatch):
+    fixed = json.dumps({"summary": "fixed", "findings": [{"type": "bug", "message": "m", "severity": "high"}], "confidence": 0.6})
+    fake = _make_fake_openai_module("The code looks fine overall, nothing to report.", fixed)
+    monkeypatch.setitem(sys.modules, "openai", fake)
+
+    from autopr.providers import OpenAIProvider
+
+    r = OpenAIProvider(api_key="fake").review_code("+x = 1\n" * 50)
+    assert r["summary"] == "fixed"
+    assert r["_usage"]["repairs"] == 1
+    assert fake.ChatCompletion.call_count == 2
+
+
+def test_openai_provider_warms_the_sdk_client(monkeypatch):
+    listed = []
+
+    class FakeClient:
+        def __init__(self, api_key=None, base_url=None):
+            self.models = types.SimpleNamespace(list=lambda timeout=None: listed.append(timeout))
+
+    fake = _make_fake_openai_module("{}")
+    fake.OpenAI = FakeClient
+    monkeypatch.setitem(sys.modules, "openai", fake)
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:9")  # nothing listens: streaming client not connected
+
+    from autopr.providers import OpenAIProvider
+
+    out = OpenAIProvider(api_key="fake").warm()
+    assert listed == [5.0]
+    assert out["sdk_connected"] is True and out["connected"] is False
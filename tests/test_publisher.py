@@ -0,0 +1,91 @@
+import json
+
+from autopr import github, publisher, render
+
+
+def _comment_routes(fake_github, existing=()):
+    comments = [dict(c) for c in existing]
+
+    def list_comments(handler, raw):
+        return 200, {}, comments
+
+    def create(handler, raw):
+        comments.append({"id": 100 + len(comments), "body": json.loads(raw)["body"]})
+        return 201, {}, comments[-1]
+
+    def update(handler, raw):
+        comments[-1]["body"] = json.loads(raw)["body"]
+        return 200, {}, comments[-1]
+
+    fake_github.route("GET", "/repos/octo/demo/issues/7/comments", list_comments)
+    fake_github.route("POST", "/repos/octo/demo/issues/7/comments", create)
+    fake_github.route("PATCH", f"/repos/octo/demo/issues/comments/{(existing[-1]['id'] if existing else 100)}", update)
+    return comments
+
+
+def _writes(fake_github):
+    return fake_github.calls("POST") + fake_github.calls("PATCH")
+
+
+def test_render_markdown_is_stable():
+    review = {"summary": "Looks fine", "findings": [{"type": "todo", "severity": "low", "message": "TODO found"}], "_tests": {"passed": 3, "failed": 0, "errors": 0, "skipped": 1}}
+    md = render.render_markdown({"review": review})
+    assert md.startswith(render.TITLE)
+    assert "- **todo** (low): TODO found" in md
+    assert "Passed: 3" in md
+    assert md == render.render_markdown({"review": dict(review)})
+    assert md.endswith("---\n" + render.FOOTER)
+
+
+def test_render_markdown_keeps_rollback_plan_and_changed_files():
+    pr = {"title": "Fix parser", "rollback_plan": "Revert the commit", "_context": {"files_changed": ["src/a.py", "README.md"]}}
+    md = render.render_markdown({"pr": pr, "review": {"summary": "ok"}})
+    assert "**Rollback:** Revert the commit" in md
+    assert "## 🗂️ Files changed\n- src/a.py\n- README.md" in md
+    assert md.index("Files changed") < md.index(render.FOOTER)
+
+
+def test_publish_creates_then_skips_then_edits(fake_github):
+    comments = _comment_routes(fake_github)
+    client = github.GitHubClient(base_url=fake_github.url, min_write_interval=0)
+
+    first = publisher.publish(client, "octo/demo", 7, "body v1")
+    assert first["action"] == "created"
+    assert comments[0]["body"].startswith(publisher.MARKER)
+
+    assert publisher.publish(client, "octo/demo", 7, "body v1")["action"] == "unchanged"
+    assert len(_writes(fake_github)) == 1
+    # the remembered hash answers without even listing comments
+    assert len(fake_github.calls("GET")) == 1
+
+    assert publisher.publish(client, "octo/demo", 7, "body v2")["action"] == "updated"
+    patched = fake_github.calls("PATCH", "/repos/octo/demo/issues/comments/100")
+    assert len(patched) == 1 and "body v2" in json.loads(patched[0]["body"])["body"]
+    assert len(fake_github.calls("POST")) == 1
+
+
+def test_publish_finds_existing_comment_by_marker(fake_github):
+    digest = publisher.content_hash("same body")
+    existing = [{"id": 1, "body": "LGTM"}, {"id": 2, "body": publisher.stamp("same body", digest)}]
+    _comment_routes(fake_github, existing)
+    client = github.GitHubClient(base_url=fake_github.url, min_write_interval=0)
+
+    out = publisher.publish(client, "octo/demo", 7, "same body")
+    assert out == {"action": "unchanged", "comment_id": 2, "hash": digest}
+    assert not _writes(fake_github)
+
+    # a fresh client (no remembered state) still edits the same comment
+    other = github.GitHubClient(base_url=fake_github.url, min_write_interval=0)
+    assert publisher.publish(other, "octo/demo", 7, "new body")["action"] == "updated"
+    assert len(fake_github.calls("PATCH", "/repos/octo/demo/issues/comments/2")) == 1
+
+
+def test_publish_review_skips_already_posted_comments(fake_github):
+    fake_github.route("POST", "/repos/octo/demo/pulls/7/reviews", (200, {"id": 5}))
+    client = github.GitHubClient(base_url=fake_github.url, min_write_interval=0)
+    payload = {"body": "x", "event": "COMMENT", "comments": [{"path": "a.py", "position": 2, "body": "TODO"}]}
+    assert publisher.publish_review(client, "octo/demo", 7, payload) == {"id": 5}
+    moved = {**payload, "comments": [{"path": "a.py", "position": 4, "body": "TODO"}]}
+    assert publisher.publish_review(client, "octo/demo", 7, moved) is None
+    assert publisher.publish_review(client, "octo/demo", 7, {**payload, "comments": []}) is None
+    assert len(fake_github.calls("POST")) == 1
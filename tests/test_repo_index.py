@@ -0,0 +1,91 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from autopr import repo_index, reviewer
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    (tmp_path / "util.py").write_text("def helper(x):\n    return x\n\n\ndef other():\n    return 1\n")
+    (tmp_path / "a.py").write_text("from util import helper\n\n\ndef run():\n    return helper(1)\n")
+    (tmp_path / "b.py").write_text("import util\n\nvalue = util.helper(2)\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "base")
+    return tmp_path
+
+
+def test_index_records_definitions_and_call_sites(repo):
+    index = repo_index.load_index(str(repo), "HEAD", workers=0)
+    assert index.defined_in("helper") == {"util.py"}
+    assert index.call_sites("helper") == [("a.py", 1), ("a.py", 5), ("b.py", 3)]
+    assert index.stats["parsed"] == 3
+
+
+def test_update_only_parses_changed_blobs(repo):
+    repo_index.load_index(str(repo), "HEAD", workers=0)
+    (repo / "b.py").write_text("import util\n\nvalue = util.other()\n")
+    (repo / "a.py").unlink()
+    _git(repo, "commit", "-qam", "change")
+    index = repo_index.load_index(str(repo), "HEAD", workers=0)
+    assert (index.stats["updated"], index.stats["removed"], index.stats["parsed"]) == (1, 1, 1)
+    assert index.call_sites("helper") == []
+    assert index.call_sites("other") == [("b.py", 3)]
+
+
+def test_unchanged_index_is_not_rewritten(repo):
+    repo_index.load_index(str(repo), "HEAD", workers=0)
+    path = repo_index.index_path(str(repo))
+    before = os.stat(path).st_mtime_ns
+    time.sleep(0.01)
+    repo_index.load_index(str(repo), "HEAD", workers=0)
+    assert os.stat(path).st_mtime_ns == before
+
+
+def test_parallel_build_matches_in_process_build(repo, monkeypatch):
+    monkeypatch.setattr(repo_index, "PARALLEL_MIN_FILES", 1)
+    index = repo_index.load_index(str(repo), "HEAD", workers=2)
+    assert index.defined_in("helper") == {"util.py"}
+
+
+def test_review_reports_dangling_references(repo):
+    (repo / "util.py").write_text("def other():\n    return 1\n")
+    _git(repo, "commit", "-qam", "drop helper")
+    diff = _git(repo, "diff", "HEAD~1..HEAD") + "\n"
+    found = [f for f in reviewer.review_pr(diff, repo=str(repo), head="HEAD")["findings"] if f["type"] == "dangling_reference"]
+    assert len(found) == 1
+    assert found[0]["file"] == "util.py"
+    assert "still referenced in 2 file(s)" in found[0]["message"]
+    assert found[0]["call_sites"][0] == {"file": "a.py", "line": 1}
+
+
+def test_moved_definition_is_not_reported(repo):
+    diff = "diff --git a/util.py b/util.py\n--- a/util.py\n+++ b/util.py\n@@ -1,2 +0,0 @@\n-def helper(x):\n-    return x\n"
+    index = repo_index.load_index(str(repo), "HEAD", workers=0)
+    # helper is still defined in util.py at HEAD, as if it had moved there
+    assert repo_index.removed_definitions(diff) == {"util.py": ["helper"]}
+    assert repo_index.dangling_references(diff, index) == []
+
+
+def test_removed_method_used_as_attribute_call_is_not_reported(repo):
+    (repo / "store.py").write_text("class Store:\n    def items(self):\n        return []\n\n    def keys(self):\n        return []\n")
+    (repo / "other.py").write_text("def pairs(d):\n    return d.items()\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "store")
+    (repo / "store.py").write_text("class Store:\n    def keys(self):\n        return []\n")
+    _git(repo, "commit", "-qam", "drop Store.items")
+    diff = _git(repo, "diff", "HEAD~1..HEAD") + "\n"
+    assert repo_index.removed_definitions(diff) == {}
+    index = repo_index.load_index(str(repo), "HEAD", workers=0)
+    assert index.call_sites("items") == []
+    found = reviewer.review_pr(diff, repo=str(repo), head="HEAD")["findings"]
+    assert not [f for f in found if f["type"] == "dangling_reference"]
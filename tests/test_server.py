@@ -0,0 +1,72 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from autopr import server
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+SCRIPT = textwrap.dedent(
+    """
+    import sys, time
+    from autopr import server
+    from autopr.main import app
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(1.0)
+        return {"done": True}
+
+    sock = server.bind_socket("127.0.0.1", 0)
+    print(sock.getsockname()[1], flush=True)
+    sys.exit(server.serve(workers=2, drain_timeout=5, log_level="warning", sock=sock))
+    """
+)
+
+
+def test_bind_socket_is_inheritable():
+    sock = server.bind_socket("127.0.0.1", 0)
+    try:
+        assert sock.get_inheritable()
+        assert sock.getsockname()[1] > 0
+    finally:
+        sock.close()
+
+
+def test_warm_worker_with_stub_provider():
+    assert server.warm_worker() == {"provider": "StubProvider"}
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork needs os.fork")
+def test_sigterm_drains_in_flight_requests():
+    env = dict(os.environ, PYTHONPATH=SRC, AUTOPR_PROVIDER="stub")
+    proc = subprocess.Popen([sys.executable, "-c", SCRIPT], stdout=subprocess.PIPE, env=env, text=True)
+    try:
+        port = int(proc.stdout.readline())
+        url = f"http://127.0.0.1:{port}"
+        for _ in range(50):
+            try:
+                if httpx.get(url + "/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        result = {}
+        t = threading.Thread(target=lambda: result.update(r=httpx.get(url + "/slow", timeout=10)))
+        t.start()
+        time.sleep(0.3)
+        proc.send_signal(signal.SIGTERM)
+        t.join(10)
+        assert result["r"].status_code == 200
+        assert result["r"].json() == {"done": True}
+        assert proc.wait(10) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
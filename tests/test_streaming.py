@@ -0,0 +1,71 @@
+import json
+import sys
+import types
+
+import pytest
+
+from autopr.extraction import FindingStream
+from autopr.fakellm import FakeLLMServer
+
+
+REVIEW = {
+    "summary": "three issues",
+    "findings": [{"type": f"t{i}", "message": f"issue {i}", "severity": "low"} for i in range(3)],
+    "confidence": 0.7,
+}
+
+
+def _reply(prompt):
+    # prose after the object must never be read
+    return "```json\n" + json.dumps(REVIEW) + "\n```\n" + "Some closing remarks. " * 50
+
+
+@pytest.fixture
+def server():
+    with FakeLLMServer(reply=_reply, chunk_size=6, chunk_delay=0.002) as srv:
+        yield srv
+
+
+def _openai(monkeypatch, url):
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace())
+    monkeypatch.setenv("OPENAI_BASE_URL", url + "/v1")
+    from autopr.providers import OpenAIProvider
+
+    return OpenAIProvider(api_key="fake", model="fake-model")
+
+
+def _anthropic(monkeypatch, url):
+    monkeypatch.setitem(sys.modules, "anthropic", types.SimpleNamespace(Client=lambda api_key=None: object()))
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", url)
+    from autopr.providers import AnthropicProvider
+
+    return AnthropicProvider(api_key="fake", model="fake-model")
+
+
+def test_finding_stream_emits_each_finding_once():
+    text = json.dumps(REVIEW)
+    fs = FindingStream()
+    got = []
+    for ch in text:
+        got.extend(fs.feed(ch))
+    assert [f["type"] for f in got] == ["t0", "t1", "t2"]
+    assert fs.closed
+
+
+@pytest.mark.parametrize("make", [_openai, _anthropic])
+def test_stream_stops_when_object_closes(monkeypatch, server, make):
+    provider = make(monkeypatch, server.url)
+    seen = []
+    out = provider.review_code_streaming("+x = 1", on_finding=seen.append)
+    assert out["summary"] == "three issues"
+    assert len(seen) == 3 and len(out["findings"]) == 3
+    assert out["_stream"]["completed"] and not out["_stream"]["stopped_early"]
+    total_chunks = len(_reply("")) // 6
+    assert server.stats["chunks_sent"] < total_chunks
+
+
+def test_stream_stops_at_max_findings(monkeypatch, server):
+    provider = _openai(monkeypatch, server.url)
+    out = provider.review_code_streaming("+x = 1", max_findings=1)
+    assert [f["type"] for f in out["findings"]] == ["t0"]
+    assert out["_stream"]["stopped_early"]
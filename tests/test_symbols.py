@@ -0,0 +1,99 @@
+import subprocess
+
+import pytest
+
+from autopr import cache, reviewer, symbols
+
+SOURCE = """import os
+import json
+
+
+def load(path):
+    try:
+        return open(path).read()
+    except OSError:
+        return os.devnull
+"""
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    (tmp_path / "mod.py").write_text(SOURCE)
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "base")
+    return tmp_path
+
+
+def test_blob_sha_matches_git(repo):
+    assert symbols.git_blob_sha(SOURCE.encode()) == _git(repo, "rev-parse", "HEAD:mod.py")
+
+
+def test_summary_records_imports_defs_and_functions():
+    s = symbols.summarize(SOURCE)
+    assert [i[0] for i in s["imports"]] == ["os", "json"]
+    assert ["load", 5, "function"] in s["defs"]
+    assert s["functions"][0]["has_try"] is True
+    assert "os" in s["names"] and "json" not in s["names"]
+
+
+def test_post_image_summaries_are_cached_by_blob(repo):
+    symbols.stats.update(hits=0, misses=0)
+    first = symbols.post_image_summaries(str(repo), "HEAD", ["mod.py"])
+    second = symbols.post_image_summaries(str(repo), "HEAD", ["mod.py"])
+    assert first == second
+    assert symbols.stats == {"hits": 1, "misses": 1}
+
+
+@pytest.mark.parametrize("rev", ["HEAD", "HEAD~0", "main", "origin/pr-1", "v1.0^{commit}", "a" * 40])
+def test_check_rev_accepts_commits_and_refs(rev):
+    assert symbols.check_rev(rev) == rev
+
+
+@pytest.mark.parametrize("rev", ["--output=/tmp/x", "-r", "", "a..b", "HEAD with space"])
+def test_check_rev_rejects_options_and_ranges(rev, repo):
+    with pytest.raises(RuntimeError):
+        symbols.check_rev(rev)
+    with pytest.raises(RuntimeError, match="Not a commit id"):
+        symbols.blob_shas(str(repo), rev, ["mod.py"])
+
+
+def test_api_rejects_option_like_head(monkeypatch, repo):
+    from fastapi.testclient import TestClient
+
+    from autopr.main import app
+
+    monkeypatch.setenv("AUTOPR_REPO", str(repo))
+    r = TestClient(app).post("/review", json={"diff": "+x = 1\n", "head": "--output=/tmp/pwned"})
+    assert r.status_code == 400 and "Invalid head" in r.json()["detail"]
+
+
+def test_review_uses_whole_file_context(repo):
+    # hoist an import used by unchanged code, and add one that really is unused
+    (repo / "main.py").write_text("def main():\n    import sys\n    return sys.argv\n")
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "main")
+    (repo / "main.py").write_text("import sys\nimport re\n\n\ndef main():\n    return sys.argv\n")
+    _git(repo, "commit", "-qam", "hoist")
+    diff = _git(repo, "diff", "HEAD~1..HEAD") + "\n"
+    added_only = [f["message"] for f in reviewer.review_pr(diff)["findings"] if f["type"] == "unused_import"]
+    whole = [(f["file"], f["line"], f["message"]) for f in reviewer.review_pr(diff, repo=str(repo), head="HEAD")["findings"] if f["type"] == "unused_import"]
+    assert "Imported `sys` is not used" in added_only
+    assert whole == [("main.py", 2, "Imported `re` is not used")]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    c = cache.DiskCache(str(tmp_path), max_bytes=2000)
+    for i in range(40):
+        c.set(f"k{i}", "x" * 100)
+    assert c.get("k0") is not None  # touch the oldest entry
+    assert c.evict() > 0
+    assert c.size() <= 2000
+    assert c.get("k0") is not None
+    assert c.get("k1") is None
@@ -0,0 +1,98 @@
+import sqlite3
+import subprocess
+
+import pytest
+
+from autopr import test_impact
+
+UTIL = "def helper(x):\n    return x\n\n\ndef other():\n    return 1\n"
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _numbits(lines):
+    out = bytearray(max(lines) // 8 + 1)
+    for n in lines:
+        out[n // 8] |= 1 << (n % 8)
+    return bytes(out)
+
+
+def _coverage_db(path, repo, rows):
+    # the tables coverage.py writes for line data with dynamic contexts
+    con = sqlite3.connect(path)
+    con.executescript("create table file (id integer primary key, path text);"
+                      "create table context (id integer primary key, context text);"
+                      "create table line_bits (file_id integer, context_id integer, numbits blob);")
+    for i, (file, context, lines) in enumerate(rows, 1):
+        con.execute("insert into file values (?, ?)", (i, str(repo / file)))
+        con.execute("insert into context values (?, ?)", (i, context))
+        con.execute("insert into line_bits values (?, ?, ?)", (i, i, _numbits(lines)))
+    con.commit()
+    con.close()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    (tmp_path / "util.py").write_text(UTIL)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_util.py").write_text("from util import helper\n\n\ndef test_helper():\n    assert helper(1) == 1\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "base")
+    return tmp_path
+
+
+def _diff(repo, path, text):
+    (repo / path).write_text(text)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "change")
+    return _git(repo, "diff", "HEAD~1..HEAD") + "\n"
+
+
+def test_numbits_decoding():
+    assert test_impact._numbits_to_lines(_numbits([1, 2, 9, 17])) == [1, 2, 9, 17]
+
+
+def test_map_selects_tests_that_executed_the_changed_function(repo, tmp_path_factory):
+    db = tmp_path_factory.mktemp("cov") / ".coverage"
+    _coverage_db(str(db), repo, [("util.py", "tests/test_util.py::test_helper|run", [1, 2]), ("util.py", "", [1, 5])])
+    test_map = test_impact.TestMap.from_coverage(str(db), str(repo))
+    assert test_map.functions["util.py"] == {"helper": [0]}
+
+    diff = _diff(repo, "util.py", UTIL.replace("return x", "return x * 1"))
+    out = test_impact.affected_tests(diff, str(repo), "HEAD", test_map)
+    assert out["tests"] == ["tests/test_util.py::test_helper"]
+    assert out["reasons"]["tests/test_util.py::test_helper"] == "executes util.py::helper"
+
+    diff = _diff(repo, "util.py", UTIL.replace("return x", "return x * 1").replace("return 1", "return 2"))
+    assert test_impact.affected_tests(diff, str(repo), "HEAD", test_map)["tests"] == []
+    found = test_impact.untested_findings(diff, str(repo), "HEAD", test_map)
+    assert [(f["type"], f["file"], f["line"]) for f in found] == [("untested_change", "util.py", 6)]
+
+
+def test_untested_findings_skip_files_the_map_never_measured(repo):
+    (repo / "pkg").mkdir()
+    (repo / "pkg" / "core.py").write_text(UTIL)
+    (repo / "scripts").mkdir()
+    (repo / "scripts" / "tool.py").write_text(UTIL)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "more")
+    test_map = test_impact.TestMap(["tests/test_core.py::test_helper"], {"pkg/core.py": {"helper": [0]}})
+
+    diff = _diff(repo, "scripts/tool.py", UTIL.replace("return 1", "return 2"))
+    assert test_impact.untested_findings(diff, str(repo), "HEAD", test_map) == []
+
+    diff = _diff(repo, "pkg/new.py", "def fresh():\n    return 1\n")
+    found = test_impact.untested_findings(diff, str(repo), "HEAD", test_map)
+    assert [(f["file"], f["line"]) for f in found] == [("pkg/new.py", 1)]
+
+
+def test_import_graph_is_used_without_a_map(repo):
+    diff = _diff(repo, "util.py", UTIL + "\n\ndef extra():\n    return 3\n")
+    out = test_impact.affected_tests(diff, str(repo), "HEAD")
+    assert out["tests"] == ["tests/test_util.py"]
+    assert out["reasons"]["tests/test_util.py"] == "imports util.py"
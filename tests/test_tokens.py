@@ -0,0 +1,64 @@
+import json
+import sys
+import types
+
+from autopr import compaction, tokens
+
+
+def test_approx_tokenizer_count_and_truncate():
+    tok = tokens.ApproxTokenizer()
+    assert tok.count("") == 0
+    assert tok.count("def add(a, b): return a + b") >= 10
+    cut = tok.truncate("word " * 1000, 50)
+    assert tok.count(cut) <= 50
+
+
+def test_fit_diff_chunks_and_truncates(monkeypatch):
+    monkeypatch.setenv("AUTOPR_TOKENIZER", "approx")
+    monkeypatch.setenv("AUTOPR_MAX_PROMPT_TOKENS", "1400")
+    diff = "".join(f"--- a/f{i}.py\n+++ b/f{i}.py\n@@ -0,0 +1,1 @@\n+" + "x = 1 " * 60 + "\n" for i in range(10))
+    template = "Review:\n{diff}\nDone"
+    chunked = tokens.fit_diff(template, diff, strategy="chunk")
+    assert len(chunked["prompts"]) > 1
+    assert all(n <= 1400 for n in chunked["prompt_tokens"])
+    assert "f0.py" in chunked["prompts"][0] and "f9.py" in chunked["prompts"][-1]
+
+    cut = tokens.fit_diff(template, diff, strategy="truncate")
+    assert len(cut["prompts"]) == 1 and cut["truncated"]
+    assert cut["prompt_tokens"][0] <= 1400
+
+
+def test_fit_diff_chunks_compacted_diffs_per_file(monkeypatch):
+    monkeypatch.setenv("AUTOPR_TOKENIZER", "approx")
+    monkeypatch.setenv("AUTOPR_MAX_PROMPT_TOKENS", "1600")
+    diff = "".join(f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n@@ -0,0 +1,20 @@\n"
+                   + "".join(f"+{'abcdefgh'[i - 1] * 3}_value_{n} = compute({n}, '{'abcdefgh'[i - 1]}')\n" for n in range(20)) for i in range(1, 9))
+    compact, stats = compaction.compact_diff(diff)
+    assert len(stats["files"]) == 8
+    chunked = tokens.fit_diff("Review:\n{diff}\nDone", compact, strategy="chunk")
+    assert len(chunked["prompts"]) > 1 and not chunked["truncated"]
+    text = "\n".join(chunked["prompts"])
+    assert all(f"F{i} f{i}.py" in text for i in range(1, 9))
+    assert "hhh_value_19" in chunked["prompts"][-1]
+
+
+def test_provider_records_usage(monkeypatch):
+    monkeypatch.setenv("AUTOPR_TOKENIZER", "approx")
+    usage = types.SimpleNamespace(prompt_tokens=42, completion_tokens=7)
+
+    class ChatCompletion:
+        @staticmethod
+        def create(model, messages, temperature):
+            msg = types.SimpleNamespace(content=json.dumps({"summary": "ok", "findings": [], "confidence": 0.9}))
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=msg)], usage=usage)
+
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(ChatCompletion=ChatCompletion))
+    from autopr.providers import OpenAIProvider
+
+    tokens.usage.reset()
+    out = OpenAIProvider(api_key="fake", model="m").review_code("+x = 1")
+    assert out["_usage"]["prompt_tokens"] == 42
+    assert out["_usage"]["completion_tokens"] == 7
+    snap = tokens.usage.snapshot()
+    assert snap["by_model"]["openai:m"]["calls"] == 1
+    assert snap["totals"]["prompt_tokens"] == 42
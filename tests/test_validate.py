@@ -0,0 +1,79 @@
+import subprocess
+
+import pytest
+
+from autopr import ci_parser, validate
+
+
+def _git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "t@example.com")
+    _git(tmp_path, "config", "user.name", "t")
+    (tmp_path / "calc.py").write_text("def add(a, b):\n    return a + b\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_add.py").write_text("from calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n")
+    (tmp_path / "tests" / "test_flaky.py").write_text("def test_known_broken():\n    assert False\n")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-qm", "base")
+    (tmp_path / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+    _git(tmp_path, "commit", "-qam", "break add")
+    return tmp_path
+
+
+def test_shard_balances_by_size():
+    files = [{"path": "a", "size": 10}, {"path": "b", "size": 6}, {"path": "c", "size": 5}, {"path": "d", "size": 1}]
+    assert validate.shard(files, 2) == [["a", "d"], ["b", "c"]]
+    assert validate.shard(files[:1], 4) == [["a"]]
+
+
+def test_compare_runs_splits_new_and_preexisting():
+    base = {"failures": [{"name": "test_a"}, {"name": "test_b"}]}
+    head = {"failures": [{"name": "test_b"}, {"name": "test_c"}]}
+    assert ci_parser.compare_runs(base, head) == {"new_failures": ["test_c"], "preexisting_failures": ["test_b"], "fixed": ["test_a"]}
+
+
+@pytest.mark.parametrize("shards", [1, 2])
+def test_validate_reports_new_failures_without_touching_the_checkout(repo, shards):
+    out = validate.validate(str(repo), "HEAD~1", "HEAD", shards=shards, timeout=60)
+    assert out["new_failures"] == ["test_add"]
+    assert out["preexisting_failures"] == ["test_known_broken"]
+    assert (out["base"]["passed"], out["head"]["failed"]) == (1, 2)
+    assert out["head"]["shards"] == shards
+    assert "return a - b" in (repo / "calc.py").read_text()
+    assert _git(repo, "worktree", "list").count("\n") == 0
+
+
+def test_compare_runs_counts_collection_errors():
+    log = "==== ERRORS ====\n____ ERROR collecting tests/test_x.py ____\nImportError: nope\n=== short test summary info ===\nERROR tests/test_x.py - ImportError: nope\n==== 1 error in 0.10s ====\n"
+    head = ci_parser.parse_pytest_output(log)
+    assert head["complete"] and head["error_tests"][0]["name"] == "tests/test_x.py"
+    assert ci_parser.compare_runs({"failures": []}, head)["new_failures"] == ["ERROR tests/test_x.py"]
+
+
+@pytest.mark.parametrize("name, text", [
+    ("test_broken.py", "import does_not_exist\n"),
+    ("test_slow.py", "import time\n\n\ndef test_slow():\n    time.sleep(30)\n"),
+])
+def test_validate_fails_on_collection_errors_and_timeouts(repo, name, text):
+    (repo / "tests" / name).write_text(text)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-qm", "break head")
+    out = validate.validate(str(repo), "HEAD~1", "HEAD", timeout=5)
+    if name == "test_broken.py":
+        assert "ERROR tests/test_broken.py" in out["new_failures"]
+    else:
+        assert out["head"]["incomplete"] == ["shard 1: timed out"]
+    assert out["passed"] is False
+
+
+def test_shards_use_pytest_collection(repo):
+    (repo / "pytest.ini").write_text("[pytest]\nnorecursedirs = vendored\n")
+    (repo / "vendored" / "tests").mkdir(parents=True)
+    (repo / "vendored" / "tests" / "test_other.py").write_text("def test_v():\n    assert False\n")
+    files = validate.list_test_files(str(repo))
+    assert sorted(f["path"] for f in files) == ["tests/test_add.py", "tests/test_flaky.py"]
@@ -0,0 +1,134 @@
+import copy
+import hashlib
+import hmac
+import json
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from autopr import publisher, webhooks
+from autopr.main import app
+from conftest import load_fixture
+
+
+def _sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def _sync_event(sha):
+    ev = load_fixture("webhooks", "pull_request_synchronize.json")
+    ev = copy.deepcopy(ev)
+    ev["pull_request"]["head"]["sha"] = sha
+    return ev
+
+
+def test_verify_signature():
+    body = b'{"a": 1}'
+    assert webhooks.verify_signature("s3cret", body, _sign("s3cret", body))
+    assert not webhooks.verify_signature("s3cret", body, _sign("other", body))
+    assert not webhooks.verify_signature("s3cret", body, None)
+    assert not webhooks.verify_signature("", body, None)
+    assert webhooks.verify_signature("", body, None, allow_unsigned=True)
+
+
+def test_endpoint_rejects_deliveries_without_a_configured_secret(monkeypatch):
+    monkeypatch.delenv("GITHUB_WEBHOOK_SECRET", raising=False)
+    monkeypatch.delenv("AUTOPR_WEBHOOK_ALLOW_UNSIGNED", raising=False)
+    monkeypatch.setattr(webhooks, "scheduler", webhooks.ReviewScheduler(lambda ev, c: None, debounce_seconds=60))
+    monkeypatch.setattr(webhooks, "deliveries", webhooks.DeliveryCache())
+    client = TestClient(app)
+    body = json.dumps(load_fixture("webhooks", "pull_request_opened.json")).encode()
+    headers = {"X-GitHub-Event": "pull_request", "X-GitHub-Delivery": "d-unsigned"}
+    r = client.post("/webhooks/github", content=body, headers=headers)
+    assert r.status_code == 401 and "not configured" in r.json()["detail"]
+
+    monkeypatch.setenv("AUTOPR_WEBHOOK_ALLOW_UNSIGNED", "1")
+    assert client.post("/webhooks/github", content=body, headers=headers).json()["status"] == "scheduled"
+
+
+def test_endpoint_rejects_bad_signature_and_dedupes_deliveries(monkeypatch):
+    monkeypatch.setenv("GITHUB_WEBHOOK_SECRET", "s3cret")
+    calls = []
+    monkeypatch.setattr(webhooks, "scheduler", webhooks.ReviewScheduler(lambda ev, c: calls.append(ev), debounce_seconds=60))
+    monkeypatch.setattr(webhooks, "deliveries", webhooks.DeliveryCache())
+    client = TestClient(app)
+    body = json.dumps(load_fixture("webhooks", "pull_request_opened.json")).encode()
+
+    r = client.post("/webhooks/github", content=body, headers={"X-GitHub-Event": "pull_request", "X-Hub-Signature-256": _sign("wrong", body)})
+    assert r.status_code == 401
+
+    headers = {"X-GitHub-Event": "pull_request", "X-GitHub-Delivery": "d-1", "X-Hub-Signature-256": _sign("s3cret", body)}
+    assert client.post("/webhooks/github", content=body, headers=headers).json()["status"] == "scheduled"
+    assert client.post("/webhooks/github", content=body, headers=headers).json()["status"] == "duplicate"
+    webhooks.scheduler.flush()
+    assert len(calls) == 1
+
+
+def test_synchronize_burst_is_debounced_to_latest_head():
+    seen = []
+    sched = webhooks.ReviewScheduler(lambda ev, c: seen.append(ev["pull_request"]["head"]["sha"]), debounce_seconds=0.2)
+    deliveries = webhooks.DeliveryCache()
+    for i in range(5):
+        res = webhooks.handle_event("pull_request", f"d-{i}", _sync_event(str(i) * 40), sched, deliveries)
+        assert res["status"] in ("scheduled", "debounced")
+    time.sleep(0.6)
+    assert seen == ["4" * 40]
+    assert sched.stats["debounced"] == 4
+
+
+def test_superseded_inflight_review_is_cancelled():
+    started = threading.Event()
+    results = {}
+
+    def runner(ev, cancelled):
+        sha = ev["pull_request"]["head"]["sha"]
+        if sha.startswith("1"):
+            started.set()
+            results[sha] = cancelled.wait(2)
+        else:
+            results[sha] = cancelled.is_set()
+
+    sched = webhooks.ReviewScheduler(runner, debounce_seconds=0)
+    sched.submit(("octo/demo", 7), "1" * 40, _sync_event("1" * 40))
+    assert started.wait(2)
+    sched.submit(("octo/demo", 7), "2" * 40, _sync_event("2" * 40))
+    sched.flush()
+    time.sleep(0.1)
+    assert results["1" * 40] is True
+    assert results["2" * 40] is False
+    assert sched.stats["cancelled"] == 1
+
+
+def test_default_runner_against_fake_github(fake_github):
+    diff = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -1,1 +1,3 @@\n x = 1\n+print('x')\n+# TODO later\n"
+    fake_github.route("GET", "/repos/octo/demo/pulls/7", (200, diff))
+    fake_github.route("POST", "/repos/octo/demo/pulls/7/reviews", (200, {"id": 1}))
+    fake_github.route("GET", "/repos/octo/demo/issues/7/comments", (200, []))
+    fake_github.route("POST", "/repos/octo/demo/issues/7/comments", (201, {"id": 9}))
+    event = load_fixture("webhooks", "pull_request_opened.json")
+    out = webhooks.github_review_runner(event, threading.Event())
+    assert out is not None
+    summary = fake_github.calls("POST", "/repos/octo/demo/issues/7/comments")
+    assert len(summary) == 1
+    assert json.loads(summary[0]["body"])["body"].startswith(publisher.MARKER)
+    posted = fake_github.calls("POST", "/repos/octo/demo/pulls/7/reviews")
+    assert len(posted) == 1
+    review = json.loads(posted[0]["body"])
+    assert "AutoPR review" in review["body"]
+    assert review["event"] == "COMMENT"
+    # every inline comment goes out in the same request
+    assert {(c["path"], c["position"]) for c in review["comments"]} >= {("a.py", 2), ("a.py", 3)}
+
+    # re-running on an unchanged diff writes nothing
+    webhooks.github_review_runner(event, threading.Event())
+    assert len(fake_github.calls("POST")) == 2
+    assert not fake_github.calls("PATCH")
+
+
+def test_default_runner_skips_when_cancelled(fake_github):
+    fake_github.route("GET", "/repos/octo/demo/pulls/7", (200, "+x = 1\n"))
+    cancelled = threading.Event()
+    cancelled.set()
+    assert webhooks.github_review_runner(load_fixture("webhooks", "pull_request_opened.json"), cancelled) is None
+    assert not fake_github.calls("POST")